@@ -1,12 +1,21 @@
 from langgraph.graph import START, END, StateGraph, MessagesState
-from langgraph.checkpoint.memory import MemorySaver
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langchain_openai import ChatOpenAI
 import os
+import sys
+from datetime import datetime
 from dotenv import load_dotenv
 from pydantic import BaseModel
 from typing import List
 
+# checkpointer.py is shared with the other agents; it lives in tool_integration_task
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tool_integration_task"))
+from checkpointer import make_checkpointer
+from context_window import (
+    SupportState, HistoryPolicy, PromptCacheStats,
+    make_summarize_node, stable_prompt, assemble_messages
+)
+
 
 
 load_dotenv()
@@ -15,13 +24,21 @@ load_dotenv()
 llm = ChatOpenAI(
     model="gpt-3.5-turbo",
     temperature=0,
-    api_key=os.getenv("OPENAI_API_KEY")
+    api_key=os.getenv("OPENAI_API_KEY"),
+    stream_usage=True  # usage (incl. cached prompt tokens) on streamed replies too
 )
 
+# How many prompt tokens the provider served from its prompt cache
+prompt_cache = PromptCacheStats()
+
+# How much of the thread goes to the LLM each call (HISTORY_POLICY, see context_window.py)
+history_policy = HistoryPolicy.from_env()
 
 
-support_prompt = SystemMessage(
-    content="""You are a helpful customer support agent for TechGadgets Inc.
+
+# Normalised once at import so the cacheable prompt prefix is byte-identical on every call
+support_prompt = stable_prompt(
+    """You are a helpful customer support agent for TechGadgets Inc.
     
     **COMPANY INFORMATION**:
     - TechGadgets Inc. sells laptops, smartphones, tablets, and accessories
@@ -51,20 +68,33 @@ support_prompt = SystemMessage(
 
 
 
-def support_agent(state: MessagesState) -> dict:
+async def support_agent(state: SupportState) -> dict:
     """Processes customer message with context memory"""
-    messages = [support_prompt] + state["messages"]
-    response = llm.invoke(messages)
-    return {"messages": [AIMessage(content=response.content)]}
+    messages = assemble_messages(support_prompt, history_policy, state)
+    response = await llm.ainvoke(messages)
+    prompt_cache.record(response)
+    response.response_metadata["timestamp"] = datetime.now().isoformat()
+    # Return the model's message as-is so streamed tokens and the final message share an id
+    return {"messages": [response]}
+
+
+# One checkpointer for the whole process; conversations are kept apart by thread_id.
+# Set CHECKPOINT_DB to persist them in SQLite (WAL) instead of memory.
+memory = make_checkpointer()
 
 
-def create_support_agent():
-    builder = StateGraph(MessagesState)
+def create_support_agent(checkpointer=None):
+    """Builds and compiles the support graph (compile once, share across sessions)"""
+    builder = StateGraph(SupportState)
     builder.add_node("support_agent", support_agent)
-    builder.add_edge(START, "support_agent")
+    if history_policy.mode == "summary":
+        builder.add_node("summarize_history", make_summarize_node(llm, history_policy))
+        builder.add_edge(START, "summarize_history")
+        builder.add_edge("summarize_history", "support_agent")
+    else:
+        builder.add_edge(START, "support_agent")
     builder.add_edge("support_agent", END)
-    memory = MemorySaver()
-    return builder.compile(checkpointer=memory)
+    return builder.compile(checkpointer=checkpointer if checkpointer is not None else memory)
 
 
 
@@ -0,0 +1,185 @@
+"""
+History policies: how much of a thread is sent to the LLM on each call.
+
+HISTORY_POLICY picks the policy (default "full"):
+  full    - every message, the original behaviour
+  window  - the last HISTORY_MAX_TURNS turns
+  tokens  - the newest turns that fit in HISTORY_TOKEN_BUDGET tokens
+  summary - turns older than the last HISTORY_MAX_TURNS are compacted into a
+            rolling summary kept in graph state; the summary is refreshed
+            every HISTORY_SUMMARY_EVERY turns so it is not rewritten per call
+
+A turn starts at a user message, and history is only ever cut between turns,
+so an AIMessage with tool_calls always travels with its ToolMessages.
+The checkpointed transcript itself is never trimmed.
+
+Messages are assembled as a stable prefix followed by a volatile tail, so the
+provider's prompt cache can reuse the prefix (tool schemas + system prompt)
+on every call; PromptCacheStats reports how much of each prompt was cached.
+"""
+
+import inspect
+import os
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import MessagesState
+
+
+class SupportState(MessagesState):
+    summary: str  # rolling summary of messages[:summary_upto]
+    summary_upto: int
+
+
+def approx_tokens(messages) -> int:
+    """Cheap token estimate (~4 characters per token plus per-message overhead)"""
+    total = 0
+    for message in messages:
+        total += 4 + len(str(message.content)) // 4
+        for call in getattr(message, "tool_calls", None) or []:
+            total += len(str(call.get("args", ""))) // 4 + 4
+    return total
+
+
+def split_turns(messages) -> list:
+    """Group messages into turns, each starting at a HumanMessage"""
+    turns = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def stable_prompt(text: str) -> SystemMessage:
+    """System prompt with normalised indentation, byte-identical on every call"""
+    return SystemMessage(content=inspect.cleandoc(text))
+
+
+def assemble_messages(system_prompt: SystemMessage, policy, state) -> list:
+    """
+    Stable, cacheable prefix first, volatile tail last.
+
+    The provider places tool schemas ahead of the messages, so the cached
+    prefix is tool schemas + system prompt. Anything that changes per call
+    (rolling summary, recent turns) only ever comes after it.
+    """
+    return [system_prompt] + policy.select(state)
+
+
+class PromptCacheStats:
+    """Prompt tokens served from the provider's prompt cache, read from usage metadata"""
+
+    def __init__(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+
+    def record(self, message) -> dict:
+        usage = getattr(message, "usage_metadata", None) or {}
+        prompt_tokens = usage.get("input_tokens", 0)
+        cached_tokens = (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+
+        self.calls += 1
+        self.prompt_tokens += prompt_tokens
+        self.cached_tokens += cached_tokens
+        return {"prompt_tokens": prompt_tokens, "cached_tokens": cached_tokens}
+
+    def stats(self) -> dict:
+        return {
+            "llm_calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "cache_hit_ratio": self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+        }
+
+
+class HistoryPolicy:
+    def __init__(self, mode="full", max_turns=10, token_budget=3000, summary_every=4):
+        if mode not in ("full", "window", "tokens", "summary"):
+            raise ValueError(f"Unknown history policy: {mode}")
+        self.mode = mode
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.summary_every = summary_every
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            mode=os.getenv("HISTORY_POLICY", "full"),
+            max_turns=int(os.getenv("HISTORY_MAX_TURNS", "10")),
+            token_budget=int(os.getenv("HISTORY_TOKEN_BUDGET", "3000")),
+            summary_every=int(os.getenv("HISTORY_SUMMARY_EVERY", "4"))
+        )
+
+    def select(self, state) -> list:
+        """Messages to send to the LLM for this call (without the system prompt)"""
+        messages = state["messages"]
+
+        if self.mode == "window":
+            return [m for turn in split_turns(messages)[-self.max_turns:] for m in turn]
+
+        if self.mode == "tokens":
+            kept, used = [], 0
+            for turn in reversed(split_turns(messages)):
+                cost = approx_tokens(turn)
+                # The current turn is always sent, even if it alone exceeds the budget
+                if kept and used + cost > self.token_budget:
+                    break
+                kept.insert(0, turn)
+                used += cost
+            return [m for turn in kept for m in turn]
+
+        if self.mode == "summary":
+            recent = messages[state.get("summary_upto", 0):]
+            summary = state.get("summary", "")
+            if summary:
+                return [SystemMessage(content=f"Summary of the earlier conversation:\n{summary}")] + recent
+            return recent
+
+        return messages
+
+    def summary_request(self, state):
+        """Prompt to refresh the rolling summary and the new summary_upto, or None if not due"""
+        if self.mode != "summary":
+            return None
+
+        upto = state.get("summary_upto", 0)
+        turns = split_turns(state["messages"][upto:])
+        if len(turns) <= self.max_turns + self.summary_every:
+            return None
+
+        older = [m for turn in turns[:-self.max_turns] for m in turn]
+        transcript = "\n".join(
+            f"{m.type}: {m.content}" for m in older if m.content
+        )
+        previous = state.get("summary", "")
+        prompt = (
+            "Update the running summary of this customer support conversation. "
+            "Keep customer details, products, order numbers, problems, steps already "
+            "tried and promises made. Be concise.\n\n"
+            f"Current summary:\n{previous or '(none)'}\n\n"
+            f"New messages:\n{transcript}"
+        )
+        return [HumanMessage(content=prompt)], upto + len(older)
+
+
+def make_summarize_node(llm, policy: HistoryPolicy):
+    """Graph node that compacts older turns into state["summary"] when due"""
+
+    def summarize_history(state) -> dict:
+        request = policy.summary_request(state)
+        if request is None:
+            return {}
+        prompt, upto = request
+        return {"summary": llm.invoke(prompt).content, "summary_upto": upto}
+
+    async def asummarize_history(state) -> dict:
+        request = policy.summary_request(state)
+        if request is None:
+            return {}
+        prompt, upto = request
+        response = await llm.ainvoke(prompt)
+        return {"summary": response.content, "summary_upto": upto}
+
+    return RunnableLambda(summarize_history, afunc=asummarize_history, name="summarize_history")
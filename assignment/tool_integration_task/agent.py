@@ -1,14 +1,21 @@
 from langgraph.graph import START, END, StateGraph, MessagesState
-from langgraph.checkpoint.memory import MemorySaver
-from langchain_core.messages import ToolMessage, AIMessage, SystemMessage
+from langchain_core.messages import ToolMessage, AIMessage, SystemMessage, HumanMessage
+from langchain_core.runnables import RunnableConfig
 from langchain_openai import ChatOpenAI
 from langchain_core.tools import Tool
 import os
+from datetime import datetime
 from dotenv import load_dotenv
 from pydantic import BaseModel
 from typing import List
 
-from tools import calculator, search
+from tools import calculator, calculator_batch, search
+from checkpointer import make_checkpointer
+from context_window import (
+    SupportState, HistoryPolicy, PromptCacheStats,
+    make_summarize_node, stable_prompt, assemble_messages
+)
+from response_cache import SemanticResponseCache, namespace
 
 load_dotenv()
 
@@ -16,17 +23,25 @@ load_dotenv()
 llm = ChatOpenAI(
     model="gpt-3.5-turbo",
     temperature=0,
-    api_key=os.getenv("OPENAI_API_KEY")
+    api_key=os.getenv("OPENAI_API_KEY"),
+    stream_usage=True  # usage (incl. cached prompt tokens) on streamed replies too
 )
 
-tools = [calculator, search]
+# How many prompt tokens the provider served from its prompt cache
+prompt_cache = PromptCacheStats()
+
+tools = [calculator, calculator_batch, search]
+
+llm_with_tools = llm.bind_tools(tools)
 
-llm.bind_tools(tools)
+# How much of the thread goes to the LLM each call (HISTORY_POLICY, see context_window.py)
+history_policy = HistoryPolicy.from_env()
 
 
 
-support_prompt = SystemMessage(
-    content="""You are a helpful customer support agent for TechGadgets Inc.
+# Normalised once at import so the cacheable prompt prefix is byte-identical on every call
+support_prompt = stable_prompt(
+    """You are a helpful customer support agent for TechGadgets Inc.
     
     **COMPANY INFORMATION**:
     - TechGadgets Inc. sells laptops, smartphones, tablets, and accessories
@@ -45,6 +60,7 @@ support_prompt = SystemMessage(
 
     You can use tools when helpful:
     - Use the calculator tool for any math or numeric reasoning
+    - Use calculator_batch to evaluate several expressions in one call
     - Use the search tool for company policies, warranty, returns, or shipping
     Always prefer tools over guessing.
     
@@ -61,17 +77,38 @@ support_prompt = SystemMessage(
 
 
 
-def support_agent(state: MessagesState) -> dict:
+# Opt-in semantic cache of final answers (RESPONSE_CACHE=1, see response_cache.py)
+response_cache = SemanticResponseCache.from_env()
+
+
+async def support_agent(state: SupportState, config: RunnableConfig) -> dict:
     """Processes customer message with context memory"""
-    messages = [support_prompt] + state["messages"]
-    response = llm.invoke(messages)
+    thread_id = config["configurable"].get("thread_id", "")
 
-   
+    # Only the first call of a turn can be answered from the cache
+    if response_cache is not None and isinstance(state["messages"][-1], HumanMessage):
+        response_cache.check_namespace(namespace(support_prompt, tools, llm.model_name))
+        cached = await response_cache.lookup(state, thread_id)
+        if cached is not None:
+            answer, similarity = cached
+            return {"messages": [AIMessage(content=answer, response_metadata={
+                "timestamp": datetime.now().isoformat(),
+                "response_cache": {"similarity": round(similarity, 4)}
+            })]}
 
-    return {"messages": [AIMessage(content=response.content)]}
+    messages = assemble_messages(support_prompt, history_policy, state)
+    response = await llm_with_tools.ainvoke(messages)
+    prompt_cache.record(response)
+    response.response_metadata["timestamp"] = datetime.now().isoformat()
 
+    if response_cache is not None and not response.tool_calls:
+        response_cache.store(thread_id, response.content)
 
-def tool_executor(state: MessagesState) -> dict:
+    # Keep the full AIMessage so tool_calls reach should_use_tools
+    return {"messages": [response]}
+
+
+async def tool_executor(state: MessagesState) -> dict:
     last_message = state["messages"][-1]
 
     if not last_message.tool_calls:
@@ -85,18 +122,20 @@ def tool_executor(state: MessagesState) -> dict:
 
         tool_fn = {
             "calculator": calculator,
+            "calculator_batch": calculator_batch,
             "search": search
         }.get(tool_name)
 
         if not tool_fn:
             continue
 
-        result = tool_fn.invoke(tool_args)
+        # Sync tools are run in a worker thread, never on the event loop
+        result = await tool_fn.ainvoke(tool_args)
 
         tool_messages.append(
             ToolMessage(
                 tool_call_id=call["id"],
-                content=result
+                content=str(result)
             )
         )
 
@@ -111,14 +150,25 @@ def should_use_tools(state: MessagesState) -> str:
     return "end"
 
 
-def create_support_agent():
+# One checkpointer for the whole process; conversations are kept apart by thread_id.
+# Set CHECKPOINT_DB to persist them in SQLite (WAL) instead of memory.
+memory = make_checkpointer()
+
+
+def create_support_agent(checkpointer=None):
+    """Builds and compiles the support graph (compile once, share across sessions)"""
 
-    builder = StateGraph(MessagesState)
+    builder = StateGraph(SupportState)
 
     builder.add_node("support_agent", support_agent)
     builder.add_node("tools", tool_executor)
 
-    builder.add_edge(START, "support_agent")
+    if history_policy.mode == "summary":
+        builder.add_node("summarize_history", make_summarize_node(llm, history_policy))
+        builder.add_edge(START, "summarize_history")
+        builder.add_edge("summarize_history", "support_agent")
+    else:
+        builder.add_edge(START, "support_agent")
 
     builder.add_conditional_edges(
         "support_agent",
@@ -131,8 +181,7 @@ def create_support_agent():
 
     builder.add_edge("tools", "support_agent")
     # builder.add_edge("support_agent", END)
-    memory = MemorySaver()
-    return builder.compile(checkpointer=memory)
+    return builder.compile(checkpointer=checkpointer if checkpointer is not None else memory)
 
 
 
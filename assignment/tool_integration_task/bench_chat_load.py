@@ -0,0 +1,106 @@
+# bench_chat_load.py
+#
+# Load test for /api/chat against a local fake LLM (fake_llm.py) that adds a
+# fixed latency to every completion. With a non-blocking chat path, throughput
+# should grow with concurrency; with a blocking one it stays flat at ~1/latency.
+# While the chat load runs, /api/sessions is polled to show the event loop is
+# still responsive.
+#
+# Usage: python bench_chat_load.py [latency_seconds]
+
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+LLM_PORT = 9100
+API_PORT = 8100
+CONCURRENCY = [1, 2, 4, 8, 16, 32]
+REQUESTS_PER_WORKER = 4
+
+
+def start_server(module: str, port: int, env: dict) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"{module}:app",
+         "--port", str(port), "--log-level", "warning"],
+        env=env,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/docs", timeout=1)
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"{module} did not start on port {port}")
+
+
+async def chat_worker(client: httpx.AsyncClient, latencies: list):
+    session = (await client.post("/api/sessions/create", json={})).json()
+    for i in range(REQUESTS_PER_WORKER):
+        start = time.perf_counter()
+        response = await client.post("/api/chat", json={
+            "message": f"My laptop won't turn on ({i})",
+            "session_id": session["session_id"],
+        })
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+
+
+async def poll_sessions(client: httpx.AsyncClient, stop: asyncio.Event, latencies: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/api/sessions")
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.05)
+
+
+async def run_level(concurrency: int):
+    limits = httpx.Limits(max_connections=concurrency + 1)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{API_PORT}",
+                                 limits=limits, timeout=120) as client:
+        chat_latencies, poll_latencies = [], []
+        stop = asyncio.Event()
+        poller = asyncio.create_task(poll_sessions(client, stop, poll_latencies))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(chat_worker(client, chat_latencies) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+        stop.set()
+        await poller
+
+    total = concurrency * REQUESTS_PER_WORKER
+    print(f"{concurrency:>11} {total / elapsed:>10.2f} "
+          f"{statistics.median(chat_latencies) * 1000:>14.0f} "
+          f"{max(poll_latencies) * 1000:>19.0f}")
+
+
+def main():
+    latency = sys.argv[1] if len(sys.argv) > 1 else "0.5"
+
+    env = dict(os.environ)
+    env["FAKE_LLM_LATENCY"] = latency
+    env["OPENAI_API_KEY"] = "sk-fake"
+    env["OPENAI_BASE_URL"] = f"http://127.0.0.1:{LLM_PORT}/v1"
+
+    llm = start_server("fake_llm", LLM_PORT, env)
+    api = start_server("customer_support", API_PORT, env)
+    try:
+        print(f"Fake LLM latency: {latency}s, {REQUESTS_PER_WORKER} chats per worker\n")
+        print("concurrency   chats/s  p50 chat (ms)  max /sessions (ms)")
+        for concurrency in CONCURRENCY:
+            asyncio.run(run_level(concurrency))
+    finally:
+        api.terminate()
+        llm.terminate()
+
+
+if __name__ == "__main__":
+    main()
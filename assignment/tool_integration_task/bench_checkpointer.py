@@ -0,0 +1,119 @@
+# bench_checkpointer.py
+#
+# Checkpoint write latency per turn and resume time on long threads for
+# MemorySaver versus the WAL SQLite saver (checkpointer.py).
+#
+# The graph is a single echo node, so the numbers measure the checkpointer
+# rather than the LLM. "Resume" opens a fresh SQLite connection, as a
+# restarted or different worker would, and loads the thread's latest state.
+# "Commits" counts the transactions a turn makes (each put and put_writes
+# commits on its own) and times one small commit with synchronous=FULL and
+# NORMAL, which is what WALSqliteSaver relies on instead of batching them.
+#
+# Usage: python bench_checkpointer.py [max_turns]
+
+import asyncio
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import START, END, StateGraph, MessagesState
+
+from checkpointer import WALSqliteSaver
+
+
+async def echo(state: MessagesState) -> dict:
+    return {"messages": [AIMessage(content="Echo: " + state["messages"][-1].content)]}
+
+
+def build_graph(checkpointer):
+    builder = StateGraph(MessagesState)
+    builder.add_node("support_agent", echo)
+    builder.add_edge(START, "support_agent")
+    builder.add_edge("support_agent", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+async def write_turns(graph, thread_id: str, turns: int) -> list:
+    config = {"configurable": {"thread_id": thread_id}}
+    latencies = []
+    for i in range(turns):
+        start = time.perf_counter()
+        await graph.ainvoke({"messages": [HumanMessage(content=f"Customer message number {i} " * 8)]}, config)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+class CountingSaver(WALSqliteSaver):
+    commits = 0
+
+    def put(self, *args, **kwargs):
+        self.commits += 1
+        return super().put(*args, **kwargs)
+
+    def put_writes(self, *args, **kwargs):
+        self.commits += 1
+        return super().put_writes(*args, **kwargs)
+
+
+def commit_ms(path: str, synchronous: str, n: int = 500) -> float:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={synchronous}")
+    conn.execute("CREATE TABLE rows (blob BLOB)")
+    start = time.perf_counter()
+    for _ in range(n):
+        conn.execute("INSERT INTO rows VALUES (?)", (b"x" * 2000,))
+        conn.commit()
+    conn.close()
+    return (time.perf_counter() - start) / n * 1000
+
+
+async def main():
+    max_turns = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    lengths = [n for n in (10, 50, 200, 500, 1000) if n <= max_turns]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "checkpoints.sqlite")
+        savers = {"MemorySaver": MemorySaver(), "WAL SQLite": WALSqliteSaver(db_path)}
+
+        print("Write latency per turn (ms)")
+        print(f"{'saver':<14} {'p50':>8} {'p95':>8}")
+        for name, saver in savers.items():
+            latencies = await write_turns(build_graph(saver), "write-bench", 100)
+            latencies.sort()
+            print(f"{name:<14} {statistics.median(latencies) * 1000:>8.2f} "
+                  f"{latencies[int(len(latencies) * 0.95)] * 1000:>8.2f}")
+
+        print("\nResume time for a thread of N turns (ms)")
+        print(f"{'turns':>6} {'MemorySaver':>12} {'WAL SQLite':>12}")
+        for turns in lengths:
+            thread_id = f"resume-{turns}"
+            row = []
+            for name, saver in savers.items():
+                await write_turns(build_graph(saver), thread_id, turns)
+                if name == "WAL SQLite":
+                    # A new connection, like a restarted or different worker
+                    saver = WALSqliteSaver(db_path)
+                graph = build_graph(saver)
+                start = time.perf_counter()
+                state = await graph.aget_state({"configurable": {"thread_id": thread_id}})
+                row.append((time.perf_counter() - start) * 1000)
+                assert len(state.values["messages"]) == turns * 2
+            print(f"{turns:>6} {row[0]:>12.2f} {row[1]:>12.2f}")
+
+        counting = CountingSaver(os.path.join(tmp, "commits.sqlite"))
+        await write_turns(build_graph(counting), "commit-bench", 10)
+        print(f"\nCommits per turn: {counting.commits / 10:.1f}")
+        for synchronous in ("FULL", "NORMAL"):
+            ms = commit_ms(os.path.join(tmp, f"commit-{synchronous}.sqlite"), synchronous)
+            print(f"synchronous={synchronous:<7} {ms:>6.3f} ms per commit")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,78 @@
+# bench_history.py
+#
+# Prompt tokens per turn on a scripted 50-turn conversation for each history
+# policy in context_window.py. The agent runs in-process against fake_llm.py,
+# which reports usage with the same ~4 chars/token estimate; summary calls are
+# counted too.
+#
+# Usage: python bench_history.py
+
+import asyncio
+import os
+
+from bench_chat_load import LLM_PORT, start_server
+
+os.environ["OPENAI_API_KEY"] = "sk-fake"
+os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{LLM_PORT}/v1"
+
+from langchain_core.callbacks import UsageMetadataCallbackHandler
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+import agent
+from context_window import HistoryPolicy
+
+TURNS = 50
+REPORT_AT = [1, 10, 20, 30, 40, 50]
+
+POLICIES = {
+    "full": HistoryPolicy("full"),
+    "window (10)": HistoryPolicy("window", max_turns=10),
+    "tokens (1500)": HistoryPolicy("tokens", token_budget=1500),
+    "summary (10+4)": HistoryPolicy("summary", max_turns=10, summary_every=4),
+}
+
+SCRIPT = [
+    "I bought a TechGadgets laptop last week, order number TG-{n}",
+    "It won't turn on after I charged it overnight and I need it for work",
+    "Yes, I already tried holding the power button for thirty seconds",
+    "The charging light blinks orange three times and then goes dark",
+    "Can I get a replacement or do I have to send it in for repair?",
+]
+
+
+async def run_policy(policy: HistoryPolicy) -> list:
+    agent.history_policy = policy
+    graph = agent.create_support_agent(checkpointer=MemorySaver())
+    config = {"configurable": {"thread_id": "bench"}}
+
+    per_turn = []
+    for turn in range(TURNS):
+        usage = UsageMetadataCallbackHandler()
+        message = SCRIPT[turn % len(SCRIPT)].format(n=1000 + turn)
+        await graph.ainvoke({"messages": [HumanMessage(content=message)]},
+                            {**config, "callbacks": [usage]})
+        per_turn.append(sum(u["input_tokens"] for u in usage.usage_metadata.values()))
+    return per_turn
+
+
+async def run_all():
+    print("Prompt tokens per turn (including summary calls)\n")
+    print(f"{'policy':<16}" + "".join(f"{'t' + str(t):>8}" for t in REPORT_AT) + f"{'total':>10}")
+    for name, policy in POLICIES.items():
+        per_turn = await run_policy(policy)
+        print(f"{name:<16}" + "".join(f"{per_turn[t - 1]:>8}" for t in REPORT_AT)
+              + f"{sum(per_turn):>10}")
+
+
+def main():
+    env = dict(os.environ, FAKE_LLM_LATENCY="0", FAKE_LLM_TOKEN_DELAY="0")
+    llm = start_server("fake_llm", LLM_PORT, env)
+    try:
+        asyncio.run(run_all())
+    finally:
+        llm.terminate()
+
+
+if __name__ == "__main__":
+    main()
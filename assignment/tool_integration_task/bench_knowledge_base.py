@@ -0,0 +1,97 @@
+# bench_knowledge_base.py
+#
+# Lookup time versus knowledge-base size: the old linear `key in query.lower()`
+# scan over a dict against KnowledgeBase (Aho-Corasick), on synthetic policy
+# entries of up to 50k keys. Also times the compile step and checks that an
+# edited file is picked up without a restart.
+#
+# Usage: python bench_knowledge_base.py
+
+import json
+import os
+import random
+import tempfile
+import time
+
+from knowledge_base import KnowledgeBase
+
+SIZES = [100, 1_000, 10_000, 50_000]
+QUERIES = 2_000
+
+WORDS = ["laptop", "battery", "screen", "charger", "warranty", "return", "shipping",
+         "tablet", "phone", "case", "keyboard", "mouse", "refund", "repair", "order"]
+
+
+def make_entries(n: int) -> list:
+    rng = random.Random(n)
+    entries = [{"keys": ["warranty"], "text": "All products have 1-year warranty."},
+               {"keys": ["return"], "text": "30-day money-back guarantee on all products."},
+               {"keys": ["shipping"], "text": "Free shipping on orders over $99."}]
+    for i in range(n - len(entries)):
+        key = f"{rng.choice(WORDS)} policy {i}"
+        entries.append({"keys": [key], "text": f"Policy text for {key}."})
+    return entries
+
+
+def make_queries(entries: list) -> list:
+    rng = random.Random(1)
+    queries = []
+    for _ in range(QUERIES):
+        key = rng.choice(entries)["keys"][0]
+        queries.append(f"Hi, I have a question about my {key}, can you help?")
+    return queries
+
+
+def linear_first(dictionary: dict, query: str) -> str:
+    # The old tools: first match only
+    for key, value in dictionary.items():
+        if key in query.lower():
+            return value
+    return "No relevant information found."
+
+
+def linear_all(dictionary: dict, query: str) -> list:
+    # Every match, as KnowledgeBase returns, by scanning
+    query = query.lower()
+    return [value for key, value in dictionary.items() if key in query]
+
+
+def per_query_us(fn, queries) -> float:
+    start = time.perf_counter()
+    for query in queries:
+        fn(query)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+
+def main():
+    print("Per-lookup time (us)\n")
+    print(f"{'entries':>8} {'compile (ms)':>13} {'linear first':>13} {'linear all':>11} {'automaton':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "kb.json")
+        for n in SIZES:
+            entries = make_entries(n)
+            with open(path, "w") as f:
+                json.dump(entries, f)
+            queries = make_queries(entries)
+
+            start = time.perf_counter()
+            kb = KnowledgeBase(path, reload_interval=3600)
+            compile_ms = (time.perf_counter() - start) * 1000
+
+            dictionary = {e["keys"][0]: e["text"] for e in entries}
+            first = per_query_us(lambda q: linear_first(dictionary, q), queries)
+            every = per_query_us(lambda q: linear_all(dictionary, q), queries)
+            automaton = per_query_us(kb.answer, queries)
+            print(f"{n:>8} {compile_ms:>13.1f} {first:>13.1f} {every:>11.1f} {automaton:>10.1f}")
+
+        # Hot reload: edit the file and the next lookup after reload_interval sees it
+        kb = KnowledgeBase(path, reload_interval=0)
+        before = kb.answer("do you offer gift wrapping?")
+        with open(path, "w") as f:
+            json.dump([{"keys": ["gift wrap"], "text": "Gift wrapping is $5 per item."}], f)
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+        print(f"\nhot reload: {before!r} -> {kb.answer('do you offer gift wrapping?')!r}")
+
+
+if __name__ == "__main__":
+    main()
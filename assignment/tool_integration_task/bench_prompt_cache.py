@@ -0,0 +1,70 @@
+# bench_prompt_cache.py
+#
+# Prompt tokens and cached prompt tokens per turn, as reported in the
+# provider's usage metadata, for a scripted conversation against fake_llm.py
+# (which simulates a prefix prompt cache). Shows how much of each prompt the
+# stable prefix (tool schemas + system prompt + unchanged history) saves,
+# and how a sliding window reduces reuse to the fixed prefix.
+#
+# Usage: python bench_prompt_cache.py
+
+import asyncio
+import os
+
+from bench_chat_load import LLM_PORT, start_server
+
+os.environ["OPENAI_API_KEY"] = "sk-fake"
+os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{LLM_PORT}/v1"
+
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+import agent
+from bench_history import SCRIPT
+from context_window import HistoryPolicy, PromptCacheStats
+
+TURNS = 12
+
+POLICIES = {
+    "full": HistoryPolicy("full"),
+    "window (4)": HistoryPolicy("window", max_turns=4),
+}
+
+
+async def run_policy(name: str, policy: HistoryPolicy, offset: int):
+    agent.history_policy = policy
+    agent.prompt_cache = PromptCacheStats()
+    graph = agent.create_support_agent(checkpointer=MemorySaver())
+    config = {"configurable": {"thread_id": f"bench-{name}"}}
+
+    print(f"\n{name}")
+    print(f"{'turn':>6} {'prompt':>8} {'cached':>8}")
+    for turn in range(TURNS):
+        before = (agent.prompt_cache.prompt_tokens, agent.prompt_cache.cached_tokens)
+        message = SCRIPT[turn % len(SCRIPT)].format(n=offset + turn)
+        await graph.ainvoke({"messages": [HumanMessage(content=message)]}, config)
+        print(f"{turn + 1:>6} {agent.prompt_cache.prompt_tokens - before[0]:>8} "
+              f"{agent.prompt_cache.cached_tokens - before[1]:>8}")
+
+    stats = agent.prompt_cache.stats()
+    print(f"total  {stats['prompt_tokens']:>8} {stats['cached_tokens']:>8}  "
+          f"({stats['cache_hit_ratio']:.0%} from cache)")
+
+
+async def run_all():
+    # Distinct order numbers per policy, so one run cannot warm the other's cache
+    for i, (name, policy) in enumerate(POLICIES.items()):
+        await run_policy(name, policy, offset=2000 + 100 * i)
+
+
+def main():
+    env = dict(os.environ, FAKE_LLM_LATENCY="0", FAKE_LLM_TOKEN_DELAY="0")
+    llm = start_server("fake_llm", LLM_PORT, env)
+    try:
+        asyncio.run(run_all())
+    finally:
+        llm.terminate()
+
+
+if __name__ == "__main__":
+    main()
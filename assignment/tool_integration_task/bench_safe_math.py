@@ -0,0 +1,88 @@
+# bench_safe_math.py
+#
+# Per-expression cost of the old eval() calculator path against safe_math
+# (first call parses and validates, repeats hit the LRU cache), and what each
+# does with an oversized power. Checks that built-in calls that would run
+# away (round to -10**8 digits, huge factorials) are rejected, and that
+# deeply nested input is a MathError, not a RecursionError, even when the
+# caller's stack is already deep (as it is under FastAPI and LangGraph).
+#
+# Usage: python bench_safe_math.py
+
+import time
+
+import safe_math
+
+EXPRESSIONS = [
+    "2 + 3 * 4",
+    "19.99 * 3 - 5",
+    "(1200 - 1200 * 0.15) / 12",
+    "sqrt(16) + 2 ** 10",
+    "round(99.5 * 1.0825, 2)",
+    "max(3, 7, 2) * min(4, 9)",
+]
+REPEATS = 20_000
+NESTED = ["-" * 900 + "1", "(" * 150 + "1" + ")" * 150, "abs(" * 150 + "1" + ")" * 150]
+CALLER_FRAMES = 120
+ADVERSARIAL_CALLS = ["round(1, -100000000)", "round(2.5, 10**9)", "round(1, 0.5)", "factorial(10**6)"]
+
+
+def per_call_us(fn, expressions) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEATS // len(expressions)):
+        for expression in expressions:
+            fn(expression)
+    return (time.perf_counter() - start) / REPEATS * 1e6
+
+
+def uncached(expression):
+    safe_math.compile_expression.cache_clear()
+    return safe_math.evaluate(expression)
+
+
+def nested_call(frames: int, expression: str):
+    if frames:
+        return nested_call(frames - 1, expression)
+    return safe_math.evaluate(expression)
+
+
+def main():
+    namespace = {"sqrt": safe_math.math.sqrt, "round": round, "max": max, "min": min}
+
+    print("Typical calculator expressions (us per call)\n")
+    print(f"{'eval()':<28} {per_call_us(lambda e: eval(e, namespace), EXPRESSIONS):>8.2f}")
+    print(f"{'safe_math, parse every call':<28} {per_call_us(uncached, EXPRESSIONS):>8.2f}")
+    print(f"{'safe_math, cached AST':<28} {per_call_us(safe_math.evaluate, EXPRESSIONS):>8.2f}")
+
+    print("\nOversized power")
+    start = time.perf_counter()
+    bits = eval("9**9**7").bit_length()
+    print(f"eval('9**9**7'):      {time.perf_counter() - start:>8.3f}s  ({bits} bit result; 9**9**9 is far larger)")
+    start = time.perf_counter()
+    try:
+        safe_math.evaluate("9**9**9")
+    except safe_math.MathError as e:
+        print(f"evaluate('9**9**9'):  {time.perf_counter() - start:>8.6f}s  rejected: {e}")
+
+    print("\nWork hidden inside a built-in (the time budget is only checked between nodes)")
+    for expression in ADVERSARIAL_CALLS:
+        start = time.perf_counter()
+        try:
+            safe_math.evaluate(expression)
+        except safe_math.MathError as e:
+            print(f"{expression:<24} {time.perf_counter() - start:>8.6f}s  rejected: {e}")
+        else:
+            raise AssertionError(f"{expression} was evaluated")
+
+    print(f"\nDeeply nested input, {CALLER_FRAMES} frames below")
+    for expression in NESTED:
+        try:
+            nested_call(CALLER_FRAMES, expression)
+        except safe_math.MathError as e:
+            print(f"{expression[:12] + '...':<16} rejected: {e}")
+        else:
+            print(f"{expression[:12] + '...':<16} evaluated")
+
+
+if __name__ == "__main__":
+    main()
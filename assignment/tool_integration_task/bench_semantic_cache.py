@@ -0,0 +1,154 @@
+# bench_semantic_cache.py
+#
+# LLM calls, hit rate and latency per turn with and without the semantic
+# response cache (response_cache.py). 40 sessions each open with one of 6
+# FAQ questions, phrased 4 different ways, then send a follow-up ("yes,
+# please") that depends on the thread's history. The agent runs in-process
+# against fake_llm.py (0.5 s per completion). Checks that:
+#
+# - first turns are answered from the cache across sessions, and only with a
+#   reply to the same FAQ (fake_llm echoes the question it answered)
+# - follow-ups are never answered with another session's reply
+# - first turns that identify the customer (name, order number) are never
+#   shared, even at a similarity threshold of 0
+# - changing support_prompt invalidates the cache
+#
+# The embedding model is a bag-of-words stand-in, so the threshold here (0.8)
+# is not the text-embedding-3-small default.
+#
+# Usage: python bench_semantic_cache.py
+
+import asyncio
+import hashlib
+import os
+import re
+import time
+
+from bench_chat_load import LLM_PORT, start_server
+
+os.environ["OPENAI_API_KEY"] = "sk-fake"
+os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{LLM_PORT}/v1"
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+import agent
+from context_window import PromptCacheStats, stable_prompt
+from response_cache import SemanticResponseCache
+
+SESSIONS = 40
+THRESHOLD = 0.8
+
+FAQS = [
+    ["What's your return policy?", "what is the return policy", "Return policy?",
+     "Could you tell me your return policy please"],
+    ["Is shipping free?", "is shipping free", "Do you offer free shipping?", "Free shipping?"],
+    ["How long is the warranty?", "how long is the warranty on laptops",
+     "What is the warranty?", "Warranty length?"],
+    ["Can I extend my warranty?", "can I extend the warranty", "Is an extended warranty available?",
+     "Extend warranty?"],
+    ["Do you sell tablets?", "do you sell tablets", "Are tablets sold here?", "Tablets available?"],
+    ["How do I reset my smartphone?", "how can I reset my smartphone", "Smartphone reset steps?",
+     "Reset a smartphone?"],
+]
+FOLLOW_UP = "Yes, please"
+IDENTIFYING = ["Hi, I'm Ana, order 4411 hasn't arrived", "Hi, I'm Bo, order 5123 hasn't arrived"]
+
+STOPWORDS = set("""a an and are be can could do does for here how i is it me my of on please
+    s tell the to what whats you your""".split())
+
+
+class WordEmbeddings(Embeddings):
+    """Bag of content words with fixed random word vectors"""
+
+    def _vector(self, text):
+        v = np.zeros(256)
+        for token in re.findall(r"\w+", text.casefold()):
+            if token in STOPWORDS:
+                continue
+            token = token.rstrip("s") if len(token) > 4 else token  # crude plural folding
+            seed = int.from_bytes(hashlib.sha1(token.encode()).digest()[:4], "little")
+            v += np.random.default_rng(seed).standard_normal(256)
+        return (v / (np.linalg.norm(v) or 1)).tolist()
+
+    def embed_documents(self, texts):
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+async def run(label: str, cache):
+    agent.response_cache = cache
+    agent.prompt_cache = PromptCacheStats()
+    graph = agent.create_support_agent(checkpointer=MemorySaver())
+
+    latencies, leaks, wrong = {"first": [], "follow-up": []}, 0, 0
+    for session in range(SESSIONS):
+        faq = session % len(FAQS)
+        config = {"configurable": {"thread_id": f"{label}-{session}"}}
+        question = FAQS[faq][(session // len(FAQS)) % len(FAQS[faq])]
+        for kind, message in [("first", question), ("follow-up", FOLLOW_UP)]:
+            start = time.perf_counter()
+            result = await graph.ainvoke({"messages": [HumanMessage(content=message)]}, config)
+            latencies[kind].append(time.perf_counter() - start)
+            reply = result["messages"][-1]
+            if kind == "first":
+                wrong += not any(reply.content.endswith(q) for q in FAQS[faq])
+            else:
+                # fake_llm's follow-up replies all read the same, so check where it came from
+                leaks += "response_cache" in reply.response_metadata
+
+    calls = agent.prompt_cache.calls
+    turns = 2 * SESSIONS
+    print(f"\n{label}")
+    print(f"  LLM calls        {calls:>6} for {turns} turns")
+    for kind, values in latencies.items():
+        print(f"  {kind:<16} {1000 * sum(values) / len(values):>6.0f} ms mean latency")
+    print(f"  first turns answered for another FAQ: {wrong}")
+    print(f"  follow-ups answered from the cache: {leaks}")
+    if cache is not None:
+        print(f"  cache            {cache.stats()}")
+    return graph
+
+
+async def run_all():
+    await run("no cache", None)
+    cache = SemanticResponseCache(WordEmbeddings(), threshold=THRESHOLD)
+    graph = await run("semantic cache", cache)
+
+    # With threshold 0 every lookup in scope hits, so only scoping keeps these apart
+    private = SemanticResponseCache(WordEmbeddings(), threshold=0.0)
+    agent.response_cache = private
+    graph = agent.create_support_agent(checkpointer=MemorySaver())
+    replies = []
+    for i, message in enumerate(IDENTIFYING + [FAQS[1][0], FAQS[1][1]]):
+        result = await graph.ainvoke({"messages": [HumanMessage(content=message)]},
+                                     {"configurable": {"thread_id": f"identifying-{i}"}})
+        replies.append(result["messages"][-1])
+    assert "response_cache" not in replies[1].response_metadata and replies[1].content.endswith(IDENTIFYING[1]), \
+        "a customer was served another customer's answer"
+    assert "response_cache" in replies[3].response_metadata, "generic first turns should still be shared"
+    print(f"\nidentifying first turns (threshold 0): not shared; generic ones shared  {private.stats()}")
+    agent.response_cache = cache
+
+    # Changing the system prompt drops every cached answer
+    agent.support_prompt = stable_prompt(agent.support_prompt.content + "\n- Mention the holiday sale")
+    await graph.ainvoke({"messages": [HumanMessage(content=FAQS[0][0])]},
+                        {"configurable": {"thread_id": "after-prompt-change"}})
+    print(f"\nafter a support_prompt change: {cache.stats()}")
+
+
+def main():
+    env = dict(os.environ, FAKE_LLM_LATENCY="0.5", FAKE_LLM_TOKEN_DELAY="0")
+    llm = start_server("fake_llm", LLM_PORT, env)
+    try:
+        asyncio.run(run_all())
+    finally:
+        llm.terminate()
+
+
+if __name__ == "__main__":
+    main()
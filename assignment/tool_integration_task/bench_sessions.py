@@ -0,0 +1,75 @@
+# bench_sessions.py
+#
+# Session-creation latency and memory per session:
+#   before -> every session compiles its own graph + MemorySaver
+#   after  -> one compiled graph shared by all sessions (thread_id per session)
+#
+# Usage: python bench_sessions.py [num_sessions]
+
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+
+# The LLM client is only constructed here, never called
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+from langgraph.checkpoint.memory import MemorySaver
+
+from agent import create_support_agent
+
+
+def new_session(agent=None):
+    now = datetime.now().isoformat()
+    session = {
+        "session_id": str(uuid.uuid4()),
+        "customer_name": "Guest",
+        "created_at": now,
+        "last_activity": now,
+        "message_count": 0,
+    }
+    if agent is not None:
+        session["agent"] = agent
+    return session
+
+
+def per_session_graph():
+    return new_session(create_support_agent(checkpointer=MemorySaver()))
+
+
+def shared_graph():
+    return new_session()
+
+
+def run(label, factory, n):
+    sessions = {}
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    for _ in range(n):
+        session = factory()
+        sessions[session["session_id"]] = session
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{label:<20} {elapsed / n * 1e6:>12.1f} us/session "
+          f"{(current - base) / n / 1024:>12.1f} KiB/session")
+    return sessions
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    # Compile the shared graph up front, as the service does at import time
+    create_support_agent()
+
+    print(f"Creating {n} sessions\n")
+    run("before (per-session)", per_session_graph, n)
+    run("after (shared)", shared_graph, n)
+
+
+if __name__ == "__main__":
+    main()
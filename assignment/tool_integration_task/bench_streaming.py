@@ -0,0 +1,93 @@
+# bench_streaming.py
+#
+# Time-to-first-token (TTFT) and total time for /api/chat (waits for the whole
+# reply) versus /api/chat/stream (server-sent events), against fake_llm.py.
+# Streamed turns that end without a token event (a tool-only turn) are left
+# out of the TTFT median and counted under "no token"; turns that end with an
+# error event are left out of both medians and counted under "errors".
+#
+# Usage: python bench_streaming.py [latency_seconds] [token_delay_seconds]
+
+import json
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+from bench_chat_load import API_PORT, LLM_PORT, start_server
+
+TURNS = 10
+
+
+def blocking_turn(client: httpx.Client, session_id: str, message: str):
+    start = time.perf_counter()
+    response = client.post("/api/chat", json={"message": message, "session_id": session_id})
+    response.raise_for_status()
+    elapsed = time.perf_counter() - start
+    # Nothing reaches the user until the full reply arrives
+    return elapsed, elapsed
+
+
+def streaming_turn(client: httpx.Client, session_id: str, message: str):
+    """(seconds to the first token or None if none came, total seconds); RuntimeError on an error event"""
+    start = time.perf_counter()
+    first_token = None
+    event = None
+    with client.stream("POST", "/api/chat/stream",
+                       json={"message": message, "session_id": session_id}) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: ") and event == "token" and first_token is None:
+                first_token = time.perf_counter() - start
+            elif line.startswith("data: ") and event == "error":
+                raise RuntimeError(json.loads(line[len("data: "):])["detail"])
+    return first_token, time.perf_counter() - start
+
+
+def median_ms(values: list) -> str:
+    return f"{statistics.median(values) * 1000:.0f}" if values else "-"
+
+
+def run(label: str, turn, client: httpx.Client):
+    session = client.post("/api/sessions/create", json={}).json()
+    ttfts, totals, no_token, errors = [], [], 0, 0
+    for i in range(TURNS):
+        try:
+            ttft, total = turn(client, session["session_id"], f"My order #{i} has not arrived yet")
+        except RuntimeError:
+            errors += 1
+            continue
+        totals.append(total)
+        if ttft is None:
+            no_token += 1
+        else:
+            ttfts.append(ttft)
+    print(f"{label:<18} {median_ms(ttfts):>14} {median_ms(totals):>15} {no_token:>9} {errors:>7}")
+
+
+def main():
+    env = dict(os.environ)
+    env["FAKE_LLM_LATENCY"] = sys.argv[1] if len(sys.argv) > 1 else "0.3"
+    env["FAKE_LLM_TOKEN_DELAY"] = sys.argv[2] if len(sys.argv) > 2 else "0.05"
+    env["OPENAI_API_KEY"] = "sk-fake"
+    env["OPENAI_BASE_URL"] = f"http://127.0.0.1:{LLM_PORT}/v1"
+
+    llm = start_server("fake_llm", LLM_PORT, env)
+    api = start_server("customer_support", API_PORT, env)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{API_PORT}", timeout=120) as client:
+            print(f"{TURNS} turns per endpoint, medians\n")
+            print(f"{'endpoint':<18} {'TTFT (ms)':>14} {'total (ms)':>15} {'no token':>9} {'errors':>7}")
+            run("/api/chat", blocking_turn, client)
+            run("/api/chat/stream", streaming_turn, client)
+    finally:
+        api.terminate()
+        llm.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Checkpointer selection for the support agents.
+
+By default conversations live in an in-process MemorySaver: fast, but lost on
+restart and private to one worker. Setting CHECKPOINT_DB to a file path
+switches to a SQLite saver in WAL mode, which survives restarts and can be
+shared by several worker processes serving the same thread_id.
+"""
+
+import asyncio
+import os
+import sqlite3
+
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+
+class WALSqliteSaver(SqliteSaver):
+    """
+    SqliteSaver on a WAL-mode connection, usable from both invoke and ainvoke.
+
+    - WAL lets readers in other processes run while one process writes
+    - synchronous=NORMAL makes each commit a WAL append; fsyncs are batched
+      at WAL checkpoints instead of being paid on every write
+    - put and put_writes still commit one transaction each (about five per
+      turn). Grouping a step's writes with its checkpoint was deliberately
+      left out: writes that no checkpoint follows (a failed node, an
+      interrupt) would have to be flushed separately, and other workers must
+      see them at once. With synchronous=NORMAL, a commit costs tens of
+      microseconds, so the fsync batching above is what batching would buy
+    - a busy timeout makes writers from other workers wait instead of failing
+    - async methods run the sync ones in a worker thread, so the event loop
+      never blocks on disk
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 5.0):
+        conn = sqlite3.connect(path, check_same_thread=False, timeout=busy_timeout)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        super().__init__(conn)
+
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id):
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def make_checkpointer(path: str = None):
+    """WAL SQLite saver when a path (or CHECKPOINT_DB) is given, else MemorySaver"""
+    path = path or os.getenv("CHECKPOINT_DB")
+    if not path:
+        return MemorySaver()
+    return WALSqliteSaver(path)
@@ -1,15 +1,20 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict, Optional
+import json
 import uuid
 from datetime import datetime
 import uvicorn
 
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import HumanMessage, AIMessage
+from langgraph.checkpoint.memory import MemorySaver
 import os
 
-from agent import create_support_agent, ChatInput, ChatResponse
+from agent import create_support_agent, prompt_cache, response_cache, ChatInput, ChatResponse
+from context_window import PromptCacheStats
+from session_store import SessionStore, approx_size
 
 app = FastAPI(
     title="TechGadgets Customer Support API",
@@ -26,8 +31,45 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory session storage
-sessions = {}
+# Compiled once at startup and shared by every session; the graph's checkpointer
+# keeps conversations apart by thread_id (= session_id)
+agent = create_support_agent()
+
+def purge_checkpoints(session_id: str):
+    """Drop an evicted session's thread from the in-process checkpointer,
+    together with the thread's private cached answers.
+
+    A disk-backed checkpointer is shared with other workers, which may still be
+    serving the thread, so eviction there only forgets the local metadata.
+    """
+    if isinstance(agent.checkpointer, MemorySaver):
+        agent.checkpointer.delete_thread(session_id)
+    if response_cache is not None:
+        response_cache.forget(session_id)
+
+def checkpoint_size(session_id: str) -> int:
+    """Approximate bytes the checkpointer holds for a thread (in-memory saver only)
+
+    MemorySaver keeps checkpoint metadata in `storage[thread_id]`, but the
+    channel values (the messages) in `blobs` and pending writes in `writes`,
+    both keyed by tuples that start with the thread_id.
+    """
+    saver = agent.checkpointer
+    if not isinstance(saver, MemorySaver):
+        return 0
+    size = approx_size(saver.storage.get(session_id))
+    for table in (saver.blobs, saver.writes):
+        size += sum(approx_size(value) for key, value in list(table.items()) if key[0] == session_id)
+    return size
+
+# Bounded in-memory session storage: idle sessions expire and the least
+# recently used one is evicted when full, together with its checkpoints
+sessions = SessionStore(
+    max_sessions=int(os.getenv("SESSION_MAX_SESSIONS", "1000")),
+    idle_ttl=int(os.getenv("SESSION_IDLE_TTL", "1800")),
+    on_evict=purge_checkpoints,
+    extra_size=checkpoint_size
+)
 
 class SessionCreate(BaseModel):
     customer_name: Optional[str] = "Guest"
@@ -53,7 +95,9 @@ class ChatRequest(BaseModel):
 class ChatResponse(BaseModel):
     response: str
     session_id: str
-    messages: List[Message]
+    messages: List[Message]  # only the messages added by this turn
+    cursor: int  # pass as `since` to fetch anything newer
+    usage: Dict[str, int] = {}  # prompt / cached prompt tokens for this turn
 
 @app.get("/")
 async def root():
@@ -64,7 +108,11 @@ async def root():
             "create_session": "/api/sessions/create",
             "get_session": "/api/sessions/{session_id}",
             "chat": "/api/chat",
-            "list_sessions": "/api/sessions"
+            "chat_stream": "/api/chat/stream",
+            "list_sessions": "/api/sessions",
+            "session_stats": "/api/sessions/stats",
+            "prompt_cache_stats": "/api/stats/prompt-cache",
+            "response_cache_stats": "/api/stats/response-cache"
         }
     }
 
@@ -81,8 +129,7 @@ async def create_session(session_data: SessionCreate):
         "issue_type": session_data.issue_type,
         "created_at": now,
         "last_activity": now,
-        "messages": [],
-        "agent": create_support_agent()  
+        "message_count": 0
     }
     
     return SessionInfo(
@@ -102,33 +149,113 @@ async def list_sessions():
             session_id=session_id,
             customer_name=session_data["customer_name"],
             created_at=session_data["created_at"],
-            message_count=len(session_data["messages"]),
+            message_count=session_data["message_count"],
             last_activity=session_data["last_activity"]
         ))
     return session_list
 
+@app.get("/api/sessions/stats", response_model=Dict)
+async def session_stats():
+    """Live sessions, eviction counters and approximate memory held"""
+    return sessions.stats()
+
+@app.get("/api/stats/prompt-cache", response_model=Dict)
+async def prompt_cache_stats():
+    """Prompt tokens served from the provider's prompt cache since startup"""
+    return prompt_cache.stats()
+
+@app.get("/api/stats/response-cache", response_model=Dict)
+async def response_cache_stats():
+    """Semantic response cache hit rate and size (RESPONSE_CACHE=1)"""
+    if response_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **response_cache.stats()}
+
 @app.get("/api/sessions/{session_id}", response_model=Dict)
-async def get_session(session_id: str):
-    """Get session details and conversation history"""
-    if session_id not in sessions:
+async def get_session(
+    session_id: str,
+    since: int = Query(0, ge=0, description="Cursor returned by a previous call"),
+    limit: int = Query(50, ge=1, le=500, description="Maximum messages to return")
+):
+    """Get session details and one page of conversation history after `since`"""
+    session = await find_session(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    session = sessions[session_id]
+    history = await load_history(session_id)
+    page = history[since:since + limit]
+    cursor = since + len(page)
     return {
         "session_info": SessionInfo(
             session_id=session_id,
             customer_name=session["customer_name"],
             created_at=session["created_at"],
-            message_count=len(session["messages"]),
+            message_count=len(history),
             last_activity=session["last_activity"]
         ),
-        "messages": session["messages"]
+        "messages": page,
+        "cursor": cursor,
+        "has_more": cursor < len(history)
     }
 
-@app.post("/api/chat", response_model=ChatResponse)
-async def chat(chat_request: ChatRequest):
-    """Send a message to the customer support agent"""
-    
+def project_messages(messages) -> List[dict]:
+    """REST view of the checkpointed conversation: user turns and assistant replies.
+
+    Tool calls and tool results stay in graph state but are not part of the
+    transcript. Timestamps live in each message's response_metadata.
+    """
+    history = []
+    for message in messages:
+        if isinstance(message, HumanMessage):
+            role = "user"
+        elif isinstance(message, AIMessage) and message.content and not message.tool_calls:
+            role = "assistant"
+        else:
+            continue
+        history.append({
+            "role": role,
+            "content": message.content,
+            "timestamp": message.response_metadata.get("timestamp", "")
+        })
+    return history
+
+async def load_history(session_id: str) -> List[dict]:
+    """Conversation history straight from the checkpointer (single source of truth)"""
+    state = await agent.aget_state({"configurable": {"thread_id": session_id}})
+    return project_messages(state.values.get("messages", []))
+
+def turn_start(history: List[dict]) -> int:
+    """Cursor of the latest user message, i.e. where the current turn's delta begins"""
+    for index in range(len(history) - 1, -1, -1):
+        if history[index]["role"] == "user":
+            return index
+    return len(history)
+
+async def find_session(session_id: str):
+    """Session metadata by id.
+
+    With a shared (disk-backed) checkpointer another worker may have started
+    the thread; such sessions are adopted from their checkpointed history.
+    """
+    if session_id in sessions:
+        return sessions[session_id]
+
+    history = await load_history(session_id)
+    if not history:
+        return None
+
+    sessions[session_id] = {
+        "session_id": session_id,
+        "customer_name": "Guest",
+        "created_at": history[0]["timestamp"] or datetime.now().isoformat(),
+        "last_activity": datetime.now().isoformat(),
+        "message_count": len(history)
+    }
+    return sessions[session_id]
+
+async def resolve_chat_session(chat_request: ChatRequest):
+    """Look up the request's session (or start a Guest one)"""
+
     # If no session_id provided, create a new session
     if not chat_request.session_id:
         session_id = str(uuid.uuid4())
@@ -137,59 +264,137 @@ async def chat(chat_request: ChatRequest):
             "customer_name": "Guest",
             "created_at": datetime.now().isoformat(),
             "last_activity": datetime.now().isoformat(),
-            "messages": [],
-            "agent": create_support_agent()
+            "message_count": 0
         }
     else:
         session_id = chat_request.session_id
-        if session_id not in sessions:
+        if await find_session(session_id) is None:
             raise HTTPException(status_code=404, detail="Session not found")
-    
+
+    # A turn in progress is activity: keep the session away from LRU/idle eviction
     session = sessions[session_id]
-    agent = session["agent"]
-    
-    # Add user message to session history
-    user_message = Message(
-        role="user",
+    session["last_activity"] = datetime.now().isoformat()
+    sessions.touch(session_id)
+    return session_id, session
+
+def user_turn(chat_request: ChatRequest) -> dict:
+    """Graph input for one user message"""
+    return {"messages": [HumanMessage(
         content=chat_request.message,
-        timestamp=datetime.now().isoformat()
-    )
-    session["messages"].append(user_message.dict())
+        response_metadata={"timestamp": datetime.now().isoformat()}
+    )]}
+
+def record_turn(session: dict, history: List[dict]):
+    """Update the session's counters and last activity after a completed turn"""
+    session["message_count"] = len(history)
+    session["last_activity"] = datetime.now().isoformat()
+    sessions.touch(session["session_id"])
+
+@app.post("/api/chat", response_model=ChatResponse)
+async def chat(chat_request: ChatRequest):
+    """Send a message to the customer support agent"""
+    session_id, session = await resolve_chat_session(chat_request)
     
     # Get response from LangGraph agent
     try:
-        response = agent.invoke(
-            {"messages": [HumanMessage(content=chat_request.message)]},
+        response = await agent.ainvoke(
+            user_turn(chat_request),
             config={"configurable": {"thread_id": session_id}}
         )
         
         assistant_response = response['messages'][-1].content
-        
-        # Add assistant message to session history
-        assistant_message = Message(
-            role="assistant",
-            content=assistant_response,
-            timestamp=datetime.now().isoformat()
-        )
-        session["messages"].append(assistant_message.dict())
-        
-        # Update last activity
-        session["last_activity"] = datetime.now().isoformat()
+        history = project_messages(response['messages'])
+        record_turn(session, history)
         
         return ChatResponse(
             response=assistant_response,
             session_id=session_id,
-            messages=session["messages"]
+            messages=history[turn_start(history):],
+            cursor=len(history),
+            usage=turn_usage(response['messages'])
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Agent error: {str(e)}")
 
+def turn_usage(messages) -> Dict[str, int]:
+    """Prompt and cached prompt tokens of the LLM calls in the latest turn"""
+    usage = PromptCacheStats()
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            break
+        if isinstance(message, AIMessage):
+            usage.record(message)
+    return {"prompt_tokens": usage.prompt_tokens, "cached_tokens": usage.cached_tokens}
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/api/chat/stream")
+async def chat_stream(chat_request: ChatRequest):
+    """Send a message and stream the reply as server-sent events.
+
+    Events: token (LLM text as it is generated), tool_call / tool_result
+    (tool progress), done (final reply), error.
+    """
+    session_id, session = await resolve_chat_session(chat_request)
+
+    async def event_stream():
+        assistant_response = ""
+        usage = PromptCacheStats()
+        try:
+            async for mode, chunk in agent.astream(
+                user_turn(chat_request),
+                config={"configurable": {"thread_id": session_id}},
+                stream_mode=["messages", "updates"]
+            ):
+                if mode == "messages":
+                    message, metadata = chunk
+                    if metadata.get("langgraph_node") == "support_agent" and message.content:
+                        yield sse_event("token", {"content": message.content})
+                    continue
+
+                for node, update in (chunk or {}).items():
+                    if not update:
+                        continue
+                    for message in update.get("messages", []):
+                        if isinstance(message, AIMessage):
+                            usage.record(message)
+                        if node == "tools":
+                            yield sse_event("tool_result", {
+                                "tool_call_id": message.tool_call_id,
+                                "content": str(message.content)[:200]
+                            })
+                        elif getattr(message, "tool_calls", None):
+                            for call in message.tool_calls:
+                                yield sse_event("tool_call", {"name": call["name"], "args": call["args"]})
+                        else:
+                            assistant_response = message.content
+            history = await load_history(session_id)
+        except Exception as e:
+            yield sse_event("error", {"detail": f"Agent error: {str(e)}"})
+            return
+
+        record_turn(session, history)
+        yield sse_event("done", {
+            "response": assistant_response,
+            "session_id": session_id,
+            "messages": history[turn_start(history):],
+            "cursor": len(history),
+            "usage": {"prompt_tokens": usage.prompt_tokens, "cached_tokens": usage.cached_tokens}
+        })
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 @app.delete("/api/sessions/{session_id}")
 async def delete_session(session_id: str):
     """Delete a session"""
-    if session_id in sessions:
+    if await find_session(session_id) is not None:
         del sessions[session_id]
+        # The checkpointer is shared, so drop this thread's checkpoints too
+        await agent.checkpointer.adelete_thread(session_id)
+        if response_cache is not None:
+            response_cache.forget(session_id)
         return {"message": "Session deleted successfully"}
     raise HTTPException(status_code=404, detail="Session not found")
 
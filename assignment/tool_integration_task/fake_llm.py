@@ -0,0 +1,126 @@
+# fake_llm.py
+#
+# Minimal OpenAI-compatible chat completions server for local load tests.
+# Every completion waits FAKE_LLM_LATENCY seconds (default 0.5) before the first
+# token, then FAKE_LLM_TOKEN_DELAY seconds (default 0.02) per token, like a slow
+# upstream model would, without blocking other requests. Both "stream": true
+# and plain responses take the same total time.
+#
+# Usage reports ~4 chars/token prompt tokens, and a simple prompt cache: the
+# longest prefix (tools + leading messages) already seen in an earlier request
+# is reported as cached_tokens, like a provider prompt cache at message
+# granularity.
+#
+# Run:   uvicorn fake_llm:app --port 9000
+# Point: OPENAI_BASE_URL=http://127.0.0.1:9000/v1
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+LATENCY = float(os.getenv("FAKE_LLM_LATENCY", "0.5"))
+TOKEN_DELAY = float(os.getenv("FAKE_LLM_TOKEN_DELAY", "0.02"))
+
+app = FastAPI(title="Fake LLM")
+
+
+def _last_user_text(messages) -> str:
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            return str(message.get("content", ""))
+    return ""
+
+
+def _prompt_tokens(body: dict) -> int:
+    # Same rough estimate as context_window.approx_tokens (~4 chars per token)
+    return sum(4 + len(str(m.get("content") or "")) // 4 for m in body.get("messages", []))
+
+
+_seen_prefixes = set()
+
+
+def _cached_tokens(body: dict) -> int:
+    digest = hashlib.sha256(json.dumps(body.get("tools", []), sort_keys=True).encode())
+    cached, running, hit = 0, 0, True
+    for message in body.get("messages", []):
+        digest.update(json.dumps(message, sort_keys=True).encode())
+        running += 4 + len(str(message.get("content") or "")) // 4
+        key = digest.hexdigest()
+        if hit and key in _seen_prefixes:
+            cached = running
+        else:
+            hit = False
+        _seen_prefixes.add(key)
+    return cached
+
+
+def _reply_tokens(body: dict) -> list:
+    # Echo at most 40 words so replies (and summaries) stay a realistic size
+    said = " ".join(_last_user_text(body.get("messages", [])).split(" ")[:40])
+    reply = f"Thanks for reaching out! You said: {said}"
+    words = reply.split(" ")
+    return [word if i == 0 else " " + word for i, word in enumerate(words)]
+
+
+def _usage(prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> dict:
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens}}
+
+
+def _chunk(completion_id: str, model: str, delta=None, finish_reason=None, usage=None) -> str:
+    payload = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [] if delta is None else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    if usage is not None:
+        payload["usage"] = usage
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    tokens = _reply_tokens(body)
+    prompt_tokens = _prompt_tokens(body)
+    cached_tokens = _cached_tokens(body)
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    model = body.get("model", "fake")
+
+    if body.get("stream"):
+        async def stream():
+            await asyncio.sleep(LATENCY)
+            yield _chunk(completion_id, model, {"role": "assistant", "content": ""})
+            for token in tokens:
+                await asyncio.sleep(TOKEN_DELAY)
+                yield _chunk(completion_id, model, {"content": token})
+            yield _chunk(completion_id, model, {}, finish_reason="stop")
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield _chunk(completion_id, model, usage=_usage(prompt_tokens, len(tokens), cached_tokens))
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    await asyncio.sleep(LATENCY + TOKEN_DELAY * len(tokens))
+
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": "".join(tokens)},
+            "finish_reason": "stop",
+        }],
+        "usage": _usage(prompt_tokens, len(tokens), cached_tokens),
+    }
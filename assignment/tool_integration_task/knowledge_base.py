@@ -0,0 +1,127 @@
+"""
+Keyword knowledge base for the search / lookup_dictionary tools.
+
+Entries are loaded once from a JSON file, a list of
+
+    {"keys": ["return", "refund"], "text": "30-day money-back guarantee ..."}
+
+and compiled into an Aho-Corasick automaton over every key. A lookup walks
+the lowercased query once and finds every key occurring in it, so its cost
+depends on the query length and the number of matches, not on how many
+entries the knowledge base holds.
+
+- keys match as substrings of the query, like the old `key in query.lower()`
+- every matching entry is returned, ranked by matched key characters (longer,
+  more specific keys weigh more), then by where in the query it first matched
+- the file is re-read when its mtime changes (checked at most every
+  reload_interval seconds); the new automaton is swapped in atomically
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+NO_MATCH = "No relevant information found."
+
+
+class Automaton:
+    """Aho-Corasick automaton mapping each key to the entries it belongs to"""
+
+    def __init__(self, keys):
+        # keys: iterable of (key, entry index)
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]  # state -> [(key id, key length, entry index)]
+
+        for key_id, (key, entry) in enumerate(keys):
+            state = 0
+            for ch in key:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                state = nxt
+            self.out[state].append((key_id, len(key), entry))
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def matches(self, text: str):
+        """Yield (end position, key id, key length, entry index) for every key occurrence"""
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for key_id, length, entry in out[state]:
+                yield i, key_id, length, entry
+
+
+class KnowledgeBase:
+    def __init__(self, path: str, reload_interval: float = 1.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._mtime = None
+        self._index = ([], Automaton([]))  # (entries, automaton), replaced as a whole
+        self.reload()
+
+    def reload(self):
+        """Re-read and compile the file"""
+        mtime = os.stat(self.path).st_mtime_ns
+        with open(self.path, encoding="utf-8") as f:
+            entries = json.load(f)
+        automaton = Automaton(
+            (key.lower(), i) for i, entry in enumerate(entries) for key in entry["keys"]
+        )
+        self._index = (entries, automaton)
+        self._mtime = mtime
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+        with self._lock:
+            if now - self._checked_at < self.reload_interval:
+                return
+            self._checked_at = now
+            try:
+                if os.stat(self.path).st_mtime_ns != self._mtime:
+                    self.reload()
+            except (OSError, ValueError, KeyError):
+                pass  # keep serving the last good version
+
+    def lookup(self, query: str, limit: int = 3) -> list:
+        """Matching entries' texts, best match first"""
+        self._maybe_reload()
+        entries, automaton = self._index
+
+        scores = {}  # entry -> [matched key chars, first match position]
+        seen = set()  # a key counts once however often it occurs
+        for end, key_id, length, entry in automaton.matches(query.lower()):
+            score = scores.setdefault(entry, [0, end - length + 1])
+            if key_id not in seen:
+                seen.add(key_id)
+                score[0] += length
+
+        ranked = sorted(scores, key=lambda e: (-scores[e][0], scores[e][1]))
+        return [entries[e]["text"] for e in ranked[:limit]]
+
+    def answer(self, query: str, limit: int = 3) -> str:
+        """Tool-ready answer: the matching texts one per line, or NO_MATCH"""
+        return "\n".join(self.lookup(query, limit)) or NO_MATCH
@@ -0,0 +1,235 @@
+"""
+Semantic response cache in front of the support agent's LLM node.
+
+Support traffic repeats itself ("what's your return policy?", "is shipping
+free?"), and each repeat costs a full LLM round trip. With RESPONSE_CACHE=1
+the first support_agent call of a turn embeds the user's message and looks
+for an earlier answer to a similar enough question:
+
+- the index is a NumPy matrix of unit vectors in memory; a lookup is one
+  matrix-vector product over at most RESPONSE_CACHE_MAX_ENTRIES rows, so
+  nearest-neighbour search costs well under a millisecond next to the
+  embedding call
+- a cached answer is served when the cosine similarity is at least
+  RESPONSE_CACHE_THRESHOLD (default 0.93, tuned for
+  text-embedding-3-small: paraphrases score ~0.93+, different questions on
+  the same topic usually stay below 0.9)
+- entries expire after RESPONSE_CACHE_TTL seconds; beyond the maximum the
+  entry closest to expiry is replaced
+- every entry carries a namespace, a hash of the system prompt, the tool
+  schemas and the model; when any of them changes the index is dropped
+
+Answers are only ever shared between threads when they could depend on
+neither a thread's history nor the customer: the first turn of a thread
+(nothing before the user's message, no rolling summary) is stored globally
+unless the message carries identifiers (any digit, such as an order or phone
+number, an email address, or a self-introduction like "I'm Ana"), which
+could otherwise be echoed to the next customer. Identifying first turns and
+all later turns are stored in the thread's own scope, and their embedded text is prefixed with a short
+context fingerprint (the previous assistant reply) so that "yes, please" is
+matched only after the same question. Turns whose answer comes from the
+cache are not stored again, and only final answers (no tool calls) are.
+
+stats() reports hits, misses, hit rate, stores, expirations and
+invalidations (GET /api/stats/response-cache).
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+import numpy as np
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+THRESHOLD = 0.93
+TTL = 3600
+MAX_ENTRIES = 5000
+CONTEXT_CHARS = 200  # of the previous assistant reply, for history-dependent turns
+GLOBAL_SCOPE = ""
+
+_IDENTIFIERS = re.compile(
+    r"\d"  # order, account, phone and card numbers, dates
+    r"|[\w.+-]+@[\w-]+\.[\w.]+"  # email addresses
+    r"|\b(?:[Ii]'?m|I am|[Mm]y name is|[Tt]his is|[Nn]ame's|[Cc]all me)\s+[A-Z][a-z]+"  # self-introductions
+)
+
+
+def namespace(system_prompt, tools, model: str = "") -> str:
+    """Hash of everything besides the conversation that shapes an answer"""
+    digest = hashlib.sha256(str(system_prompt.content).encode())
+    digest.update(json.dumps([convert_to_openai_tool(t) for t in tools], sort_keys=True).encode())
+    digest.update(model.encode())
+    return digest.hexdigest()
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(str(text).split()).casefold()
+
+
+def has_identifiers(text: str) -> bool:
+    """Whether a message names or numbers something specific to the customer"""
+    return bool(_IDENTIFIERS.search(str(text)))
+
+
+def turn_context(state) -> tuple:
+    """
+    (shared, context fingerprint) for the latest user message.
+
+    The first turn of a thread depends on nothing but the message itself and
+    may be shared unless it identifies the customer; any earlier message or
+    summary makes it thread-private.
+    """
+    messages = state["messages"]
+    start = len(messages) - 1
+    while start >= 0 and not isinstance(messages[start], HumanMessage):
+        start -= 1
+    if start <= 0 and not state.get("summary"):
+        return start < 0 or not has_identifiers(messages[start].content), ""
+
+    previous = next((m for m in reversed(messages[:start])
+                     if isinstance(m, AIMessage) and m.content and not m.tool_calls), None)
+    return False, normalize_text(previous.content)[:CONTEXT_CHARS] if previous else ""
+
+
+class SemanticResponseCache:
+    def __init__(self, embeddings, threshold: float = THRESHOLD, ttl: float = TTL,
+                 max_entries: int = MAX_ENTRIES):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._namespace = None
+        self._pending = {}  # thread_id -> (scope, vector) of the turn awaiting its answer
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.expired = 0
+        self.invalidations = 0
+        self.embed_seconds = 0.0
+        self._reset()
+
+    @classmethod
+    def from_env(cls, embeddings=None):
+        """The cache configured by RESPONSE_CACHE_*, or None unless RESPONSE_CACHE=1"""
+        if os.getenv("RESPONSE_CACHE", "0").lower() not in ("1", "true", "yes", "on"):
+            return None
+        if embeddings is None:
+            from langchain_openai import OpenAIEmbeddings
+            embeddings = OpenAIEmbeddings(model=os.getenv("RESPONSE_CACHE_EMBEDDING_MODEL", "text-embedding-3-small"))
+        return cls(
+            embeddings,
+            threshold=float(os.getenv("RESPONSE_CACHE_THRESHOLD", str(THRESHOLD))),
+            ttl=float(os.getenv("RESPONSE_CACHE_TTL", str(TTL))),
+            max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", str(MAX_ENTRIES)))
+        )
+
+    def _reset(self):
+        self._vectors = None  # (max_entries, dimensions), allocated on first store
+        self._expires = np.zeros(self.max_entries)  # 0 = free slot
+        self._scopes = np.zeros(self.max_entries, dtype=np.int64)
+        self._answers = [None] * self.max_entries
+        self._scope_ids = {GLOBAL_SCOPE: 0}
+        self._next_scope = 1
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+            self._pending.clear()
+
+    def check_namespace(self, value: str):
+        """Drop every entry if the prompt, tools or model changed"""
+        with self._lock:
+            if value == self._namespace:
+                return
+            if self._namespace is not None:
+                self.invalidations += 1
+            self._namespace = value
+            self._reset()
+            self._pending.clear()
+
+    def _scope_id(self, scope: str) -> int:
+        if scope not in self._scope_ids:
+            self._scope_ids[scope] = self._next_scope
+            self._next_scope += 1
+        return self._scope_ids[scope]
+
+    async def _embed(self, text: str) -> np.ndarray:
+        started = time.perf_counter()
+        vector = np.asarray(await self.embeddings.aembed_query(text), dtype=np.float32)
+        self.embed_seconds += time.perf_counter() - started
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _search(self, vector: np.ndarray, scope: str):
+        """(slot, similarity) of the best live entry in scope, or (None, 0.0)"""
+        if self._vectors is None or scope not in self._scope_ids:
+            return None, 0.0
+        now = time.monotonic()
+        stale = (self._expires > 0) & (self._expires <= now)
+        if stale.any():
+            self.expired += int(stale.sum())
+            self._expires[stale] = 0
+        scores = self._vectors @ vector
+        scores[(self._expires == 0) | (self._scopes != self._scope_ids[scope])] = -np.inf
+        slot = int(np.argmax(scores))
+        return (slot, float(scores[slot])) if np.isfinite(scores[slot]) else (None, 0.0)
+
+    async def lookup(self, state, thread_id: str):
+        """(answer, similarity) for the turn's user message, or None; a miss is remembered for store()"""
+        shared, context = turn_context(state)
+        scope = GLOBAL_SCOPE if shared else f"thread:{thread_id}"
+        text = normalize_text(next(m.content for m in reversed(state["messages"]) if isinstance(m, HumanMessage)))
+        vector = await self._embed(f"{context}\n{text}" if context else text)
+
+        with self._lock:
+            slot, score = self._search(vector, scope)
+            if slot is not None and score >= self.threshold:
+                self.hits += 1
+                self._pending.pop(thread_id, None)
+                return self._answers[slot], score
+            self.misses += 1
+            self._pending[thread_id] = (scope, vector)
+            return None
+
+    def store(self, thread_id: str, answer: str):
+        """Cache the final answer of the turn last looked up on this thread"""
+        with self._lock:
+            pending = self._pending.pop(thread_id, None)
+            if pending is None or not answer:
+                return
+            scope, vector = pending
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+            free = np.flatnonzero(self._expires == 0)
+            slot = int(free[0]) if len(free) else int(np.argmin(self._expires))
+            self._vectors[slot] = vector
+            self._expires[slot] = time.monotonic() + self.ttl
+            self._scopes[slot] = self._scope_id(scope)
+            self._answers[slot] = answer
+            self.stores += 1
+
+    def forget(self, thread_id: str):
+        """Drop a deleted thread's private entries"""
+        with self._lock:
+            self._pending.pop(thread_id, None)
+            scope = self._scope_ids.pop(f"thread:{thread_id}", None)
+            if scope is not None:
+                self._expires[self._scopes == scope] = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "expired": self.expired,
+            "invalidations": self.invalidations,
+            "size": int((self._expires > 0).sum()),
+            "embed_ms": 1000 * self.embed_seconds / lookups if lookups else 0.0
+        }
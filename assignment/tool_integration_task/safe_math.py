@@ -0,0 +1,178 @@
+"""
+Safe arithmetic for the calculator tools.
+
+eval() on model-generated text runs arbitrary Python, and even plain
+arithmetic such as 9**9**9 can pin a core for minutes. evaluate() parses the
+expression with ast and walks it itself:
+
+- only numbers, + - * / // % **, unary +/-, parentheses, the constants pi/e
+  and the functions in FUNCTIONS are allowed; anything else (names,
+  attributes, calls to other functions, strings, comprehensions) is rejected
+- built-ins that could run away inside one call (factorial, round's digits)
+  are wrapped with bounds on their arguments
+- the checks walk the tree without recursion and reject nesting deeper
+  than MAX_DEPTH, so deeply nested input is a MathError however deep the
+  caller's stack already is
+- an exponent may not exceed MAX_EXPONENT and no integer result may grow
+  beyond MAX_DIGITS digits; both are checked before the operation runs
+- the walk stops once the wall-clock budget (default TIMEOUT seconds) is
+  spent
+- parsed and validated expressions are kept in an LRU cache, so a repeated
+  expression skips the parser
+
+Every rejection raises MathError with a short reason.
+"""
+
+import ast
+import math
+import operator
+import time
+from functools import lru_cache
+
+MAX_LENGTH = 1000  # characters
+MAX_EXPONENT = 10_000
+MAX_DIGITS = 4_000  # stays under Python's 4300-digit int -> str limit
+TIMEOUT = 0.1  # seconds per expression
+MAX_DEPTH = 500  # nested operators and calls ("1+1+...+1" within MAX_LENGTH is 500 deep)
+
+_MAX_BITS = int(MAX_DIGITS * math.log2(10))
+
+
+class MathError(ValueError):
+    pass
+
+
+def _factorial(n):
+    if not isinstance(n, int) or n < 0:
+        raise MathError("factorial() needs a non-negative integer")
+    if n > 1000:
+        raise MathError("factorial() argument too large")
+    return math.factorial(n)
+
+
+def _round(number, ndigits=None):
+    if ndigits is None:
+        return round(number)
+    if not isinstance(ndigits, int):
+        raise MathError("round() needs an integer number of digits")
+    if abs(ndigits) > MAX_DIGITS:
+        # round(1, -10**8) builds 10**(10**8) inside the built-in, out of reach of the time budget
+        raise MathError(f"round() digits beyond {MAX_DIGITS}")
+    return round(number, ndigits)
+
+
+FUNCTIONS = {
+    "abs": abs, "round": _round, "min": min, "max": max,
+    "sqrt": math.sqrt, "exp": math.exp, "log": math.log, "log10": math.log10, "log2": math.log2,
+    "sin": math.sin, "cos": math.cos, "tan": math.tan,
+    "floor": math.floor, "ceil": math.ceil, "factorial": _factorial,
+}
+
+CONSTANTS = {"pi": math.pi, "e": math.e}
+
+
+def _check_int(value):
+    if isinstance(value, int) and value.bit_length() > _MAX_BITS:
+        raise MathError(f"result exceeds {MAX_DIGITS} digits")
+    return value
+
+
+def _pow(base, exponent):
+    if abs(exponent) > MAX_EXPONENT:
+        raise MathError(f"exponent larger than {MAX_EXPONENT}")
+    if isinstance(base, int) and isinstance(exponent, int) and exponent > 0:
+        if (base.bit_length() - 1) * exponent > _MAX_BITS:
+            raise MathError(f"result exceeds {MAX_DIGITS} digits")
+    result = operator.pow(base, exponent)
+    if isinstance(result, complex):
+        raise MathError("result is not a real number")
+    return _check_int(result)
+
+
+def _mul(a, b):
+    if isinstance(a, int) and isinstance(b, int) and a.bit_length() + b.bit_length() > _MAX_BITS + 1:
+        raise MathError(f"result exceeds {MAX_DIGITS} digits")
+    return operator.mul(a, b)
+
+
+BINARY = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: _mul,
+    ast.Div: operator.truediv, ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod, ast.Pow: _pow,
+}
+
+UNARY = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+
+
+def _validate(tree: ast.Expression):
+    """Reject anything but allowed arithmetic; iterative, so deep nesting is a MathError, not a RecursionError"""
+    stack = [(tree.body, 1)]
+    while stack:
+        node, depth = stack.pop()
+        if depth > MAX_DEPTH:
+            raise MathError("expression nested too deeply")
+        if isinstance(node, ast.Constant):
+            if type(node.value) not in (int, float):
+                raise MathError("only numbers are allowed")
+        elif isinstance(node, ast.BinOp):
+            if type(node.op) not in BINARY:
+                raise MathError(f"operator {type(node.op).__name__} is not allowed")
+            stack += [(node.left, depth + 1), (node.right, depth + 1)]
+        elif isinstance(node, ast.UnaryOp):
+            if type(node.op) not in UNARY:
+                raise MathError(f"operator {type(node.op).__name__} is not allowed")
+            stack.append((node.operand, depth + 1))
+        elif isinstance(node, ast.Name):
+            if node.id not in CONSTANTS:
+                raise MathError(f"unknown name {node.id!r}")
+        elif isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+                raise MathError("only " + ", ".join(FUNCTIONS) + " can be called")
+            if node.keywords:
+                raise MathError("keyword arguments are not allowed")
+            stack += [(arg, depth + 1) for arg in node.args]
+        else:
+            raise MathError(f"{type(node).__name__} is not allowed")
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(expression: str) -> ast.Expression:
+    """Parsed and validated AST for an expression (cached)"""
+    if len(expression) > MAX_LENGTH:
+        raise MathError(f"expression longer than {MAX_LENGTH} characters")
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except (SyntaxError, ValueError):
+        raise MathError("not a valid expression") from None
+    except RecursionError:
+        raise MathError("expression nested too deeply") from None
+    _validate(tree)
+    return tree
+
+
+def _eval(node, deadline: float):
+    if time.monotonic() > deadline:
+        raise MathError("time budget exceeded")
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.BinOp):
+        return BINARY[type(node.op)](_eval(node.left, deadline), _eval(node.right, deadline))
+    if isinstance(node, ast.UnaryOp):
+        return UNARY[type(node.op)](_eval(node.operand, deadline))
+    if isinstance(node, ast.Name):
+        return CONSTANTS[node.id]
+    # ast.Call, the only node left after validation
+    return _check_int(FUNCTIONS[node.func.id](*(_eval(arg, deadline) for arg in node.args)))
+
+
+def evaluate(expression: str, timeout: float = TIMEOUT):
+    """Value of an arithmetic expression, or MathError"""
+    tree = compile_expression(expression)
+    try:
+        return _eval(tree.body, time.monotonic() + timeout)
+    except MathError:
+        raise
+    except (ArithmeticError, ValueError, TypeError) as e:
+        raise MathError(str(e)) from None
+    except RecursionError:
+        raise MathError("expression nested too deeply") from None
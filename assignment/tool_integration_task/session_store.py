@@ -0,0 +1,139 @@
+"""
+Bounded in-memory session store for the support API.
+
+Sessions are kept in least-recently-used order: reading a session with `[]`
+or `touch()` moves it to the end. A session is evicted when it has been idle
+for longer than `idle_ttl` seconds (measured from its `last_activity`) or
+when the store is full and it is the least recently used.
+Every eviction calls `on_evict(session_id)` so the caller can purge that
+thread's checkpoints as well.
+
+The store behaves like a dict (`in`, `[]`, `del`, `items()`, `len()`), so any
+object with the same methods plus `touch()` and `stats()` can be plugged in
+instead, e.g. one backed by Redis.
+"""
+
+import sys
+from collections import OrderedDict
+from datetime import datetime
+
+
+def approx_size(obj, _seen=None) -> int:
+    """Rough deep size in bytes of dicts/lists/strings (good enough for accounting)"""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(approx_size(k, _seen) + approx_size(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(approx_size(item, _seen) for item in obj)
+    return size
+
+
+class SessionStore:
+    def __init__(self, max_sessions=1000, idle_ttl=1800, on_evict=None, extra_size=None):
+        """
+        max_sessions: hard cap; the least recently used session is evicted beyond it
+        idle_ttl:     seconds without activity before a session expires (None = never)
+        on_evict:     callback(session_id) run for every evicted/expired session
+        extra_size:   optional callback(session_id) -> bytes held elsewhere (checkpoints)
+        """
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.on_evict = on_evict
+        self.extra_size = extra_size
+
+        self._sessions = OrderedDict()
+        self.evictions = 0
+        self.expirations = 0
+
+    def _is_expired(self, session: dict, now: datetime) -> bool:
+        if self.idle_ttl is None:
+            return False
+        last_activity = datetime.fromisoformat(session["last_activity"])
+        return (now - last_activity).total_seconds() > self.idle_ttl
+
+    def _evict(self, session_id: str):
+        self._sessions.pop(session_id, None)
+        if self.on_evict:
+            self.on_evict(session_id)
+
+    def evict_expired(self, scan_all: bool = False):
+        """Drop idle sessions.
+
+        The least recently used session is at the front, so by default this stops at the
+        first live one. A session that was only read keeps its old last_activity and can
+        sit expired behind a live one; scan_all checks every session (for listings and stats).
+        """
+        now = datetime.now()
+        if scan_all:
+            expired = [sid for sid, session in self._sessions.items() if self._is_expired(session, now)]
+        else:
+            expired = []
+            for session_id, session in self._sessions.items():
+                if not self._is_expired(session, now):
+                    break
+                expired.append(session_id)
+        for session_id in expired:
+            self._evict(session_id)
+            self.expirations += 1
+
+    def touch(self, session_id: str):
+        """Mark a session as most recently used (call after updating last_activity)"""
+        if session_id in self._sessions:
+            self._sessions.move_to_end(session_id)
+
+    def __setitem__(self, session_id: str, session: dict):
+        self.evict_expired()
+        self._sessions[session_id] = session
+        self._sessions.move_to_end(session_id)
+
+        while len(self._sessions) > self.max_sessions:
+            oldest_id = next(iter(self._sessions))
+            self._evict(oldest_id)
+            self.evictions += 1
+
+    def __getitem__(self, session_id: str) -> dict:
+        session = self._sessions[session_id]
+        if self._is_expired(session, datetime.now()):
+            self._evict(session_id)
+            self.expirations += 1
+            raise KeyError(session_id)
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def __contains__(self, session_id: str) -> bool:
+        try:
+            self[session_id]
+        except KeyError:
+            return False
+        return True
+
+    def __delitem__(self, session_id: str):
+        del self._sessions[session_id]
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def items(self):
+        self.evict_expired(scan_all=True)
+        return list(self._sessions.items())
+
+    def stats(self) -> dict:
+        self.evict_expired(scan_all=True)
+        approx_bytes = sum(approx_size(session) for session in self._sessions.values())
+        if self.extra_size:
+            approx_bytes += sum(self.extra_size(session_id) for session_id in self._sessions)
+
+        return {
+            "live_sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "idle_ttl_seconds": self.idle_ttl,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "approx_bytes": approx_bytes
+        }
@@ -1,11 +1,20 @@
 from langgraph.graph import START, END, StateGraph, MessagesState
-from langgraph.checkpoint.memory import MemorySaver
 from langchain_core.messages import ToolMessage, AIMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda
 from langchain_openai import ChatOpenAI
 import os
+import sys
 from dotenv import load_dotenv
 
-from tools import calculator, search, lookup_dictionary, get_weather
+from tools import calculator, calculator_batch, search, lookup_dictionary, get_weather
+# checkpointer.py is shared with the other agents; it lives in tool_integration_task
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from checkpointer import make_checkpointer
+from tool_runner import ToolRunner
+from context_window import (
+    SupportState, HistoryPolicy, PromptCacheStats,
+    make_summarize_node, stable_prompt, assemble_messages
+)
 
 load_dotenv()
 
@@ -13,15 +22,23 @@ load_dotenv()
 llm = ChatOpenAI(
     model="gpt-3.5-turbo",
     temperature=0,
-    api_key=os.getenv("OPENAI_API_KEY")
+    api_key=os.getenv("OPENAI_API_KEY"),
+    stream_usage=True  # usage (incl. cached prompt tokens) on streamed replies too
 )
 
-tools = [calculator, search, lookup_dictionary, get_weather]
-llm = llm.bind_tools(tools)
+# How many prompt tokens the provider served from its prompt cache
+prompt_cache = PromptCacheStats()
+
+tools = [calculator, calculator_batch, search, lookup_dictionary, get_weather]
+llm_with_tools = llm.bind_tools(tools)
 
+# How much of the thread goes to the LLM each call (HISTORY_POLICY, see context_window.py)
+history_policy = HistoryPolicy.from_env()
 
-support_prompt = SystemMessage(
-    content="""You are a helpful customer support agent for TechGadgets Inc.
+
+# Normalised once at import so the cacheable prompt prefix is byte-identical on every call
+support_prompt = stable_prompt(
+    """You are a helpful customer support agent for TechGadgets Inc.
     
     **COMPANY INFORMATION**:
     - TechGadgets Inc. sells laptops, smartphones, tablets, and accessories
@@ -40,6 +57,7 @@ support_prompt = SystemMessage(
 
     You can use tools when helpful:
     - Use the calculator tool for any math or numeric reasoning
+    - Use calculator_batch to evaluate several expressions in one call
     - Use the search tool for company policies, warranty, returns, or shipping
     - Use dictionary or weather tools when relevant
     Always prefer tools over guessing.
@@ -53,52 +71,44 @@ support_prompt = SystemMessage(
 )
 
 
-def support_agent(state: MessagesState) -> dict:
+def support_agent(state: SupportState) -> dict:
     """
     LLM reasoning step.
     Runs BOTH before and after tool execution.
     """
-    messages = [support_prompt] + state["messages"]
-    response = llm.invoke(messages)
+    messages = assemble_messages(support_prompt, history_policy, state)
+    response = llm_with_tools.invoke(messages)
+    prompt_cache.record(response)
 
     return {"messages": [response]}
 
 
+# Runs the tool calls of one AI message concurrently (TOOL_MAX_CONCURRENCY, TOOL_TIMEOUT)
+tool_runner = ToolRunner.from_env(tools)
+
+
 def tool_executor(state: MessagesState) -> dict:
     """
-    Executes tool calls decided by the LLM.
+    Executes tool calls decided by the LLM, concurrently, in call order.
     """
     last_message = state["messages"][-1]
 
     if not last_message.tool_calls:
         return {}
 
-    tool_messages = []
-
-    for call in last_message.tool_calls:
-        tool_name = call["name"]
-        tool_args = call["args"]
-
-        tool_fn = {
-            "calculator": calculator,
-            "search": search,
-            "lookup_dictionary": lookup_dictionary,
-            "get_weather": get_weather,
-        }.get(tool_name)
+    return {"messages": tool_runner.run(last_message.tool_calls)}
 
-        if not tool_fn:
-            continue
 
-        result = tool_fn.invoke(tool_args)
+async def atool_executor(state: MessagesState) -> dict:
+    """
+    Async variant used by ainvoke/astream.
+    """
+    last_message = state["messages"][-1]
 
-        tool_messages.append(
-            ToolMessage(
-                tool_call_id=call["id"],
-                content=str(result)
-            )
-        )
+    if not last_message.tool_calls:
+        return {}
 
-    return {"messages": tool_messages}
+    return {"messages": await tool_runner.arun(last_message.tool_calls)}
 
 
 def should_use_tools(state: MessagesState) -> str:
@@ -115,17 +125,27 @@ def should_use_tools(state: MessagesState) -> str:
     return "end"
 
 
-def create_support_agent():
+# One checkpointer for the whole process; conversations are kept apart by thread_id.
+# Set CHECKPOINT_DB to persist them in SQLite (WAL) instead of memory.
+memory = make_checkpointer()
+
+
+def create_support_agent(checkpointer=None):
     """
     Builds and compiles the LangGraph agent.
     """
 
-    builder = StateGraph(MessagesState)
+    builder = StateGraph(SupportState)
 
     builder.add_node("support_agent", support_agent)
-    builder.add_node("tools", tool_executor)
+    builder.add_node("tools", RunnableLambda(tool_executor, afunc=atool_executor, name="tools"))
 
-    builder.add_edge(START, "support_agent")
+    if history_policy.mode == "summary":
+        builder.add_node("summarize_history", make_summarize_node(llm, history_policy))
+        builder.add_edge(START, "summarize_history")
+        builder.add_edge("summarize_history", "support_agent")
+    else:
+        builder.add_edge(START, "support_agent")
 
     builder.add_conditional_edges(
         "support_agent",
@@ -139,5 +159,4 @@ def create_support_agent():
     # Critical loop: tools → agent (reason again)
     builder.add_edge("tools", "support_agent")
 
-    memory = MemorySaver()
-    return builder.compile(checkpointer=memory)
+    return builder.compile(checkpointer=checkpointer if checkpointer is not None else memory)
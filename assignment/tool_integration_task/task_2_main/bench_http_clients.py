@@ -0,0 +1,164 @@
+# bench_http_clients.py
+#
+# Connection reuse, retries and timeouts of http_clients.py against a local
+# stub HTTP server that counts the TCP connections it accepts:
+#
+# - 200 weather-style GETs with bare requests.get (the old code), with the
+#   pooled http_session, and with the async client (aget)
+# - /flaky answers 503 twice before succeeding: both clients retry
+# - /slow never answers within the read timeout: the call fails fast
+# - the get_weather tool run by ToolRunner.arun goes through aget (at most
+#   one connection per concurrent call), shares its TTL cache with the sync
+#   tool, and aclose() closes the loop's client
+#
+# Fails (AssertionError) unless the pooled clients open one connection for
+# all calls, both clients return 200 from /flaky, and /slow raises after
+# no more than two read timeouts.
+#
+# Usage: python bench_http_clients.py
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+import http_clients
+import tools
+from tool_runner import ToolRunner
+
+PORT = 9200
+URL = f"http://127.0.0.1:{PORT}"
+CALLS = 200
+TOOL_CONCURRENCY = 8
+SLOW_SECONDS = 2  # /slow answers after this long
+SLOW_TIMEOUT = (1, 0.5)  # connect, read
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+    connections = 0
+    flaky_left = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with StubHandler.lock:
+            StubHandler.connections += 1
+
+    def do_GET(self):
+        if self.path.startswith("/slow"):
+            time.sleep(SLOW_SECONDS)
+        status = 200
+        if self.path.startswith("/flaky"):
+            with StubHandler.lock:
+                if StubHandler.flaky_left > 0:
+                    StubHandler.flaky_left -= 1
+                    status = 503
+        body = json.dumps({"main": {"temp": 21.0, "humidity": 40},
+                           "weather": [{"description": "clear sky"}]}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except BrokenPipeError:
+            pass  # the client gave up (read timeout)
+
+    def log_message(self, *args):
+        pass
+
+
+def measure(label: str, fn) -> int:
+    """Connections opened by fn"""
+    StubHandler.connections = 0
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {StubHandler.connections:>12} {elapsed * 1000 / CALLS:>12.2f}")
+    return StubHandler.connections
+
+
+async def async_calls():
+    for i in range(CALLS):
+        (await http_clients.aget(f"{URL}/weather", params={"q": f"city{i}"})).json()
+    await http_clients.aclose()
+
+
+async def weather_tool_calls(cities: list) -> list:
+    runner = ToolRunner([tools.get_weather], max_concurrency=TOOL_CONCURRENCY, timeout=5)
+    calls = [{"id": f"call_{i}", "name": "get_weather", "args": {"city": city}} for i, city in enumerate(cities)]
+    messages = await runner.arun(calls)
+    client = http_clients._async_clients.get(asyncio.get_running_loop())
+    assert client is not None, "get_weather did not use the async client"
+    await http_clients.aclose()
+    assert client.is_closed, "aclose() left the async client open"
+    return messages
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", PORT), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        print(f"{CALLS} sequential GETs\n")
+        print(f"{'client':<24} {'connections':>12} {'ms / call':>12}")
+        measure("requests.get (old)", lambda: [
+            requests.get(f"{URL}/weather", params={"q": f"city{i}"}).json() for i in range(CALLS)])
+        pooled = measure("http_session", lambda: [
+            http_clients.http_session.get(f"{URL}/weather", params={"q": f"city{i}"},
+                                          timeout=http_clients.TIMEOUT).json() for i in range(CALLS)])
+        pooled_async = measure("async_client / aget", lambda: asyncio.run(async_calls()))
+        assert pooled == 1, f"http_session opened {pooled} connections for {CALLS} calls"
+        assert pooled_async == 1, f"aget opened {pooled_async} connections for {CALLS} calls"
+
+        StubHandler.flaky_left = 2
+        status = http_clients.http_session.get(f"{URL}/flaky", timeout=http_clients.TIMEOUT).status_code
+        print(f"\n/flaky (503 x2), http_session: {status}")
+        assert status == 200 and StubHandler.flaky_left == 0, f"http_session did not retry the 503s: {status}"
+
+        async def flaky():
+            try:
+                return (await http_clients.aget(f"{URL}/flaky")).status_code
+            finally:
+                await http_clients.aclose()
+
+        StubHandler.flaky_left = 2
+        status = asyncio.run(flaky())
+        print(f"/flaky (503 x2), aget:         {status}")
+        assert status == 200 and StubHandler.flaky_left == 0, f"aget did not retry the 503s: {status}"
+
+        tools.WEATHER_URL = f"{URL}/weather"
+        cities = [f"city{i}" for i in range(20)]
+        StubHandler.connections = 0
+        messages = asyncio.run(weather_tool_calls(cities))
+        assert all("temperature" in m.content for m in messages), messages[0].content
+        connections = StubHandler.connections
+        print(f"\nget_weather via ToolRunner.arun, {len(cities)} cities: {connections} connection(s)")
+        assert connections <= TOOL_CONCURRENCY, f"the async tool path opened {connections} connections"
+        stats = tools.get_weather.func.cache.stats()
+        tools.get_weather.invoke({"city": "CITY0"})
+        assert tools.get_weather.func.cache.stats()["hits"] == stats["hits"] + 1, "sync tool missed the async entry"
+
+        start = time.perf_counter()
+        try:
+            http_clients.http_session.get(f"{URL}/slow", timeout=SLOW_TIMEOUT, params={"once": 1})
+        except requests.RequestException as e:
+            elapsed = time.perf_counter() - start
+            print(f"/slow, read timeout {SLOW_TIMEOUT[1]}s:      {type(e).__name__} after "
+                  f"{elapsed:.2f}s (including retries)")
+        else:
+            raise AssertionError("/slow returned instead of timing out")
+        # Two reads (one retry) and at most one backoff, well before the stub answers
+        limit = 2 * SLOW_TIMEOUT[1] + http_clients.BACKOFF + 0.25
+        assert elapsed < min(limit, SLOW_SECONDS), f"/slow took {elapsed:.2f}s to fail (limit {limit:.2f}s)"
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
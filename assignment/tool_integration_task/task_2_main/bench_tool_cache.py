@@ -0,0 +1,82 @@
+# bench_tool_cache.py
+#
+# Upstream calls and wall time for a stream of tool calls where popular
+# queries repeat (Zipf-like popularity, varied case and spacing), with and
+# without ttl_cache. The stub "API" sleeps instead of calling OpenWeatherMap;
+# calls arrive 16 at a time, so identical in-flight calls are coalesced.
+#
+# Usage: python bench_tool_cache.py [calls]
+
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.tools import tool
+
+from tool_cache import ttl_cache
+
+API_DELAY = 0.05
+CITIES = ["Lagos", "London", "Nairobi", "Accra", "Paris", "Berlin", "Cairo", "Tokyo",
+          "Lima", "Oslo", "Delhi", "Rome", "Madrid", "Dakar", "Kigali", "Seoul"]
+
+upstream_calls = 0
+_count_lock = threading.Lock()
+
+
+def fake_weather_api(city: str) -> dict:
+    global upstream_calls
+    with _count_lock:
+        upstream_calls += 1
+    time.sleep(API_DELAY)
+    return {"city": city, "temperature": 21.0, "description": "clear sky"}
+
+
+@tool
+def get_weather(city: str) -> dict:
+    """Stub weather lookup"""
+    return fake_weather_api(city)
+
+
+@tool
+@ttl_cache("get_weather", ttl=600, maxsize=1024)
+def cached_get_weather(city: str) -> dict:
+    """Stub weather lookup"""
+    return fake_weather_api(city)
+
+
+def workload(n: int) -> list:
+    rng = random.Random(7)
+    weights = [1 / (rank + 1) for rank in range(len(CITIES))]
+    queries = []
+    for city in rng.choices(CITIES, weights, k=n):
+        variant = rng.choice([city, city.lower(), city.upper(), f"  {city} "])
+        queries.append(variant)
+    return queries
+
+
+def run(tool_fn, queries) -> tuple:
+    global upstream_calls
+    upstream_calls = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(lambda q: tool_fn.invoke({"city": q}), queries))
+    return time.perf_counter() - start, upstream_calls
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    queries = workload(n)
+
+    print(f"{n} get_weather calls over {len(CITIES)} cities, {API_DELAY * 1000:.0f}ms per API call\n")
+    print(f"{'':<12} {'upstream':>9} {'wall (s)':>9}")
+    elapsed, calls = run(get_weather, queries)
+    print(f"{'uncached':<12} {calls:>9} {elapsed:>9.2f}")
+    elapsed, calls = run(cached_get_weather, queries)
+    print(f"{'ttl_cache':<12} {calls:>9} {elapsed:>9.2f}")
+    print(f"\n{cached_get_weather.func.cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# bench_tool_runner.py
+#
+# Wall time for one AI message's tool calls (get_weather for three cities plus
+# a search) with stub tools that sleep instead of calling the network:
+# the old one-after-another loop versus ToolRunner on threads (run) and on the
+# event loop (arun, with async stubs). Also shows the concurrency cap and the
+# per-tool timeout.
+#
+# Usage: python bench_tool_runner.py
+
+import asyncio
+import time
+
+from langchain_core.tools import tool
+
+from tool_runner import ToolRunner
+
+WEATHER_DELAY = 0.3
+SEARCH_DELAY = 0.5
+
+
+@tool
+def get_weather(city: str) -> str:
+    """Stub weather lookup"""
+    time.sleep(WEATHER_DELAY)
+    return f"{city}: 18C"
+
+
+@tool
+def search(query: str) -> str:
+    """Stub web search"""
+    time.sleep(SEARCH_DELAY)
+    return f"- result for {query}"
+
+
+@tool
+def hang(query: str) -> str:
+    """Stub tool that never answers in time"""
+    time.sleep(5)
+    return "too late"
+
+
+async def _aget_weather(city: str) -> str:
+    await asyncio.sleep(WEATHER_DELAY)
+    return f"{city}: 18C"
+
+
+async def _asearch(query: str) -> str:
+    await asyncio.sleep(SEARCH_DELAY)
+    return f"- result for {query}"
+
+
+aget_weather = tool("get_weather", _aget_weather, description="Stub weather lookup")
+asearch = tool("search", _asearch, description="Stub web search")
+
+CALLS = [
+    {"id": "call_1", "name": "get_weather", "args": {"city": "London"}},
+    {"id": "call_2", "name": "get_weather", "args": {"city": "Paris"}},
+    {"id": "call_3", "name": "get_weather", "args": {"city": "Berlin"}},
+    {"id": "call_4", "name": "search", "args": {"query": "TechGadgets warranty"}},
+]
+
+
+def sequential(calls, tools) -> list:
+    by_name = {t.name: t for t in tools}
+    return [by_name[c["name"]].invoke(c["args"]) for c in calls]
+
+
+def timed(fn) -> tuple:
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    sync_tools = [get_weather, search, hang]
+
+    print(f"{len(CALLS)} tool calls: 3 x get_weather ({WEATHER_DELAY}s) + search ({SEARCH_DELAY}s)\n")
+    print(f"{'strategy':<28} {'wall (s)':>9}")
+
+    elapsed, _ = timed(lambda: sequential(CALLS, sync_tools))
+    print(f"{'sequential (old loop)':<28} {elapsed:>9.2f}")
+
+    runner = ToolRunner(sync_tools, max_concurrency=8, timeout=2)
+    elapsed, messages = timed(lambda: runner.run(CALLS))
+    assert [m.tool_call_id for m in messages] == [c["id"] for c in CALLS]
+    print(f"{'ToolRunner.run (threads)':<28} {elapsed:>9.2f}")
+
+    async_runner = ToolRunner([aget_weather, asearch], max_concurrency=8, timeout=2)
+    elapsed, messages = timed(lambda: asyncio.run(async_runner.arun(CALLS)))
+    assert [m.tool_call_id for m in messages] == [c["id"] for c in CALLS]
+    print(f"{'ToolRunner.arun (asyncio)':<28} {elapsed:>9.2f}")
+
+    capped = ToolRunner(sync_tools, max_concurrency=2, timeout=2)
+    elapsed, _ = timed(lambda: capped.run(CALLS))
+    print(f"{'ToolRunner.run, cap = 2':<28} {elapsed:>9.2f}")
+
+    slow = ToolRunner(sync_tools, max_concurrency=8, timeout=1)
+    calls = CALLS + [{"id": "call_5", "name": "hang", "args": {"query": "x"}}]
+    elapsed, messages = timed(lambda: slow.run(calls))
+    print(f"{'+ hanging tool, timeout 1s':<28} {elapsed:>9.2f}   -> {messages[-1].content}")
+
+
+if __name__ == "__main__":
+    main()
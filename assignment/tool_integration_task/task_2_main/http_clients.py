@@ -0,0 +1,114 @@
+"""
+Shared HTTP clients for tool network I/O.
+
+A bare requests.get opens a new TCP (and TLS) connection per call and, with
+no timeout, can hang a worker forever. The clients here are created once per
+process and reused by every tool call:
+
+- http_session: requests.Session with a bounded keep-alive pool
+  (HTTP_POOL_SIZE), retrying connection errors and 429/5xx responses with
+  jittered exponential backoff (HTTP_RETRIES; read timeouts once)
+- TIMEOUT: (connect, read) seconds to pass on every request
+  (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+- async_client(): httpx.AsyncClient with the same pool size and timeouts,
+  one per event loop, for async tools (get_weather's coroutine, run by
+  ToolRunner.arun); aget() adds the same retry policy. Call aclose() before
+  the event loop ends (e.g. on application shutdown) to close its client
+- ddgs(): a DDGS client reused per thread instead of one per search
+"""
+
+import asyncio
+import os
+import random
+import threading
+import weakref
+
+import httpx
+import requests
+from duckduckgo_search import DDGS
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+BACKOFF = 0.3  # seconds, doubled per retry
+JITTER = 0.2  # up to this many seconds added to each backoff
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+TIMEOUT = (
+    float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05")),
+    float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+)
+
+
+def _make_session() -> requests.Session:
+    retry = Retry(
+        total=RETRIES,
+        read=1,  # a read timeout has already cost HTTP_READ_TIMEOUT; retry it once at most
+        backoff_factor=BACKOFF,
+        backoff_jitter=JITTER,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods={"GET", "HEAD"},
+        respect_retry_after_header=True,
+        raise_on_status=False  # hand the last response back to the caller
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+http_session = _make_session()
+
+
+_async_clients = weakref.WeakKeyDictionary()  # event loop -> httpx.AsyncClient
+
+
+def async_client() -> httpx.AsyncClient:
+    """Pooled httpx.AsyncClient for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE),
+            timeout=httpx.Timeout(TIMEOUT[1], connect=TIMEOUT[0])
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def aclose():
+    """Close the running event loop's async client, if one was created"""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def aget(url: str, params=None) -> httpx.Response:
+    """GET with the async client, retrying like http_session does"""
+    read_timeouts = 0
+    for attempt in range(RETRIES + 1):
+        try:
+            response = await async_client().get(url, params=params)
+            if response.status_code not in RETRY_STATUSES or attempt == RETRIES:
+                return response
+        except httpx.ReadTimeout:
+            read_timeouts += 1
+            if read_timeouts > 1 or attempt == RETRIES:
+                raise
+        except httpx.TransportError:
+            if attempt == RETRIES:
+                raise
+        await asyncio.sleep(BACKOFF * 2 ** attempt + random.uniform(0, JITTER))
+
+
+_local = threading.local()
+
+
+def ddgs() -> DDGS:
+    """DDGS client reused by every search on this thread"""
+    client = getattr(_local, "ddgs", None)
+    if client is None:
+        client = _local.ddgs = DDGS(timeout=int(TIMEOUT[1]))
+    return client
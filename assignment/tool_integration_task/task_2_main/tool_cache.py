@@ -0,0 +1,196 @@
+"""
+Shared TTL cache for tool results.
+
+Popular tool calls ("weather in Lagos", "laptop warranty") repeat across
+sessions, and each one costs an external API round trip. ttl_cache wraps the
+function under @tool so the tool keeps its name, docstring and args schema:
+
+    @tool
+    @ttl_cache("get_weather", ttl=600, maxsize=1024)
+    def get_weather(city: str) -> dict:
+        ...
+
+- keys are the bound arguments with strings normalised (case, whitespace),
+  so "Lagos", " lagos " and "LAGOS" share an entry
+- entries expire after ttl seconds; beyond maxsize the least recently used
+  entry is dropped
+- concurrent identical calls are de-duplicated (single flight): one caller
+  runs the function, the others wait for its result
+- results rejected by cache_if (error responses) are returned but not cached
+- an async function decorated under the same name (the tool's coroutine)
+  shares the sync function's entries
+- cache_stats() reports hits, misses, coalesced waits and size per tool
+"""
+
+import asyncio
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+
+_caches = {}
+
+
+def normalize(value):
+    """Case- and whitespace-insensitive form of a string argument"""
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    return value
+
+
+class _Flight:
+    """One in-progress call that identical concurrent calls wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    def __init__(self, fn, name: str, ttl: float, maxsize: int, cache_if=None):
+        self.fn = fn
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.cache_if = cache_if
+        self._signature = inspect.signature(fn)
+        self._entries = OrderedDict()  # key -> (expires_at, value), oldest use first
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def key(self, args, kwargs) -> tuple:
+        bound = self._signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return tuple((name, normalize(value)) for name, value in bound.arguments.items())
+
+    def _begin(self, key: tuple) -> tuple:
+        """(cached entry, in-flight call, whether this caller runs the function)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry, None, False
+            self._entries.pop(key, None)
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+            return None, flight, leader
+
+    def _finish(self, key: tuple, flight: _Flight):
+        with self._lock:
+            if flight.error is None and (self.cache_if is None or self.cache_if(flight.value)):
+                self._entries[key] = (time.monotonic() + self.ttl, flight.value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+            del self._inflight[key]
+        flight.done.set()
+
+    def __call__(self, *args, **kwargs):
+        key = self.key(args, kwargs)
+        entry, flight, leader = self._begin(key)
+        if entry is not None:
+            return entry[1]
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = self.fn(*args, **kwargs)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            self._finish(key, flight)
+
+        return flight.value
+
+    async def acall(self, afn, *args, **kwargs):
+        """Like calling the cache, but awaiting afn (same arguments as fn) on a miss"""
+        key = self.key(args, kwargs)
+        entry, flight, leader = self._begin(key)
+        if entry is not None:
+            return entry[1]
+
+        if not leader:
+            # The leader may be a sync call on another thread
+            await asyncio.to_thread(flight.done.wait)
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = await afn(*args, **kwargs)
+        except BaseException as e:  # includes cancellation, so waiters are released
+            flight.error = e
+            raise
+        finally:
+            self._finish(key, flight)
+
+        return flight.value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl
+            }
+
+
+def ttl_cache(name: str, ttl: float, maxsize: int = 1024, cache_if=None):
+    """Decorator caching a tool function's results under a per-tool TTL and size limit"""
+
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            # Decorated after the sync function of the same name: share its entries
+            cache = _caches.get(name)
+            if cache is None:
+                cache = _caches[name] = TTLCache(fn, name, ttl, maxsize, cache_if)
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                return await cache.acall(fn, *args, **kwargs)
+
+            async_wrapper.cache = cache
+            return async_wrapper
+
+        cache = TTLCache(fn, name, ttl, maxsize, cache_if)
+        _caches[name] = cache
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return cache(*args, **kwargs)
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+def cache_stats() -> dict:
+    """Hit/miss metrics for every cached tool"""
+    return {name: cache.stats() for name, cache in _caches.items()}
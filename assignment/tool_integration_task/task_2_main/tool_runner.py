@@ -0,0 +1,126 @@
+"""
+Concurrent execution of the tool calls in one AI message.
+
+The model often asks for several independent tools at once (get_weather for
+three cities plus a search). Running them one after another makes the turn
+as slow as the sum of their latencies; ToolRunner runs them together so it
+is only as slow as the slowest one.
+
+- sync tools run on a shared thread pool whose size is the global
+  concurrency cap (TOOL_MAX_CONCURRENCY), across all requests
+- async tools (StructuredTool with a coroutine) run on the event loop,
+  capped by a semaphore of the same size
+- every call gets TOOL_TIMEOUT seconds from when it starts running (arun
+  also counts a sync tool's wait for a pool thread); a call that times out,
+  raises, or names an unknown tool still gets an error ToolMessage, because
+  the next LLM call needs an answer for every tool_call_id
+- ToolMessages are returned in the order of the tool calls
+
+A sync tool that times out cannot be killed; its thread finishes in the
+background and its result is discarded.
+"""
+
+import asyncio
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from langchain_core.messages import ToolMessage
+
+
+class ToolRunner:
+    def __init__(self, tools, max_concurrency: int = 8, timeout: float = 15.0):
+        self.tools = {t.name: t for t in tools}
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="tool")
+        self._semaphores = weakref.WeakKeyDictionary()  # event loop -> asyncio.Semaphore
+
+    @classmethod
+    def from_env(cls, tools):
+        return cls(
+            tools,
+            max_concurrency=int(os.getenv("TOOL_MAX_CONCURRENCY", "8")),
+            timeout=float(os.getenv("TOOL_TIMEOUT", "15"))
+        )
+
+    def _message(self, call, content, status="success") -> ToolMessage:
+        return ToolMessage(tool_call_id=call["id"], name=call["name"], content=str(content), status=status)
+
+    def _timed_out(self, call) -> ToolMessage:
+        return self._message(call, f"Error: {call['name']} timed out after {self.timeout:g}s", "error")
+
+    def _failed(self, call, error: Exception) -> ToolMessage:
+        return self._message(call, f"Error: {call['name']} failed: {error}", "error")
+
+    def _unknown(self, call) -> ToolMessage:
+        return self._message(call, f"Error: unknown tool {call['name']}", "error")
+
+    def run(self, tool_calls) -> list:
+        """Run tool calls on the thread pool and return their ToolMessages in order"""
+        jobs = []
+        for call in tool_calls:
+            tool = self.tools.get(call["name"])
+            if tool is None:
+                jobs.append(None)
+                continue
+            job = {"started": threading.Event(), "at": None}
+
+            def work(tool=tool, args=call["args"], job=job):
+                job["at"] = time.monotonic()
+                job["started"].set()
+                return tool.invoke(args)
+
+            job["future"] = self._pool.submit(work)
+            jobs.append(job)
+
+        messages = []
+        for call, job in zip(tool_calls, jobs):
+            if job is None:
+                messages.append(self._unknown(call))
+                continue
+            # Calls queued behind the cap wait at most one timeout for a worker
+            if not job["started"].wait(self.timeout):
+                job["future"].cancel()
+                messages.append(self._timed_out(call))
+                continue
+            remaining = job["at"] + self.timeout - time.monotonic()
+            try:
+                messages.append(self._message(call, job["future"].result(timeout=max(remaining, 0))))
+            except FutureTimeout:
+                messages.append(self._timed_out(call))
+            except Exception as e:
+                messages.append(self._failed(call, e))
+        return messages
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if loop not in self._semaphores:
+            self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphores[loop]
+
+    async def _arun_one(self, call) -> ToolMessage:
+        tool = self.tools.get(call["name"])
+        if tool is None:
+            return self._unknown(call)
+
+        try:
+            if getattr(tool, "coroutine", None) is not None:
+                async with self._semaphore():
+                    result = await asyncio.wait_for(tool.ainvoke(call["args"]), self.timeout)
+            else:
+                # Sync tools share the thread pool (and its cap) with run()
+                loop = asyncio.get_running_loop()
+                future = loop.run_in_executor(self._pool, tool.invoke, call["args"])
+                result = await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            return self._timed_out(call)
+        except Exception as e:
+            return self._failed(call, e)
+        return self._message(call, result)
+
+    async def arun(self, tool_calls) -> list:
+        """Run tool calls concurrently on the event loop and return their ToolMessages in order"""
+        return list(await asyncio.gather(*(self._arun_one(call) for call in tool_calls)))
@@ -1,14 +1,28 @@
 from langchain_core.tools import tool
 import os
+from typing import List
 from dotenv import load_dotenv
+import httpx
 import requests
-from duckduckgo_search import DDGS
+
+from http_clients import aget, http_session, ddgs, TIMEOUT
+from knowledge_base import KnowledgeBase
+from safe_math import evaluate, MathError
+from tool_cache import ttl_cache
 
 
 load_dotenv()
 
 WEATHER_API_KEY = os.getenv("WEATHER_API_KEY")
 
+# Compiled once; reloaded when the file changes
+knowledge_base = KnowledgeBase(os.getenv(
+    "KNOWLEDGE_BASE_PATH", os.path.join(os.path.dirname(__file__), "knowledge_base.json")
+))
+
+MAX_BATCH = 50  # expressions per calculator_batch call
+
+
 @tool
 def calculator(expression: str) -> str:
     """
@@ -16,31 +30,39 @@ def calculator(expression: str) -> str:
     Example: "2 + 3 * 4"
     """
     try:
-        return str(eval(expression))
-    except Exception:
-        return "Invalid math expression"
+        return str(evaluate(expression))
+    except MathError as e:
+        return f"Invalid math expression: {e}"
 
 
 @tool
-def lookup_dictionary(query: str) -> str:
+def calculator_batch(expressions: List[str]) -> str:
     """
-    lookup dictionary for company knowledge.
+    Evaluate several math expressions in one call, one result per line.
+    Example: ["19.99 * 3", "120 * 0.15"]
     """
-    mini_dictionary = {
-        "warranty": "All products have 1-year warranty. Extended 2-year warranty is available.",
-        "return": "30-day money-back guarantee on all products.",
-        "shipping": "Free shipping on orders over $99."
-    }
+    lines = []
+    for expression in expressions[:MAX_BATCH]:
+        try:
+            lines.append(f"{expression} = {evaluate(expression)}")
+        except MathError as e:
+            lines.append(f"{expression}: invalid math expression: {e}")
+    if len(expressions) > MAX_BATCH:
+        lines.append(f"(only the first {MAX_BATCH} expressions were evaluated)")
+    return "\n".join(lines)
 
-    for key, value in mini_dictionary.items():
-        if key in query.lower():
-            return value
 
-    return "No relevant information found."
+@tool
+def lookup_dictionary(query: str) -> str:
+    """
+    lookup dictionary for company knowledge.
+    """
+    return knowledge_base.answer(query)
 
 
 
 @tool
+@ttl_cache("search", ttl=3600, maxsize=2048, cache_if=lambda r: not r.startswith("Search error"))
 def search(query: str) -> str:
     """
     Search the web using DuckDuckGo and return top results.
@@ -48,9 +70,8 @@ def search(query: str) -> str:
     results = []
 
     try:
-        with DDGS() as ddgs:
-            for r in ddgs.text(query, max_results=5):
-                results.append(f"- {r['title']}: {r['href']}")
+        for r in ddgs().text(query, max_results=5):
+            results.append(f"- {r['title']}: {r['href']}")
 
         if not results:
             return "No search results found."
@@ -61,27 +82,51 @@ def search(query: str) -> str:
         return f"Search error: {str(e)}"
 
 
-@tool 
-def get_weather(city: str) -> dict:
-    """
-    get weather data for city using this openweathermap tool
-    """
-    url = "https://api.openweathermap.org/data/2.5/weather"
-    params = {
-        "q": city,
-        "appid": WEATHER_API_KEY,
-        "units": "metric"
-    }
+WEATHER_URL = "https://api.openweathermap.org/data/2.5/weather"
+
 
-    response = requests.get(url, params=params)
-    data = response.json()
+def _weather_params(city: str) -> dict:
+    return {"q": city, "appid": WEATHER_API_KEY, "units": "metric"}
 
-    if response.status_code != 200:
+
+def _weather_result(city: str, status_code: int, data: dict) -> dict:
+    if status_code != 200:
         return {"error": data.get("message", "Weather API error")}
-    
+
     return {
         "city": city,
         "temperature": data["main"]["temp"],
         "description": data["weather"][0]["description"],
         "humidity": data["main"]["humidity"]
-    }
\ No newline at end of file
+    }
+
+
+@tool
+@ttl_cache("get_weather", ttl=600, maxsize=1024, cache_if=lambda r: "error" not in r)
+def get_weather(city: str) -> dict:
+    """
+    get weather data for city using this openweathermap tool
+    """
+    try:
+        response = http_session.get(WEATHER_URL, params=_weather_params(city), timeout=TIMEOUT)
+        data = response.json()
+    except requests.RequestException as e:
+        return {"error": f"Weather API unreachable: {e}"}
+
+    return _weather_result(city, response.status_code, data)
+
+
+@ttl_cache("get_weather", ttl=600, maxsize=1024, cache_if=lambda r: "error" not in r)
+async def aget_weather(city: str) -> dict:
+    """get_weather on the pooled async client, for ToolRunner.arun"""
+    try:
+        response = await aget(WEATHER_URL, params=_weather_params(city))
+        data = response.json()
+    except (httpx.HTTPError, ValueError) as e:
+        return {"error": f"Weather API unreachable: {e}"}
+
+    return _weather_result(city, response.status_code, data)
+
+
+# ainvoke/astream run the tool on the event loop instead of a pool thread
+get_weather.coroutine = aget_weather
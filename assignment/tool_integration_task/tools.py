@@ -1,4 +1,17 @@
 from langchain_core.tools import tool
+import os
+from typing import List
+
+from knowledge_base import KnowledgeBase
+from safe_math import evaluate, MathError
+
+# Compiled once; reloaded when the file changes
+knowledge_base = KnowledgeBase(os.getenv(
+    "KNOWLEDGE_BASE_PATH", os.path.join(os.path.dirname(__file__), "knowledge_base.json")
+))
+
+MAX_BATCH = 50  # expressions per calculator_batch call
+
 
 @tool
 def calculator(expression: str) -> str:
@@ -7,9 +20,26 @@ def calculator(expression: str) -> str:
     Example: "2 + 3 * 4"
     """
     try:
-        return str(eval(expression))
-    except Exception:
-        return "Invalid math expression"
+        return str(evaluate(expression))
+    except MathError as e:
+        return f"Invalid math expression: {e}"
+
+
+@tool
+def calculator_batch(expressions: List[str]) -> str:
+    """
+    Evaluate several math expressions in one call, one result per line.
+    Example: ["19.99 * 3", "120 * 0.15"]
+    """
+    lines = []
+    for expression in expressions[:MAX_BATCH]:
+        try:
+            lines.append(f"{expression} = {evaluate(expression)}")
+        except MathError as e:
+            lines.append(f"{expression}: invalid math expression: {e}")
+    if len(expressions) > MAX_BATCH:
+        lines.append(f"(only the first {MAX_BATCH} expressions were evaluated)")
+    return "\n".join(lines)
     
 
 @tool
@@ -17,14 +47,4 @@ def search(query: str) -> str:
     """
     Search company knowledge or web-like info.
     """
-    knowledge_base = {
-        "warranty": "All products have 1-year warranty. Extended 2-year warranty is available.",
-        "return": "30-day money-back guarantee on all products.",
-        "shipping": "Free shipping on orders over $99."
-    }
-
-    for key, value in knowledge_base.items():
-        if key in query.lower():
-            return value
-
-    return "No relevant information found."
+    return knowledge_base.answer(query)
@@ -2,6 +2,7 @@ class CustomerSupportChat {
     constructor() {
         this.API_BASE_URL = 'http://localhost:8000';
         this.currentSessionId = null;
+        this.cursor = 0;  // number of history messages already rendered
         this.isTyping = false;
         
         this.initializeElements();
@@ -67,13 +68,16 @@ class CustomerSupportChat {
         const savedSession = localStorage.getItem('lastSessionId');
         if (savedSession) {
             try {
-                const response = await fetch(`${this.API_BASE_URL}/api/sessions/${savedSession}`);
-                if (response.ok) {
-                    const data = await response.json();
-                    this.currentSessionId = savedSession;
-                    this.setupChat();
-                    this.loadMessages(data.messages);
-                }
+                let started = false;
+                await this.fetchHistoryPages(savedSession, (page) => {
+                    if (!started) {
+                        started = true;
+                        this.currentSessionId = savedSession;
+                        this.setupChat();
+                        this.chatMessages.innerHTML = '';
+                    }
+                    this.appendMessages(page.messages, page.cursor);
+                });
             } catch (error) {
                 console.log('No previous session found');
             }
@@ -100,6 +104,7 @@ class CustomerSupportChat {
             
             const session = await response.json();
             this.currentSessionId = session.session_id;
+            this.cursor = 0;
             
             // Save to localStorage
             localStorage.setItem('lastSessionId', this.currentSessionId);
@@ -134,6 +139,7 @@ class CustomerSupportChat {
 
     resetToWelcome() {
         this.currentSessionId = null;
+        this.cursor = 0;
         this.welcomeScreen.style.display = 'flex';
         this.chatMessages.style.display = 'none';
         this.chatMessages.innerHTML = '';
@@ -169,9 +175,12 @@ class CustomerSupportChat {
         this.showTypingIndicator();
         
         const startTime = Date.now();
+        let firstTokenTime = null;
+        let assistantDiv = null;
+        let streamedText = '';
         
         try {
-            const response = await fetch(`${this.API_BASE_URL}/api/chat`, {
+            const response = await fetch(`${this.API_BASE_URL}/api/chat/stream`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({
@@ -180,22 +189,44 @@ class CustomerSupportChat {
                 })
             });
             
-            if (!response.ok) throw new Error('Failed to get response');
-            
-            const data = await response.json();
+            if (!response.ok || !response.body) throw new Error('Failed to get response');
             
-            // Hide typing indicator
-            this.hideTypingIndicator();
+            await this.readEventStream(response.body, (event, data) => {
+                if (event === 'token') {
+                    if (!assistantDiv) {
+                        // First token: swap the typing indicator for the reply bubble
+                        firstTokenTime = Date.now() - startTime;
+                        this.hideTypingIndicator();
+                        assistantDiv = this.addMessage('assistant', '');
+                    }
+                    streamedText += data.content;
+                    this.renderStreamingContent(assistantDiv, streamedText);
+                } else if (event === 'tool_call') {
+                    this.showToolStatus(`Using ${data.name}...`);
+                } else if (event === 'tool_result') {
+                    this.showToolStatus('Tool finished, thinking...');
+                } else if (event === 'done') {
+                    this.hideTypingIndicator();
+                    if (!assistantDiv) {
+                        assistantDiv = this.addMessage('assistant', '');
+                    }
+                    // Re-render once as markdown now that the reply is complete
+                    const content = assistantDiv.querySelector('.message-content');
+                    content.classList.remove('streaming');
+                    content.innerHTML = marked.parse(data.response);
+                    // The user and assistant messages are already on screen; just advance the cursor
+                    this.cursor = data.cursor;
+                    this.updateMessageCount(this.cursor);
+                } else if (event === 'error') {
+                    throw new Error(data.detail);
+                }
+            });
             
-            // Calculate response time
+            // Show time-to-first-token and total response time
             const responseTime = Date.now() - startTime;
-            this.responseTime.textContent = `Response time: ${responseTime}ms`;
-            
-            // Add assistant response
-            this.addMessage('assistant', data.response);
-            
-            // Update message count
-            this.updateMessageCount(data.messages.length);
+            this.responseTime.textContent = firstTokenTime === null ?
+                `Response time: ${responseTime}ms` :
+                `First token: ${firstTokenTime}ms · Response time: ${responseTime}ms`;
             
         } catch (error) {
             console.error('Error sending message:', error);
@@ -205,6 +236,47 @@ class CustomerSupportChat {
         }
     }
 
+    async readEventStream(body, onEvent) {
+        // Parse server-sent events ("event: x\ndata: {...}\n\n") from a fetch body
+        const reader = body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const frame = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                
+                let event = 'message';
+                let data = '';
+                frame.split('\n').forEach(line => {
+                    if (line.startsWith('event: ')) event = line.slice(7);
+                    else if (line.startsWith('data: ')) data += line.slice(6);
+                });
+                if (data) onEvent(event, JSON.parse(data));
+            }
+        }
+    }
+
+    renderStreamingContent(messageDiv, text) {
+        // Plain text while streaming; markdown is applied once on "done"
+        const content = messageDiv.querySelector('.message-content');
+        content.textContent = text;
+        content.classList.add('streaming');
+        this.scrollToBottom();
+    }
+
+    showToolStatus(text) {
+        const indicator = document.getElementById('typingIndicator');
+        const status = indicator && indicator.querySelector('.typing-status');
+        if (status) status.textContent = text;
+    }
+
     addMessage(role, content) {
         const messageDiv = document.createElement('div');
         messageDiv.className = `message message-${role}`;
@@ -236,17 +308,33 @@ class CustomerSupportChat {
         
         this.chatMessages.appendChild(messageDiv);
         this.scrollToBottom();
+        return messageDiv;
     }
 
-    loadMessages(messages) {
-        this.chatMessages.innerHTML = '';
+    appendMessages(messages, cursor) {
+        // Append a delta of history; earlier messages stay rendered
         messages.forEach(msg => {
             this.addMessage(msg.role, msg.content);
         });
-        this.updateMessageCount(messages.length);
+        this.cursor = cursor;
+        this.updateMessageCount(cursor);
         this.scrollToBottom();
     }
 
+    async fetchHistoryPages(sessionId, onPage) {
+        // Walk the history with the since/limit cursor instead of one big payload
+        let since = 0;
+        let page;
+        do {
+            const response = await fetch(`${this.API_BASE_URL}/api/sessions/${sessionId}?since=${since}&limit=100`);
+            if (!response.ok) throw new Error('Failed to fetch session');
+            page = await response.json();
+            onPage(page);
+            since = page.cursor;
+        } while (page.has_more);
+        return page;
+    }
+
     showTypingIndicator() {
         if (this.isTyping) return;
         
@@ -263,7 +351,7 @@ class CustomerSupportChat {
                 <span></span>
                 <span></span>
             </div>
-            <div style="color: var(--gray-500); font-size: 0.875rem;">
+            <div class="typing-status" style="color: var(--gray-500); font-size: 0.875rem;">
                 AI is typing...
             </div>
         `;
@@ -303,10 +391,10 @@ class CustomerSupportChat {
         }
         
         try {
-            const response = await fetch(`${this.API_BASE_URL}/api/sessions/${this.currentSessionId}`);
-            if (!response.ok) throw new Error('Failed to fetch chat data');
-            
-            const data = await response.json();
+            const messages = [];
+            const data = await this.fetchHistoryPages(this.currentSessionId, (page) => {
+                messages.push(...page.messages);
+            });
             
             // Format chat for export
             let exportText = `TechGadgets Support Chat Export\n`;
@@ -315,7 +403,7 @@ class CustomerSupportChat {
             exportText += `Date: ${new Date().toLocaleString()}\n\n`;
             exportText += `Chat History:\n${'='.repeat(50)}\n\n`;
             
-            data.messages.forEach(msg => {
+            messages.forEach(msg => {
                 const sender = msg.role === 'user' ? 'Customer' : 'Support Agent';
                 const time = new Date(msg.timestamp).toLocaleTimeString();
                 exportText += `[${time}] ${sender}:\n${msg.content}\n\n`;
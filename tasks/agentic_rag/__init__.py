@@ -0,0 +1,7 @@
+"""
+Building blocks for the Agentic RAG notebook (03_Agentic_RAG.ipynb).
+
+Run the notebook, CLIs and benchmarks from the tasks/ directory, e.g.
+
+    python -m agentic_rag.ingest Lehninger_Principles_of_Biochemistry_6th.pdf
+"""
@@ -0,0 +1,86 @@
+# bench_embedding_cache.py
+#
+# Embedding calls, wall time and cache hit rate when a 300-page book is
+# indexed, the collection is rebuilt from scratch (as after deleting
+# chroma_db_agentic_rag or changing the collection), and a set of queries is
+# asked repeatedly. The wrapped model is a deterministic fake that sleeps like
+# a remote API (EMBED_LATENCY per request + per-text cost).
+#
+# Usage (from tasks/): python -m agentic_rag.bench_embedding_cache
+
+import os
+import tempfile
+import time
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from agentic_rag.bench_ingest import make_book, write_book
+from agentic_rag.embedding_cache import CachedEmbeddings
+from agentic_rag.ingest import default_manifests, ingest_file, make_vectorstore
+
+EMBED_LATENCY = 0.2  # seconds per API request
+PER_TEXT = 0.002  # seconds per embedded text
+
+QUERIES = ["What is an enzyme?", "How does glucose metabolism work?", "Explain protein folding",
+           "What are amino acids?", "How do receptors bind ligands?"]
+
+
+class SlowEmbeddings(DeterministicFakeEmbedding):
+    calls: int = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        time.sleep(EMBED_LATENCY + PER_TEXT * len(texts))
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.calls += 1
+        time.sleep(EMBED_LATENCY)
+        return super().embed_query(text)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        book = os.path.join(tmp, "book.txt")
+        write_book(book, make_book(300))
+
+        model = SlowEmbeddings(size=256)
+        cached = CachedEmbeddings(model, os.path.join(tmp, "embedding_cache.sqlite"), model="fake-256")
+
+        print(f"{'run':<30} {'time (s)':>9} {'API calls':>10} {'hit rate':>9}")
+
+        def row(label, fn, kind):
+            calls, before = model.calls, cached.stats()
+            elapsed = timed(fn)
+            after = cached.stats()
+            hits = after[f"{kind}_hits"] - before[f"{kind}_hits"]
+            total = hits + after[f"{kind}_misses"] - before[f"{kind}_misses"]
+            print(f"{label:<30} {elapsed:>9.2f} {model.calls - calls:>10} {hits / total if total else 0:>9.0%}")
+
+        for i, label in enumerate(["index (cold cache)", "rebuild collection (warm)"]):
+            persist = os.path.join(tmp, f"chroma{i}")
+            store = make_vectorstore(cached, persist, "bench")
+            row(label, lambda: ingest_file(store, book, default_manifests(persist)), "document")
+
+        store = make_vectorstore(cached, os.path.join(tmp, "chroma1"), "bench")
+        for label in ["5 queries (cold)", "5 queries (repeated)"]:
+            row(label, lambda: [store.similarity_search(q, k=4) for q in QUERIES], "query")
+
+        # A new process: the in-memory LRU is empty, SQLite still has them
+        fresh = CachedEmbeddings(model, os.path.join(tmp, "embedding_cache.sqlite"), model="fake-256")
+        calls = model.calls
+        elapsed = timed(lambda: [fresh.embed_query(q) for q in QUERIES])
+        print(f"{'5 queries (new process)':<30} {elapsed:>9.2f} {model.calls - calls:>10} "
+              f"{fresh.stats()['query_hit_rate']:>9.0%}")
+
+        print(f"\n{cached.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+# bench_embedding_scheduler.py
+#
+# Ingesting a synthetic book through OpenAIEmbeddings pointed at a local fake
+# embedding server that enforces a requests/s and tokens/s limit (token
+# buckets, 429 with Retry-After) and takes time proportional to the tokens
+# in a request. Compared:
+#
+#   sequential     ingest_file with the default client (one request per
+#                  add_documents batch, client retries)
+#   naive parallel the same batches as the scheduler, 16 threads, client
+#                  retries, no coordination
+#   scheduler      ingest_file through EmbeddingScheduler
+#
+# then an outage (503s) halfway through a scheduled ingest, and a resume.
+#
+# Usage (from tasks/): python -m agentic_rag.bench_embedding_scheduler [pages]
+
+import base64
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+from langchain_openai import OpenAIEmbeddings
+
+from agentic_rag.bench_ingest import make_book, write_book
+from agentic_rag.embedding_cache import CachedEmbeddings
+from agentic_rag.embedding_scheduler import EmbeddingScheduler, estimate_tokens, token_batches
+from agentic_rag.ingest import default_manifests, ingest_file, load_pages, make_splitter, make_vectorstore
+
+REQUESTS_PER_SEC = 40
+TOKENS_PER_SEC = 100_000
+LATENCY = 0.05  # seconds per request
+PER_TOKEN = 20e-6  # seconds per input token
+DIMENSIONS = 64
+
+
+class Bucket:
+    def __init__(self, rate: float):
+        self.rate = self.capacity = self.level = rate
+        self.updated = time.monotonic()
+
+    def wait_for(self, amount: float) -> float:
+        """0 if amount can be taken now (and takes it), else seconds until it can"""
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        if amount <= self.level:
+            self.level -= amount
+            return 0.0
+        return (amount - self.level) / self.rate
+
+
+class FakeEmbeddingServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self, fail_after: int = None):
+        with self.lock:
+            self.requests_bucket = Bucket(REQUESTS_PER_SEC)
+            self.tokens_bucket = Bucket(TOKENS_PER_SEC)
+            self.counts = {"ok": 0, "429": 0, "503": 0, "inputs": 0}
+            self.fail_after = fail_after
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+
+class Handler(BaseHTTPRequestHandler):
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status: int, body: dict, headers: dict = None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        tokens = sum(estimate_tokens(t) for t in inputs)
+        server = self.server
+
+        with server.lock:
+            if server.fail_after is not None and server.counts["ok"] >= server.fail_after:
+                server.counts["503"] += 1
+                return self.reply(503, {"error": {"message": "unavailable"}})
+            wait = max(server.requests_bucket.wait_for(0), server.tokens_bucket.wait_for(0))
+            if not wait:
+                wait = server.requests_bucket.wait_for(1)
+                if not wait:
+                    wait = server.tokens_bucket.wait_for(tokens)
+                    if wait:
+                        server.requests_bucket.level += 1  # give the request back
+            if wait:
+                server.counts["429"] += 1
+                return self.reply(429, {"error": {"message": "rate limited", "type": "rate_limit"}},
+                                  {"retry-after-ms": str(int(wait * 1000)), "retry-after": str(int(wait) + 1)})
+            server.counts["ok"] += 1
+            server.counts["inputs"] += len(inputs)
+
+        time.sleep(LATENCY + PER_TOKEN * tokens)
+        data = []
+        for i, text in enumerate(inputs):
+            seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:4], "little")
+            vector = np.random.default_rng(seed).standard_normal(DIMENSIONS).astype(np.float32)
+            embedding = (base64.b64encode(vector.tobytes()).decode()
+                         if body.get("encoding_format") == "base64" else vector.tolist())
+            data.append({"object": "embedding", "index": i, "embedding": embedding})
+        self.reply(200, {"object": "list", "data": data, "model": body["model"],
+                         "usage": {"prompt_tokens": tokens, "total_tokens": tokens}})
+
+
+def client(server, **kwargs):
+    return OpenAIEmbeddings(model="fake-embedding", base_url=server.base_url, api_key="unused",
+                            check_embedding_ctx_length=False, **kwargs)
+
+
+def row(label, server, fn):
+    start = time.perf_counter()
+    error = None
+    try:
+        fn()
+    except Exception as e:
+        error = type(e).__name__
+    elapsed = time.perf_counter() - start
+    c = server.counts
+    print(f"{label:<24} {elapsed:>8.2f} {c['ok']:>6} {c['429']:>6} {c['503']:>6} {c['inputs']:>8}  {error or ''}")
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    server = FakeEmbeddingServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        book = os.path.join(tmp, "book.txt")
+        write_book(book, make_book(pages))
+        texts = [c.page_content for c in make_splitter().split_documents(load_pages(book))]
+        tokens = sum(estimate_tokens(t) for t in texts)
+        print(f"{pages}-page book, {len(texts)} chunks, ~{tokens} tokens; server allows "
+              f"{REQUESTS_PER_SEC} requests/s, {TOKENS_PER_SEC} tokens/s\n")
+        print(f"{'run':<24} {'time (s)':>8} {'ok':>6} {'429':>6} {'503':>6} {'inputs':>8}  error")
+
+        def ingest(name, embeddings):
+            store = make_vectorstore(embeddings, os.path.join(tmp, name), "bench")
+            ingest_file(store, book, default_manifests(os.path.join(tmp, name)))
+
+        server.reset()
+        row("sequential", server, lambda: ingest("sequential", client(server)))
+
+        server.reset()
+        naive = client(server)
+        ranges = token_batches(texts)
+        with ThreadPoolExecutor(16) as pool:
+            row("naive parallel (16)", server,
+                lambda: list(pool.map(lambda r: naive.embed_documents(texts[r[0]:r[1]]), ranges)))
+
+        server.reset()
+        scheduler = EmbeddingScheduler(client(server, max_retries=0))
+        row("scheduler", server, lambda: ingest("scheduler", scheduler))
+        print(f"{'':<24} {scheduler.stats()}")
+
+        # Outage after half the requests; the scheduler gives up, the rerun resumes
+        cache = os.path.join(tmp, "embedding_cache.sqlite")
+        server.reset(fail_after=len(ranges) // 2)
+        interrupted = EmbeddingScheduler(CachedEmbeddings(client(server, max_retries=0), cache), max_retries=2)
+        row("outage halfway", server, lambda: ingest("resume", interrupted))
+        server.reset()
+        resumed = EmbeddingScheduler(CachedEmbeddings(client(server, max_retries=0), cache))
+        row("resume", server, lambda: ingest("resume", resumed))
+        stats = resumed.stats()
+        print(f"{'':<24} cache hits {stats['document_hits']}, misses {stats['document_misses']}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
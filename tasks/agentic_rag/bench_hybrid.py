@@ -0,0 +1,132 @@
+# bench_hybrid.py
+#
+# Recall@5 and latency of the MMR-only path (MMRRetriever, k=5,
+# fetch_k=100), BM25 alone and hybrid retrieval (RRF over dense top-10 and
+# BM25 top-10, with equal weights and with lexical weighted 2x) on a fixed
+# query set. The corpus is 400 short synthetic pages of biochemistry
+# vocabulary; 100 enzymes, each with a made-up name and EC
+# number, are described on 3 pages each. Queries ask for an enzyme by name or
+# by EC number; the relevant pages are the 3 that mention it.
+#
+# The dense model is a stand-in for a general-purpose embedding model:
+# common words carry the meaning, rare identifiers (enzyme names, EC
+# numbers) contribute only a weak signal. Absolute numbers depend on the
+# real model; run the same query set against the notebook's collection to
+# measure text-embedding-3-small.
+#
+# Usage (from tasks/): python -m agentic_rag.bench_hybrid
+
+import hashlib
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from agentic_rag.bench_ingest import WORDS
+from agentic_rag.bm25 import Bm25Retriever, HybridRetriever, tokenize
+from agentic_rag.ingest import default_lexical, default_manifests, ingest_documents, make_vectorstore
+from agentic_rag.mmr import MMRRetriever
+
+DIMENSIONS = 256
+RARE_WEIGHT = 0.6
+PAGE_WORDS = 30  # filler words per page, besides the enzyme facts
+COMMON = set(WORDS) | set("""the a an of in on and to is are by which what does enzyme number ec reaction
+    catalyzes catalyze stereospecific reversible irreversible phosphorylation oxidation reduction
+    hydrolysis isomerization transfer glucose fructose pyruvate lactate acetyl coa atp nadh""".split())
+
+PREFIXES = "gluco fructo galacto manno ribo xylo lipo nucleo amino keto".split()
+SUFFIXES = "kinase mutase isomerase synthase dehydrogenase transferase reductase oxidase aldolase lyase".split()
+PROCESSES = "phosphorylation oxidation reduction hydrolysis isomerization transfer".split()
+SUBSTRATES = "glucose fructose pyruvate lactate acetyl-coa atp nadh".split()
+
+
+class TopicEmbeddings(Embeddings):
+    calls: int = 0
+
+    def _vector(self, text: str) -> list:
+        v = np.zeros(DIMENSIONS)
+        for token in tokenize(text):
+            seed = int.from_bytes(hashlib.sha1(token.encode()).digest()[:4], "little")
+            v += (1.0 if token in COMMON else RARE_WEIGHT) * np.random.default_rng(seed).standard_normal(DIMENSIONS)
+        return (v / (np.linalg.norm(v) or 1)).tolist()
+
+    def embed_documents(self, texts):
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text):
+        self.calls += 1
+        return self._vector(text)
+
+
+def corpus(seed: int = 0) -> tuple:
+    """(pages, enzymes, page numbers per enzyme)"""
+    rng = random.Random(seed)
+    names = rng.sample([p + s for p in PREFIXES for s in SUFFIXES], 100)
+    enzymes = [(name, f"EC {rng.randint(1, 7)}.{rng.randint(1, 20)}.{rng.randint(1, 30)}.{rng.randint(1, 200)}")
+               for name in names]
+    pages = [" ".join(rng.choice(WORDS) for _ in range(PAGE_WORDS)) for _ in range(400)]
+    mentions = {}
+    for name, ec in enzymes:
+        for page in rng.sample(range(len(pages)), 3):
+            fact = (f" The enzyme {name} ({ec}) catalyzes the {rng.choice(['stereospecific', 'reversible'])} "
+                    f"{rng.choice(PROCESSES)} of {rng.choice(SUBSTRATES)}. ")
+            words = pages[page].split(" ")
+            cut = rng.randint(10, len(words) - 10)
+            pages[page] = " ".join(words[:cut]) + fact + " ".join(words[cut:])
+            mentions.setdefault(name, set()).add(page)
+    return pages, enzymes, mentions
+
+
+def queries(enzymes: list, mentions: dict) -> list:
+    out = []
+    for i, (name, ec) in enumerate(enzymes):
+        if i % 2:
+            out.append((f"Which reaction does {name} catalyze?", mentions[name]))
+        else:
+            out.append((f"What enzyme has the number {ec}?", mentions[name]))
+    return out
+
+
+def evaluate(label, retriever, query_set, embeddings, k: int = 5):
+    calls = embeddings.calls
+    recall, start = 0.0, time.perf_counter()
+    for question, relevant in query_set:
+        pages = {d.metadata["page"] for d in retriever.invoke(question)[:k]}
+        recall += len(pages & relevant) / min(k, len(relevant))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<20} {recall / len(query_set):>10.1%} {1000 * elapsed / len(query_set):>11.2f} "
+          f"{embeddings.calls - calls:>11}")
+
+
+def main():
+    pages, enzymes, mentions = corpus()
+    query_set = queries(enzymes, mentions)
+    with tempfile.TemporaryDirectory() as tmp:
+        persist = os.path.join(tmp, "chroma")
+        embeddings = TopicEmbeddings()
+        vectorstore = make_vectorstore(embeddings, persist, "bench")
+        lexical = default_lexical(persist)
+        docs = [Document(page_content=text, metadata={"page": i}) for i, text in enumerate(pages)]
+        start = time.perf_counter()
+        report = ingest_documents(vectorstore, "enzymes", docs, manifests=default_manifests(persist), lexical=lexical)
+        print(f"{len(pages)} pages, {report['chunks']} chunks ingested with the BM25 index in "
+              f"{time.perf_counter() - start:.2f}s; {len(query_set)} queries\n")
+
+        mmr_only = MMRRetriever(vectorstore=vectorstore, k=5, fetch_k=100)
+        bm25 = Bm25Retriever(index=lexical, vectorstore=vectorstore, k=10)
+        hybrid = HybridRetriever(dense=MMRRetriever(vectorstore=vectorstore, k=10, fetch_k=100), lexical=bm25, k=5)
+
+        print(f"{'path':<20} {'recall@5':>10} {'ms/query':>11} {'embeddings':>11}")
+        evaluate("MMR only (current)", mmr_only, query_set, embeddings)
+        evaluate("BM25 only", bm25, query_set, embeddings)
+        evaluate("hybrid (RRF)", hybrid, query_set, embeddings)
+        weighted = HybridRetriever(dense=hybrid.dense, lexical=bm25, k=5, weights=(1.0, 2.0))
+        evaluate("hybrid (RRF, 1:2)", weighted, query_set, embeddings)
+
+
+if __name__ == "__main__":
+    main()
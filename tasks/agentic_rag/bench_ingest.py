@@ -0,0 +1,100 @@
+# bench_ingest.py
+#
+# Embedding calls and wall time for ingesting a synthetic 1,000-page book into
+# a persistent Chroma collection, then re-ingesting it unchanged, touched
+# (new mtime, same bytes), and with three pages edited and one removed.
+# Embeddings are deterministic fakes that count the texts they embed.
+#
+# The collection starts with a copy of the book added the way the notebook
+# used to (random IDs, relative source path); the first ingest must replace
+# it, not add a second copy.
+#
+# Usage (from tasks/): python -m agentic_rag.bench_ingest [pages]
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from langchain_core.documents import Document
+
+from agentic_rag.ingest import default_manifests, ingest_file, make_splitter, make_vectorstore
+
+WORDS = ("enzyme substrate protein amino acid membrane lipid kinase glucose "
+         "metabolism pathway receptor nucleotide helix folding catalysis").split()
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    texts_embedded: int = 0
+
+    def embed_documents(self, texts):
+        self.texts_embedded += len(texts)
+        return super().embed_documents(texts)
+
+
+def make_book(pages: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(450)) + f" (page {i})" for i in range(pages)]
+
+
+def write_book(path: str, pages: list):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\f".join(pages))
+
+
+def add_legacy(vectorstore, path: str, pages: list) -> int:
+    """The old notebook cell: add_documents with random IDs, source as given (relative)"""
+    docs = [Document(page_content=text, metadata={"source": os.path.relpath(path), "page": i})
+            for i, text in enumerate(pages)]
+    splits = make_splitter().split_documents(docs)
+    for start in range(0, len(splits), 1000):
+        vectorstore.add_documents(splits[start:start + 1000])
+    return len(splits)
+
+
+def run(label: str, vectorstore, embeddings, path: str, manifests) -> dict:
+    before = embeddings.texts_embedded
+    start = time.perf_counter()
+    report = ingest_file(vectorstore, path, manifests)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<26} {elapsed:>8.2f} {embeddings.texts_embedded - before:>10} "
+          f"{report['added']:>7} {report['deleted']:>8} {vectorstore._collection.count():>8}")
+    return report
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "book.txt")
+        pages = make_book(n)
+        write_book(path, pages)
+
+        embeddings = CountingEmbeddings(size=256)
+        vectorstore = make_vectorstore(embeddings, os.path.join(tmp, "chroma"), "bench")
+        manifests = default_manifests(os.path.join(tmp, "chroma"))
+
+        print(f"{n}-page book\n")
+        print(f"{'run':<26} {'time (s)':>8} {'embedded':>10} {'added':>7} {'deleted':>8} {'rows':>8}")
+        legacy = add_legacy(vectorstore, path, pages)
+        embeddings.texts_embedded = 0
+        print(f"{'legacy rows (random IDs)':<26} {'':>8} {'':>10} {'':>7} {'':>8} {legacy:>8}")
+        report = run("first ingest", vectorstore, embeddings, path, manifests)
+        assert vectorstore._collection.count() == report["chunks"], "legacy chunks were not replaced"
+        run("unchanged", vectorstore, embeddings, path, manifests)
+
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+        run("touched (same bytes)", vectorstore, embeddings, path, manifests)
+
+        edited = make_book(3, seed=99)
+        pages[10], pages[500 % n], pages[-1] = edited
+        del pages[n // 3]
+        write_book(path, pages)
+        run("3 pages edited, 1 removed", vectorstore, embeddings, path, manifests)
+        run("unchanged again", vectorstore, embeddings, path, manifests)
+
+
+if __name__ == "__main__":
+    main()
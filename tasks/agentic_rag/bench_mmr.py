@@ -0,0 +1,66 @@
+# bench_mmr.py
+#
+# Re-ranking time of langchain_chroma's maximal_marginal_relevance (what
+# search_type="mmr" runs) versus mmr() / mmr_batch() at fetch_k = 10, 100
+# and 1000 candidates of 1536 dimensions (text-embedding-3-small), k = 5
+# and 20, plus 32 queries re-ranked one by one versus in one mmr_batch().
+# Candidates are clustered so MMR has near-duplicates to skip. Selections
+# are checked to be identical.
+#
+# Usage (from tasks/): python -m agentic_rag.bench_mmr
+
+import time
+
+import numpy as np
+from langchain_chroma.vectorstores import maximal_marginal_relevance
+
+from agentic_rag.mmr import mmr, mmr_batch
+
+DIMENSIONS = 1536
+QUERIES = 32
+
+
+def candidates(rng, n: int) -> np.ndarray:
+    centers = rng.standard_normal((max(1, n // 10), DIMENSIONS))
+    return (centers[rng.integers(len(centers), size=n)]
+            + 0.3 * rng.standard_normal((n, DIMENSIONS))).astype(np.float32)
+
+
+def per_call(fn, repeat: int) -> float:
+    fn()  # warm-up: the first batched matmul pays one-off BLAS setup
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'fetch_k':>7} {'k':>3} {'langchain (ms)':>15} {'mmr (ms)':>10} {'speedup':>8} {'same':>5}")
+    for fetch_k in [10, 100, 1000]:
+        query = rng.standard_normal(DIMENSIONS).astype(np.float32)
+        cands = candidates(rng, fetch_k)
+        as_list = list(cands)  # Chroma hands over a list of per-row arrays
+        for k in [5, 20]:
+            repeat = 200 if fetch_k < 1000 else 10
+            old = per_call(lambda: maximal_marginal_relevance(query, as_list, k=k), repeat)
+            new = per_call(lambda: mmr(query, cands, k=k), repeat)
+            same = sorted(maximal_marginal_relevance(query, as_list, k=k)) == sorted(mmr(query, cands, k=k))
+            print(f"{fetch_k:>7} {k:>3} {1000 * old:>15.2f} {1000 * new:>10.2f} {old / new:>7.1f}x {str(same):>5}")
+
+    print(f"\n{QUERIES} queries, fetch_k = 200, k = 5")
+    queries = rng.standard_normal((QUERIES, DIMENSIONS)).astype(np.float32)
+    tensor = np.stack([candidates(rng, 200) for _ in range(QUERIES)])
+    loop = per_call(lambda: [maximal_marginal_relevance(q, list(c), k=5) for q, c in zip(queries, tensor)], 10)
+    single = per_call(lambda: [mmr(q, c, k=5) for q, c in zip(queries, tensor)], 10)
+    batched = per_call(lambda: mmr_batch(queries, tensor, k=5), 10)
+    same = all(sorted(a) == sorted(b) for a, b in zip(
+        mmr_batch(queries, tensor, k=5),
+        [maximal_marginal_relevance(q, list(c), k=5) for q, c in zip(queries, tensor)]))
+    print(f"langchain, one by one  {1000 * loop:>8.1f} ms")
+    print(f"mmr, one by one        {1000 * single:>8.1f} ms")
+    print(f"mmr_batch              {1000 * batched:>8.1f} ms   same selections: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# bench_packing.py
+#
+# Context tokens per retrieve_documents call before and after context
+# packing (packing.py), for the notebook's retriever (hybrid MMR + BM25,
+# k=5) and for traditional_rag (k=3 similarity search). The corpus is 80
+# textbook-like pages, each about one enzyme, laid out in ~80-character
+# lines like PyPDF output and split with the ingest splitter (1,000
+# characters, 100 overlap), so a question about an enzyme retrieves
+# neighbouring chunks of its page.
+#
+# Checks that packing loses no text: with an unlimited budget every line of
+# every retrieved chunk is still in the packed context.
+#
+# Usage (from tasks/): python -m agentic_rag.bench_packing
+
+import os
+import random
+import tempfile
+import time
+
+from langchain_core.documents import Document
+
+from agentic_rag.bench_hybrid import PREFIXES, PROCESSES, SUBSTRATES, SUFFIXES, TopicEmbeddings
+from agentic_rag.bench_ingest import WORDS
+from agentic_rag.bm25 import Bm25Retriever, HybridRetriever
+from agentic_rag.embedding_scheduler import estimate_tokens
+from agentic_rag.ingest import default_lexical, default_manifests, ingest_documents, make_vectorstore
+from agentic_rag.mmr import MMRRetriever
+from agentic_rag.packing import TOKEN_BUDGET, format_context, pack_documents
+
+PAGES = 80
+LINES_PER_PAGE = 50
+
+
+def corpus(seed: int = 0) -> tuple:
+    """(pages, enzyme names), page i describes enzyme i"""
+    rng = random.Random(seed)
+    names = rng.sample([p + s for p in PREFIXES for s in SUFFIXES], PAGES)
+    pages = []
+    for i, name in enumerate(names):
+        lines = []
+        for _ in range(LINES_PER_PAGE):
+            words = [rng.choice(WORDS) for _ in range(10)]
+            if rng.random() < 0.3:
+                words[rng.randrange(10)] = f"{name} catalyzes {rng.choice(PROCESSES)} of {rng.choice(SUBSTRATES)}"
+            lines.append(" ".join(words).capitalize() + ".")
+        pages.append(Document(page_content="\n".join(lines), metadata={"page": i}))
+    return pages, names
+
+
+def old_format(docs: list) -> str:
+    """retrieve_documents before packing"""
+    return "\n\n---\n\n".join(f"Document {i+1}:\n{doc.page_content}" for i, doc in enumerate(docs))
+
+
+def measure(label: str, retrieve, names: list):
+    before, after, unlimited, passages, seconds, lost = 0, 0, 0, 0, 0.0, 0
+    for name in names:
+        docs = retrieve(f"Which reaction does {name} catalyze?")
+        start = time.perf_counter()
+        packed = pack_documents(docs)
+        context = format_context(packed)
+        seconds += time.perf_counter() - start
+
+        whole = format_context(pack_documents(docs, token_budget=10 ** 9))
+        lost += sum(line not in whole for doc in docs for line in doc.page_content.splitlines())
+        before += estimate_tokens(old_format(docs))
+        after += estimate_tokens(context)
+        unlimited += estimate_tokens(whole)
+        passages += len(packed)
+
+    n = len(names)
+    print(f"\n{label}")
+    print(f"  tokens per call, unpacked          {before / n:>8.0f}")
+    print(f"  tokens per call, deduplicated      {unlimited / n:>8.0f}  ({unlimited / before - 1:+.0%})")
+    print(f"  tokens per call, packed ({TOKEN_BUDGET} max) {after / n:>8.0f}  ({after / before - 1:+.0%})")
+    print(f"  passages per call                  {passages / n:>8.1f}")
+    print(f"  packing time                       {1000 * seconds / n:>8.3f} ms")
+    print(f"  lines lost by merging              {lost:>8}")
+
+
+def main():
+    pages, names = corpus()
+    with tempfile.TemporaryDirectory() as tmp:
+        persist = os.path.join(tmp, "chroma")
+        vectorstore = make_vectorstore(TopicEmbeddings(), persist, "bench")
+        lexical = default_lexical(persist)
+        report = ingest_documents(vectorstore, "enzymes.pdf", pages, manifests=default_manifests(persist),
+                                  lexical=lexical)
+        print(f"{len(pages)} pages, {report['chunks']} chunks, {len(names)} queries")
+
+        hybrid = HybridRetriever(dense=MMRRetriever(vectorstore=vectorstore, k=10, fetch_k=100),
+                                 lexical=Bm25Retriever(index=lexical, vectorstore=vectorstore, k=10),
+                                 k=5, weights=(1.0, 2.0))
+        measure("retrieve_documents (hybrid, k=5)", hybrid.invoke, names)
+        measure("traditional_rag (similarity, k=3)", lambda q: vectorstore.similarity_search(q, k=3), names)
+
+
+if __name__ == "__main__":
+    main()
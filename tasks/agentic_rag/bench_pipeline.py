@@ -0,0 +1,106 @@
+# bench_pipeline.py
+#
+# Pages/sec and peak RSS for ingesting a generated text PDF the way the
+# notebook did (load every page, split everything, add_documents) versus
+# stream_ingest() (process-pool parsing, bounded embed/write stage). Each
+# mode runs in its own process so peak RSS is not shared. The embedding
+# model is a fake that sleeps like a remote API.
+#
+# Usage (from tasks/): python -m agentic_rag.bench_pipeline [pages] [workers]
+
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from agentic_rag.bench_ingest import WORDS
+from agentic_rag.ingest import default_manifests, ingest_file, make_splitter, make_vectorstore
+from agentic_rag.pipeline import peak_rss_mb, stream_ingest
+
+EMBED_LATENCY = 0.05  # seconds per request
+PER_TEXT = 0.0005  # seconds per text
+
+
+class SlowEmbeddings(DeterministicFakeEmbedding):
+    def embed_documents(self, texts):
+        time.sleep(EMBED_LATENCY + PER_TEXT * len(texts))
+        return super().embed_documents(texts)
+
+
+def make_pdf(path: str, pages: int, lines_per_page: int = 45):
+    """Minimal text-only PDF (Helvetica, one content stream per page)"""
+    rng = random.Random(0)
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for p in range(pages):
+        lines = [" ".join(rng.choice(WORDS) for _ in range(10)) for _ in range(lines_per_page)]
+        lines[-1] += f" page {p}"
+        text = "".join(f"({line}) Tj T* " for line in lines)
+        stream = f"BT /F1 10 Tf 12 TL 40 800 Td {text}ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        content = len(objects)
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def run_mode(mode: str, pdf: str, persist: str, workers: int):
+    embeddings = SlowEmbeddings(size=256)
+    vectorstore = make_vectorstore(embeddings, persist, "bench")
+    start = time.perf_counter()
+    if mode == "notebook":
+        from langchain_community.document_loaders import PyPDFLoader
+        pages = PyPDFLoader(pdf).load()
+        chunks = make_splitter().split_documents(pages)
+        vectorstore.add_documents(chunks)
+        count = len(pages)
+    elif mode == "ingest_file":
+        ingest_file(vectorstore, pdf, default_manifests(persist))
+        from pypdf import PdfReader
+        count = len(PdfReader(pdf).pages)
+    else:
+        count = stream_ingest(vectorstore, pdf, default_manifests(persist), workers=workers)["pages"]
+    elapsed = time.perf_counter() - start
+    rss = peak_rss_mb()
+    print(f"{mode:<14} {elapsed:>8.2f} {count / elapsed:>10.1f} {rss['main']:>10.0f} {rss['workers']:>12.0f}"
+          f" {vectorstore._collection.count():>8}")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--mode":
+        _, _, mode, pdf, persist, workers = sys.argv
+        run_mode(mode, pdf, persist, int(workers))
+        return
+
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 2)
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf = os.path.join(tmp, "book.pdf")
+        make_pdf(pdf, pages)
+        print(f"{pages}-page PDF ({os.path.getsize(pdf) / 1e6:.1f} MB), {workers} workers\n")
+        print(f"{'mode':<14} {'time (s)':>8} {'pages/s':>10} {'RSS (MB)':>10} {'workers (MB)':>12} {'rows':>8}")
+        for mode in ["notebook", "ingest_file", "stream_ingest"]:
+            subprocess.run([sys.executable, "-W", "ignore", "-m", "agentic_rag.bench_pipeline", "--mode", mode,
+                            pdf, os.path.join(tmp, mode), str(workers)], check=True)
+
+
+if __name__ == "__main__":
+    main()
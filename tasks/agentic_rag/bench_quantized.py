@@ -0,0 +1,193 @@
+# bench_quantized.py
+#
+# Memory, build time, queries per second and recall@10 of Chroma (HNSW over
+# float32) versus QuantizedIndex (int8 over a Matryoshka prefix of 128, 256,
+# 512 and all 1536 dimensions, exact re-scoring of the top 100 against
+# float32; for 256, also without re-scoring).
+# Recall is measured against exact brute-force search over the full vectors.
+#
+# By default it runs against the notebook's chroma_db_agentic_rag
+# collection. If that does not exist (or is small), it builds a synthetic
+# collection of 20,000 1536-dimensional vectors whose variance decays over
+# the dimensions like Matryoshka embeddings (clustered, so near neighbours
+# are close). Queries are stored vectors plus noise, so no embedding calls
+# are made either way; with a real collection, truncation recall is that of
+# text-embedding-3-small.
+#
+# Each backend is opened in a fresh process that runs all queries and reports
+# its RSS: "private" is anonymous memory (Chroma's HNSW graph and vectors),
+# "shared" is file-backed page cache (memory-mapped files), which every
+# worker on the host shares. "baseline" is the same process with the
+# libraries imported but no index opened.
+#
+# Usage (from tasks/):
+#   python -m agentic_rag.bench_quantized [--persist-dir DIR] [--collection NAME]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from agentic_rag.ingest import CHROMA_PATH, COLLECTION
+from agentic_rag.quantized_index import QuantizedIndex, normalize
+
+SYNTHETIC_ROWS = 20000
+DIMENSIONS = 1536
+QUERIES = 200
+K = 10
+MIN_ROWS = 1000  # smaller collections are replaced by the synthetic one
+SPREAD = 1.5  # within-cluster noise of the synthetic vectors
+QUERY_NOISE = 0.02
+PREFIXES = [128, 256, 512]
+
+
+def rss() -> dict:
+    """Current process memory in MB, from /proc/self/status"""
+    fields = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name in ("VmRSS", "RssAnon", "RssFile"):
+                fields[name] = int(value.split()[0]) / 1024
+    return {"total": fields.get("VmRSS", 0.0), "private": fields.get("RssAnon", 0.0),
+            "shared": fields.get("RssFile", 0.0)}
+
+
+def child(backend: str, path: str, collection: str, queries_file: str):
+    """Open one backend, run every query, print RSS, seconds and results as JSON"""
+    import chromadb  # imported by every backend, so the baseline includes it
+
+    queries = np.load(queries_file)
+    results, seconds = [], 0.0
+    if backend.startswith("quantized"):
+        index = QuantizedIndex(path)
+        rescore = int(backend.partition(":")[2] or index.rescore)
+        start = time.perf_counter()
+        for q in queries:
+            results.append([row for row, _ in index.search(q, K, rescore=rescore)])
+        seconds = time.perf_counter() - start
+        results = [[cid.id for cid in index.documents(rows)] for rows in results]
+    elif backend == "chroma":
+        store = chromadb.PersistentClient(path=path).get_collection(collection)
+        start = time.perf_counter()
+        for q in queries:
+            results.append(store.query(query_embeddings=[q.tolist()], n_results=K, include=["distances"])["ids"][0])
+        seconds = time.perf_counter() - start
+    print(json.dumps({"rss": rss(), "seconds": seconds, "results": results}))
+
+
+def run_child(backend: str, path: str, collection: str, queries_file: str) -> dict:
+    out = subprocess.run([sys.executable, "-W", "ignore", "-m", "agentic_rag.bench_quantized", "--child", backend,
+                          "--persist-dir", path, "--collection", collection, "--queries", queries_file],
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def synthetic(rng, rows: int) -> np.ndarray:
+    decay = (1 + np.arange(DIMENSIONS) / 32) ** -0.5
+    centers = rng.standard_normal((rows // 20, DIMENSIONS))
+    vectors = centers[rng.integers(len(centers), size=rows)] + SPREAD * rng.standard_normal((rows, DIMENSIONS))
+    return normalize((vectors * decay).astype(np.float32))
+
+
+def load_collection(path: str, name: str):
+    """(collection, ids, float32 vectors) or None"""
+    import chromadb
+
+    if not os.path.isdir(path):
+        return None
+    try:
+        collection = chromadb.PersistentClient(path=path).get_collection(name)
+    except Exception:
+        return None
+    ids, vectors = [], []
+    for offset in range(0, collection.count(), 1000):
+        rows = collection.get(include=["embeddings"], limit=1000, offset=offset)
+        ids.extend(rows["ids"])
+        vectors.extend(rows["embeddings"])
+    return collection, ids, np.asarray(vectors, dtype=np.float32)
+
+
+def dir_mb(path: str) -> float:
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files) / 2 ** 20
+
+
+def recall(results: list, truth: list) -> float:
+    return float(np.mean([len(set(r) & set(t)) / K for r, t in zip(results, truth)]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--persist-dir", default=CHROMA_PATH)
+    parser.add_argument("--collection", default=COLLECTION)
+    parser.add_argument("--child")
+    parser.add_argument("--queries")
+    args = parser.parse_args(argv)
+    if args.child:
+        return child(args.child, args.persist_dir, args.collection, args.queries)
+
+    import chromadb
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        loaded = load_collection(args.persist_dir, args.collection)
+        if loaded is not None and len(loaded[1]) >= MIN_ROWS:
+            collection, ids, vectors = loaded
+            chroma_path, name = args.persist_dir, args.collection
+            print(f"{args.collection}: {len(ids)} chunks, {vectors.shape[1]} dimensions")
+        else:
+            chroma_path, name = os.path.join(tmp, "chroma"), "bench"
+            vectors = synthetic(rng, SYNTHETIC_ROWS)
+            ids = [f"chunk-{i}" for i in range(len(vectors))]
+            collection = chromadb.PersistentClient(path=chroma_path).create_collection(
+                name, metadata={"hnsw:space": "cosine"})
+            start = time.perf_counter()
+            for s in range(0, len(ids), 5000):
+                collection.add(ids=ids[s:s + 5000], embeddings=vectors[s:s + 5000],
+                               documents=[f"text {i}" for i in range(s, min(s + 5000, len(ids)))])
+            print(f"synthetic collection: {len(ids)} chunks, {DIMENSIONS} dimensions "
+                  f"(Chroma build {time.perf_counter() - start:.1f}s)")
+
+        picks = rng.choice(len(vectors), QUERIES, replace=False)
+        queries = normalize(vectors[picks] + QUERY_NOISE * rng.standard_normal((QUERIES, vectors.shape[1]))).astype(np.float32)
+        queries_file = os.path.join(tmp, "queries.npy")
+        np.save(queries_file, queries)
+        full = normalize(vectors)
+        truth = [[ids[i] for i in np.argsort(-(full @ q))[:K]] for q in queries]
+
+        class Store:  # just enough of a LangChain vectorstore for QuantizedIndex.rebuild
+            _collection = collection
+
+        rows = [("baseline", run_child("none", chroma_path, name, queries_file), None, None)]
+        rows.append(("chroma (HNSW, float32)", run_child("chroma", chroma_path, name, queries_file), None,
+                     dir_mb(chroma_path)))
+        for dims in PREFIXES + [vectors.shape[1]]:
+            path = os.path.join(tmp, f"quantized-{dims}")
+            start = time.perf_counter()
+            QuantizedIndex(path, dimensions=dims).rebuild(Store)
+            build = time.perf_counter() - start
+            rows.append((f"int8 {dims}d + rescore", run_child("quantized", path, name, queries_file), build,
+                         dir_mb(path)))
+            if dims == 256:
+                rows.append((f"int8 {dims}d, no rescore", run_child("quantized:1", path, name, queries_file),
+                             None, None))
+
+    print(f"\n{'backend':<24} {'private MB':>10} {'shared MB':>10} {'disk MB':>8} {'build s':>8} "
+          f"{'QPS':>7} {'recall@10':>9}")
+    for label, result, build, disk in rows:
+        qps = QUERIES / result["seconds"] if result["seconds"] else 0.0
+        line = f"{label:<24} {result['rss']['private']:>10.0f} {result['rss']['shared']:>10.0f} "
+        line += f"{disk:>8.0f} " if disk is not None else f"{'':>8} "
+        line += f"{build:>8.1f} " if build is not None else f"{'':>8} "
+        if label != "baseline":
+            line += f"{qps:>7.0f} {recall(result['results'], truth):>9.3f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
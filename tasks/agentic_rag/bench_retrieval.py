@@ -0,0 +1,85 @@
+# bench_retrieval.py
+#
+# Latency of retrieve_documents for an agent-like workload: 20 questions,
+# each asked 10 times with small variations (case, spacing, trailing
+# punctuation), against a 300-page collection. Compared: the notebook's tool
+# (new MMR retriever per call) and CachedRetriever. Query embeddings sleep
+# like a remote API. Then pages are edited and re-ingested: the index version
+# changes and the next lookups are fresh searches.
+#
+# Usage (from tasks/): python -m agentic_rag.bench_retrieval
+
+import os
+import random
+import tempfile
+import time
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from agentic_rag.bench_ingest import WORDS, make_book, write_book
+from agentic_rag.ingest import default_manifests, ingest_file, make_vectorstore
+from agentic_rag.retrieval import CachedRetriever, format_documents, normalize_query
+
+QUERY_LATENCY = 0.1  # seconds per query embedding
+
+
+class SlowQueryEmbeddings(DeterministicFakeEmbedding):
+    def embed_query(self, text):
+        time.sleep(QUERY_LATENCY)
+        return super().embed_query(text)
+
+
+def workload(seed: int = 0) -> list:
+    rng = random.Random(seed)
+    questions = [f"What is the role of {rng.choice(WORDS)} in {rng.choice(WORDS)} {rng.choice(WORDS)}"
+                 for _ in range(20)]
+    variants = [str.lower, str.capitalize, lambda q: q + "?", lambda q: "  " + q.replace(" ", "  ") + " ?"]
+    queries = [rng.choice(variants)(q) for q in questions for _ in range(10)]
+    rng.shuffle(queries)
+    return queries
+
+
+def per_call_retriever(vectorstore, query: str) -> str:
+    retriever = vectorstore.as_retriever(search_type="mmr", search_kwargs={"k": 5, "fetch_k": 10})
+    return format_documents(retriever.invoke(query))
+
+
+def timed(fn, queries):
+    start = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return time.perf_counter() - start
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        book = os.path.join(tmp, "book.txt")
+        pages = make_book(300)
+        write_book(book, pages)
+        persist = os.path.join(tmp, "chroma")
+        vectorstore = make_vectorstore(SlowQueryEmbeddings(size=256), persist, "bench")
+        manifests = default_manifests(persist)
+        ingest_file(vectorstore, book, manifests)
+
+        queries = workload()
+        print(f"{len(queries)} lookups, {len(set(map(normalize_query, queries)))} distinct questions\n")
+
+        baseline = timed(lambda q: per_call_retriever(vectorstore, q), queries)
+        print(f"{'per-call retriever':<22} {baseline:>8.2f}s {1000 * baseline / len(queries):>8.1f} ms/lookup")
+
+        cached = CachedRetriever(vectorstore, manifests)
+        elapsed = timed(lambda q: format_documents(cached.invoke(q)), queries)
+        print(f"{'CachedRetriever':<22} {elapsed:>8.2f}s {1000 * elapsed / len(queries):>8.1f} ms/lookup")
+        print(f"{'':<22} {cached.stats()}")
+
+        pages[3] = make_book(1, seed=7)[0]
+        write_book(book, pages)
+        before = manifests.version()
+        report = ingest_file(vectorstore, book, manifests)
+        print(f"\nre-ingest (+{report['added']} -{report['deleted']}): version {before[:8]} -> {manifests.version()[:8]}")
+        elapsed = timed(lambda q: cached.invoke(q), queries[:20])
+        print(f"20 lookups after re-ingest: {elapsed:.2f}s  {cached.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+# bench_router.py
+#
+# LLM calls per turn and end-to-end latency for the notebook's test_queries
+# through the Section 6 graph (START -> assistant -> tools -> assistant) and
+# through the same graph with QueryRouter in front of the assistant.
+#
+# The chat model is a fake that sleeps LLM_LATENCY per call and, like
+# gpt-4o-mini with the notebook's system prompt, calls retrieve_documents
+# for content questions and answers small talk and arithmetic directly. The
+# embedding model is a bag-of-words stand-in, so the router threshold here
+# (0.25) is not the text-embedding-3-small default.
+#
+# Usage (from tasks/): python -m agentic_rag.bench_router
+
+import hashlib
+import os
+import re
+import tempfile
+import time
+from typing import ClassVar, Literal
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, MessagesState, StateGraph
+from langgraph.prebuilt import ToolNode
+
+from agentic_rag.bm25 import tokenize
+from agentic_rag.ingest import default_manifests, ingest_documents, make_vectorstore
+from agentic_rag.retrieval import CachedRetriever, make_retrieval_tool
+from agentic_rag.router import QueryRouter, RoutedState
+
+LLM_LATENCY = 0.8  # seconds per chat completion
+THRESHOLD = 0.25
+
+TEST_QUERIES = [  # the notebook's comparison set
+    "Hello!",
+    "What is 2+2?",
+    "What is biosynthesis?",
+    "Explain amino acid metabolism",
+]
+
+NOT_CHAT = [  # content questions the chat heuristics must leave alone
+    "What is 2.7.1.1?",
+    "what is 3.1.1.1",
+    "2.7.1.1",
+    "Thanks for the help, now what is hexokinase?",
+]
+
+PASSAGES = [
+    "Biosynthesis is the multi-step, enzyme-catalyzed process in which substrates are converted into "
+    "more complex products in living organisms.",
+    "In biosynthesis simple compounds are modified, converted into other compounds or joined together "
+    "to form macromolecules such as proteins and nucleic acids.",
+    "Amino acid metabolism covers the synthesis and degradation of amino acids, including transamination "
+    "and the urea cycle that removes excess nitrogen.",
+    "The carbon skeletons from amino acid degradation enter glycolysis or the citric acid cycle.",
+    "Glycolysis converts glucose into pyruvate and yields ATP and NADH.",
+    "Enzymes lower the activation energy of reactions; kinases transfer phosphate groups from ATP.",
+    "Lipid metabolism includes fatty acid oxidation in mitochondria and membrane lipid synthesis.",
+    "Nucleotide metabolism provides purines and pyrimidines for DNA and RNA synthesis.",
+]
+
+
+STOPWORDS = set("a an and are by do does for from in into is it of on or the to what which with".split())
+
+
+class WordEmbeddings(Embeddings):
+    """Bag of content words with fixed random word vectors"""
+
+    def _vector(self, text):
+        v = np.zeros(256)
+        for token in tokenize(text):
+            if token in STOPWORDS:
+                continue
+            seed = int.from_bytes(hashlib.sha1(token.encode()).digest()[:4], "little")
+            v += np.random.default_rng(seed).standard_normal(256)
+        return (v / (np.linalg.norm(v) or 1)).tolist()
+
+    def embed_documents(self, texts):
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+class FakeChatModel(BaseChatModel):
+    calls: ClassVar[int] = 0  # shared with the copies bind_tools returns
+    tools_bound: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-tool-calling"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.model_copy(update={"tools_bound": True})
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(LLM_LATENCY)
+        FakeChatModel.calls += 1
+        last = messages[-1]
+        wants_docs = isinstance(last, HumanMessage) and re.search(r"[a-z]{6,}", last.content.lower())
+        if self.tools_bound and wants_docs:
+            message = AIMessage(content="", tool_calls=[{"name": "retrieve_documents",
+                                                         "args": {"query": last.content},
+                                                         "id": f"call_{FakeChatModel.calls}"}])
+        elif isinstance(last, ToolMessage):
+            message = AIMessage(content="Answer based on Document 1 ...")
+        else:
+            message = AIMessage(content="Direct answer.")
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def build_agent(llm, tools, system_prompt, router=None):
+    """The notebook's Section 6 graph; with a router, the routed variant"""
+    llm_with_tools = llm.bind_tools(tools)
+
+    def assistant(state):
+        return {"messages": [llm_with_tools.invoke([system_prompt] + state["messages"])]}
+
+    def should_continue(state) -> Literal["tools", "__end__"]:
+        return "tools" if state["messages"][-1].tool_calls else "__end__"
+
+    builder = StateGraph(RoutedState if router else MessagesState)
+    builder.add_node("assistant", assistant)
+    builder.add_node("tools", ToolNode(tools))
+    if router:
+        builder.add_node("router", router)
+        builder.add_edge(START, "router")
+        builder.add_edge("router", "assistant")
+    else:
+        builder.add_edge(START, "assistant")
+    builder.add_conditional_edges("assistant", should_continue, {"tools": "tools", "__end__": END})
+    builder.add_edge("tools", "assistant")
+    return builder.compile(checkpointer=MemorySaver())
+
+
+def run(label, agent):
+    print(f"\n{label}")
+    print(f"{'query':<34} {'LLM calls':>9} {'latency (s)':>12} {'retrieved':>10}")
+    total_calls, total_time, seen = 0, 0.0, 0
+    for query in TEST_QUERIES:
+        before, start = FakeChatModel.calls, time.perf_counter()
+        result = agent.invoke({"messages": [HumanMessage(content=query)]},
+                              config={"configurable": {"thread_id": "comparison_test"}})
+        elapsed, n = time.perf_counter() - start, FakeChatModel.calls - before
+        retrieved = any(isinstance(m, ToolMessage) for m in result["messages"][seen:])
+        seen = len(result["messages"])
+        total_calls, total_time = total_calls + n, total_time + elapsed
+        print(f"{query:<34} {n:>9} {elapsed:>12.2f} {str(retrieved):>10}")
+    print(f"{'mean per turn':<34} {total_calls / len(TEST_QUERIES):>9.2f} {total_time / len(TEST_QUERIES):>12.2f}")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        persist = os.path.join(tmp, "chroma")
+        vectorstore = make_vectorstore(WordEmbeddings(), persist, "bench")
+        manifests = default_manifests(persist)
+        ingest_documents(vectorstore, "passages", [Document(page_content=p, metadata={"page": i})
+                                                   for i, p in enumerate(PASSAGES)], manifests=manifests)
+        retrieve_documents = make_retrieval_tool(CachedRetriever(vectorstore, manifests))
+        system_prompt = SystemMessage(content="You are a helpful assistant with a document retrieval tool.")
+
+        llm = FakeChatModel()
+        run("assistant decides (notebook graph)", build_agent(llm, [retrieve_documents], system_prompt))
+
+        router = QueryRouter(vectorstore, retrieve_documents, threshold=THRESHOLD)
+        for query in TEST_QUERIES:
+            print(f"  route {query!r}: {router.classify(query)}")
+        for query in NOT_CHAT:
+            route = router.classify(query)
+            assert route.kind != "chat", f"{query!r} routed as chat"
+            print(f"  route {query!r}: {route.kind}")
+        run("router in front of the assistant",
+            build_agent(llm, [retrieve_documents], system_prompt, router=router))
+        print(f"\nrouter: {router.stats()}")
+
+
+if __name__ == "__main__":
+    main()
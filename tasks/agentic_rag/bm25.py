@@ -0,0 +1,201 @@
+"""
+Local BM25 index and hybrid (lexical + vector) retrieval.
+
+retrieve_documents was purely dense. Biochemistry questions that hinge on an
+exact term (an enzyme name, "stereospecific", an EC number such as
+EC 2.7.1.1) often missed, and the agent looped back for more tool calls.
+
+- Bm25Index is an inverted index in SQLite inside the Chroma persist
+  directory (postings per term, document lengths). Ingestion keeps it in
+  step with the collection: pass it as `lexical` to ingest_file,
+  ingest_documents, stream_ingest and prune_missing. sync() rebuilds it
+  from Chroma when the two have drifted (e.g. a collection ingested before
+  the index existed).
+- Tokens are case-folded words; dotted and hyphenated terms ("2.7.1.1",
+  "beta-galactosidase") are kept whole, plus their non-numeric parts.
+- Bm25Retriever scores with Okapi BM25 and loads texts from Chroma by ID:
+  no embedding call.
+- HybridRetriever runs a dense retriever and Bm25Retriever and merges the
+  two rankings with reciprocal rank fusion (score = sum of weight /
+  (rrf_k + rank)); raise the lexical weight when exact terms matter most.
+"""
+
+import heapq
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+from pydantic import ConfigDict
+
+BM25_FILENAME = "bm25.sqlite"
+K1 = 1.5
+B = 0.75
+RRF_K = 60
+LOOKUP_BATCH = 500  # IDs / terms per statement, under SQLite's variable limit
+
+_TOKEN = re.compile(r"\w+(?:[.\-/]\w+)*")
+_PARTS = re.compile(r"[.\-/]")
+
+
+def tokenize(text: str) -> list:
+    tokens = []
+    for match in _TOKEN.finditer(text.casefold()):
+        token = match.group()
+        tokens.append(token)
+        if _PARTS.search(token):
+            tokens.extend(part for part in _PARTS.split(token) if not part.isdigit())
+    return tokens
+
+
+def _chunks(items: list, size: int = LOOKUP_BATCH):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class Bm25Index:
+    def __init__(self, path: str, k1: float = K1, b: float = B):
+        self.k1, self.b = k1, b
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS docs (chunk_id TEXT PRIMARY KEY, length INTEGER NOT NULL)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS postings ("
+            " term TEXT NOT NULL, chunk_id TEXT NOT NULL, tf INTEGER NOT NULL,"
+            " PRIMARY KEY (term, chunk_id)) WITHOUT ROWID"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS postings_chunk ON postings (chunk_id)")
+        self.conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def add(self, ids: list, texts: list):
+        """Index chunks not indexed yet"""
+        with self._lock:
+            present = set()
+            for batch in _chunks(ids):
+                present.update(row[0] for row in self.conn.execute(
+                    f"SELECT chunk_id FROM docs WHERE chunk_id IN ({','.join('?' * len(batch))})", batch))
+            docs, postings = [], []
+            for cid, text in zip(ids, texts):
+                if cid in present:
+                    continue
+                present.add(cid)
+                tokens = Counter(tokenize(text))
+                docs.append((cid, sum(tokens.values())))
+                postings.extend((term, cid, tf) for term, tf in tokens.items())
+            self.conn.executemany("INSERT INTO docs (chunk_id, length) VALUES (?, ?)", docs)
+            self.conn.executemany("INSERT INTO postings (term, chunk_id, tf) VALUES (?, ?, ?)", postings)
+            self.conn.commit()
+
+    def delete(self, ids: list):
+        with self._lock:
+            for batch in _chunks(ids):
+                marks = ",".join("?" * len(batch))
+                self.conn.execute(f"DELETE FROM postings WHERE chunk_id IN ({marks})", batch)
+                self.conn.execute(f"DELETE FROM docs WHERE chunk_id IN ({marks})", batch)
+            self.conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self.conn.execute("DELETE FROM postings")
+            self.conn.execute("DELETE FROM docs")
+            self.conn.commit()
+
+    def rebuild(self, vectorstore, batch_size: int = 1000):
+        """Re-index every chunk in the Chroma collection (no embedding calls)"""
+        self.clear()
+        collection = vectorstore._collection
+        for offset in range(0, collection.count(), batch_size):
+            rows = collection.get(include=["documents"], limit=batch_size, offset=offset)
+            self.add(rows["ids"], rows["documents"])
+
+    def sync(self, vectorstore) -> bool:
+        """Rebuild if the index and the collection disagree on the number of chunks"""
+        if self.count() == vectorstore._collection.count():
+            return False
+        self.rebuild(vectorstore)
+        return True
+
+    def search(self, query: str, k: int = 10) -> list:
+        """[(chunk_id, score)], best first"""
+        terms = list(set(tokenize(query)))
+        if not terms:
+            return []
+        with self._lock:
+            n, total = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM docs").fetchone()
+            if not n:
+                return []
+            df, postings = {}, []
+            for batch in _chunks(terms):
+                marks = ",".join("?" * len(batch))
+                df.update(self.conn.execute(
+                    f"SELECT term, COUNT(*) FROM postings WHERE term IN ({marks}) GROUP BY term", batch))
+                postings.extend(self.conn.execute(
+                    f"SELECT p.term, p.chunk_id, p.tf, d.length FROM postings p"
+                    f" JOIN docs d ON d.chunk_id = p.chunk_id WHERE p.term IN ({marks})", batch))
+
+        avgdl = total / n
+        idf = {t: math.log(1 + (n - f + 0.5) / (f + 0.5)) for t, f in df.items()}
+        scores = Counter()
+        for term, cid, tf, length in postings:
+            scores[cid] += idf[term] * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / avgdl))
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+
+def load_documents(vectorstore, ids: list) -> list:
+    """Documents for chunk IDs from Chroma, in the order of ids"""
+    if not ids:
+        return []
+    rows = vectorstore._collection.get(ids=list(ids), include=["documents", "metadatas"])
+    by_id = {cid: Document(page_content=text, metadata=meta or {}, id=cid)
+             for cid, text, meta in zip(rows["ids"], rows["documents"], rows["metadatas"])}
+    return [by_id[cid] for cid in ids if cid in by_id]
+
+
+def reciprocal_rank_fusion(rankings: list, k: int = RRF_K, weights: list = None) -> list:
+    """Documents from several best-first rankings, ordered by summed weight / (k + rank)"""
+    scores, docs = Counter(), {}
+    for ranking, weight in zip(rankings, weights or [1.0] * len(rankings)):
+        for rank, doc in enumerate(ranking, start=1):
+            key = doc.id or doc.page_content
+            scores[key] += weight / (k + rank)
+            docs.setdefault(key, doc)
+    return [docs[key] for key, _ in scores.most_common()]
+
+
+class Bm25Retriever(BaseRetriever):
+    """BM25 over the local index; texts come from Chroma, no embeddings"""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    index: Bm25Index
+    vectorstore: VectorStore
+    k: int = 10
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list:
+        return load_documents(self.vectorstore, [cid for cid, _ in self.index.search(query, self.k)])
+
+
+class HybridRetriever(BaseRetriever):
+    """Dense and BM25 rankings merged with reciprocal rank fusion"""
+
+    dense: BaseRetriever
+    lexical: Bm25Retriever
+    k: int = 5
+    rrf_k: int = RRF_K
+    weights: tuple = (1.0, 1.0)  # dense, lexical
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list:
+        dense = self.dense.invoke(query, config={"callbacks": run_manager.get_child("dense")})
+        lexical = self.lexical.invoke(query, config={"callbacks": run_manager.get_child("lexical")})
+        return reciprocal_rank_fusion([dense, lexical], self.rrf_k, self.weights)[:self.k]
@@ -0,0 +1,152 @@
+"""
+Persistent embedding cache keyed by (model, text hash).
+
+OpenAIEmbeddings is called for every chunk and every query, so re-indexing,
+rebuilding the collection or repeating a question pays full latency and cost
+again. CachedEmbeddings wraps any Embeddings object and is passed to Chroma
+(and so to retrieve_documents) in its place:
+
+- vectors are stored as float32 blobs in SQLite (WAL), keyed by the model
+  name and the SHA-256 of the text, so a different model never reuses them;
+  query vectors are kept apart from document vectors
+- embed_documents looks a whole batch up in one query per 500 texts and
+  embeds only the misses, in one call to the wrapped model
+- embed_query checks an in-memory LRU first, then SQLite
+- stats() reports hits, misses and the hit rate for documents and queries
+"""
+
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+LOOKUP_BATCH = 500  # keys per SELECT, well under SQLite's variable limit
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    def __init__(self, embeddings: Embeddings, path: str, model: str = None, query_cache_size: int = 1024):
+        self.embeddings = embeddings
+        self.model = model or getattr(embeddings, "model", None) or type(embeddings).__name__
+        self.query_model = f"{self.model}#query"  # models may embed queries differently
+        self.query_cache_size = query_cache_size
+        self._queries = OrderedDict()  # text -> vector, most recent last
+        self._lock = threading.Lock()
+        self.counts = {"document_hits": 0, "document_misses": 0, "query_hits": 0, "query_misses": 0}
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL, key TEXT NOT NULL, vector BLOB NOT NULL,"
+            " PRIMARY KEY (model, key))"
+        )
+        self.conn.commit()
+
+    def _lookup(self, model: str, keys: list) -> dict:
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            for start in range(0, len(unique), LOOKUP_BATCH):
+                batch = unique[start:start + LOOKUP_BATCH]
+                rows = self.conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE model = ? AND key IN ({','.join('?' * len(batch))})",
+                    [model, *batch]
+                )
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+    def _store(self, model: str, keys: list, vectors: list):
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, key, vector) VALUES (?, ?, ?)",
+                [(model, key, np.asarray(v, dtype=np.float32).tobytes()) for key, v in zip(keys, vectors)]
+            )
+            self.conn.commit()
+
+    def _split(self, texts: list) -> tuple:
+        keys = [text_key(t) for t in texts]
+        found = self._lookup(self.model, keys)
+        missing = {}  # key -> text, first occurrence only
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+        hits = sum(1 for k in keys if k in found)
+        with self._lock:
+            self.counts["document_hits"] += hits
+            self.counts["document_misses"] += len(keys) - hits
+        return keys, found, list(missing), list(missing.values())
+
+    def embed_documents(self, texts: list) -> list:
+        keys, found, missing, missing_texts = self._split(texts)
+        if missing:
+            vectors = self.embeddings.embed_documents(missing_texts)
+            self._store(self.model, missing, vectors)
+            found.update(zip(missing, vectors))
+        return [list(found[k]) for k in keys]
+
+    async def aembed_documents(self, texts: list) -> list:
+        keys, found, missing, missing_texts = await asyncio.to_thread(self._split, texts)
+        if missing:
+            vectors = await self.embeddings.aembed_documents(missing_texts)
+            await asyncio.to_thread(self._store, self.model, missing, vectors)
+            found.update(zip(missing, vectors))
+        return [list(found[k]) for k in keys]
+
+    def _cached_query(self, text: str):
+        with self._lock:
+            vector = self._queries.get(text)
+            if vector is not None:
+                self._queries.move_to_end(text)
+                self.counts["query_hits"] += 1
+                return vector
+        key = text_key(text)
+        vector = self._lookup(self.query_model, [key]).get(key)
+        with self._lock:
+            self.counts["query_hits" if vector is not None else "query_misses"] += 1
+        if vector is not None:
+            self._remember(text, vector)
+        return vector
+
+    def _remember(self, text: str, vector: list):
+        with self._lock:
+            self._queries[text] = vector
+            self._queries.move_to_end(text)
+            while len(self._queries) > self.query_cache_size:
+                self._queries.popitem(last=False)
+
+    def embed_query(self, text: str) -> list:
+        vector = self._cached_query(text)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self._store(self.query_model, [text_key(text)], [vector])
+            self._remember(text, vector)
+        return list(vector)
+
+    async def aembed_query(self, text: str) -> list:
+        vector = await asyncio.to_thread(self._cached_query, text)
+        if vector is None:
+            vector = await self.embeddings.aembed_query(text)
+            await asyncio.to_thread(self._store, self.query_model, [text_key(text)], [vector])
+            self._remember(text, vector)
+        return list(vector)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+        documents = counts["document_hits"] + counts["document_misses"]
+        queries = counts["query_hits"] + counts["query_misses"]
+        return {
+            **counts,
+            "document_hit_rate": counts["document_hits"] / documents if documents else 0.0,
+            "query_hit_rate": counts["query_hits"] / queries if queries else 0.0,
+        }
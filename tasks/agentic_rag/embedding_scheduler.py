@@ -0,0 +1,222 @@
+"""
+Token-budgeted, rate-limit-aware embedding scheduler.
+
+Chroma's add_documents hands all texts of a call to embed_documents, and
+OpenAIEmbeddings sends them one request after another, up to 1000 inputs
+each, retrying a 429 with the client's own fixed backoff. A large ingest
+therefore either crawls (one request in flight) or, run in parallel, gets
+throttled. EmbeddingScheduler wraps the embeddings and controls the traffic:
+
+- texts are packed, in order, into batches of at most max_batch_tokens
+  (estimated) tokens and max_batch_size inputs
+- batches run on a thread pool with an adaptive concurrency limit (AIMD):
+  +1 after `limit` successful requests, up to max_concurrency; halved on a
+  429, after which every worker waits out Retry-After (or an exponential
+  backoff with jitter) before sending again
+- 5xx, timeouts and connection errors are retried with backoff; other
+  errors are raised at once
+- wrapped around CachedEmbeddings, each batch is stored as soon as it
+  returns; an interrupted ingest therefore resumes without re-embedding
+  finished batches (and ingest skips chunks Chroma already holds)
+
+Turn the wrapped client's own retries off (OpenAIEmbeddings(max_retries=0))
+so 429s reach the scheduler.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+from langchain_core.embeddings import Embeddings
+
+MAX_BATCH_TOKENS = 8000
+MAX_BATCH_SIZE = 256  # inputs per request
+CONCURRENCY = 4  # initial requests in flight
+MAX_CONCURRENCY = 16
+MAX_RETRIES = 8
+BACKOFF = 0.5  # seconds, doubled per attempt
+MAX_BACKOFF = 30.0
+
+RETRY_STATUSES = {408, 409, 500, 502, 503, 504}
+# openai / httpx / requests exceptions without a status, matched by name so
+# none of them has to be imported
+RETRY_ERRORS = {"APIConnectionError", "APITimeoutError", "ConnectError", "ConnectTimeout",
+                "ReadTimeout", "RemoteProtocolError", "ConnectionError", "Timeout"}
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1  # ~4 characters per token for English text
+
+
+def token_batches(texts: list, max_tokens: int = MAX_BATCH_TOKENS, max_size: int = MAX_BATCH_SIZE,
+                  count_tokens=estimate_tokens) -> list:
+    """(start, stop) ranges of consecutive texts within both budgets"""
+    ranges, start, tokens = [], 0, 0
+    for i, text in enumerate(texts):
+        n = count_tokens(text)
+        if i > start and (tokens + n > max_tokens or i - start >= max_size):
+            ranges.append((start, i))
+            start, tokens = i, 0
+        tokens += n
+    if start < len(texts):
+        ranges.append((start, len(texts)))
+    return ranges
+
+
+def status_code(exc):
+    for obj in (exc, getattr(exc, "response", None)):
+        code = getattr(obj, "status_code", None)
+        if isinstance(code, int):
+            return code
+    return None
+
+
+def retry_after(exc):
+    """Seconds from Retry-After(-ms) on the error's response, if any"""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        try:
+            return float(headers.get(name)) * scale
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def backoff(attempt: int) -> float:
+    return min(MAX_BACKOFF, BACKOFF * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit with a shared pause after rate limiting"""
+
+    def __init__(self, initial: int, minimum: int = 1, maximum: int = MAX_CONCURRENCY):
+        self.minimum, self.maximum = minimum, maximum
+        self.limit = max(minimum, min(initial, maximum))
+        self.active = 0
+        self.successes = 0
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> float:
+        """Wait for a slot; returns the start time to pass to throttle()"""
+        with self._cond:
+            while True:
+                wait = self.paused_until - time.monotonic()
+                if wait <= 0 and self.active < self.limit:
+                    self.active += 1
+                    return time.monotonic()
+                self._cond.wait(wait if wait > 0 else None)
+
+    def release(self, ok: bool = True):
+        with self._cond:
+            self.active -= 1
+            if ok:
+                self.successes += 1
+                if self.successes >= self.limit and self.limit < self.maximum:
+                    self.limit += 1
+                    self.successes = 0
+            self._cond.notify_all()
+
+    def throttle(self, delay: float, started: float):
+        """A request that started at `started` was rate limited"""
+        with self._cond:
+            now = time.monotonic()
+            # 429s from requests sent before the last decrease belong to the
+            # same burst; halving again for each would collapse the limit
+            if started >= self.last_decrease:
+                self.limit = max(self.minimum, self.limit // 2)
+                self.successes = 0
+                self.last_decrease = now
+            self.paused_until = max(self.paused_until, now + delay)
+            self._cond.notify_all()
+
+
+class EmbeddingScheduler(Embeddings):
+    def __init__(self, embeddings: Embeddings, max_batch_tokens: int = MAX_BATCH_TOKENS,
+                 max_batch_size: int = MAX_BATCH_SIZE, concurrency: int = CONCURRENCY,
+                 max_concurrency: int = MAX_CONCURRENCY, max_retries: int = MAX_RETRIES,
+                 count_tokens=estimate_tokens):
+        self.embeddings = embeddings
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+        self.count_tokens = count_tokens
+        max_concurrency = max(concurrency, max_concurrency)
+        self.limiter = AdaptiveLimiter(concurrency, 1, max_concurrency)
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="embed")
+        self._lock = threading.Lock()
+        self.counts = {"requests": 0, "batches": 0, "rate_limited": 0, "retries": 0}
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self.counts[key] += n
+
+    def _call(self, fn, *args, abort: threading.Event = None):
+        """fn(*args) under the concurrency limit, retrying 429s and transient errors"""
+        for attempt in range(self.max_retries + 1):
+            started = self.limiter.acquire()
+            if abort is not None and abort.is_set():
+                self.limiter.release(ok=False)
+                raise CancelledError()  # another batch of the same call failed
+            self._count("requests")
+            try:
+                result = fn(*args)
+            except Exception as e:
+                self.limiter.release(ok=False)
+                code = status_code(e)
+                transient = code in RETRY_STATUSES or (code is None and type(e).__name__ in RETRY_ERRORS)
+                if attempt == self.max_retries or not (code == 429 or transient):
+                    raise
+                self._count("retries")
+                delay = retry_after(e)
+                delay = delay * random.uniform(1.0, 1.2) if delay is not None else backoff(attempt)
+                if code == 429:
+                    self._count("rate_limited")
+                    self.limiter.throttle(delay, started)
+                else:
+                    time.sleep(delay)
+                continue
+            self.limiter.release(ok=True)
+            return result
+
+    def embed_documents(self, texts: list) -> list:
+        if not texts:
+            return []
+        ranges = token_batches(texts, self.max_batch_tokens, self.max_batch_size, self.count_tokens)
+        self._count("batches", len(ranges))
+        if len(ranges) == 1:
+            return self._call(self.embeddings.embed_documents, list(texts))
+
+        abort = threading.Event()
+        futures = [self._pool.submit(self._call, self.embeddings.embed_documents, texts[a:b], abort=abort)
+                   for a, b in ranges]
+        vectors = []
+        try:
+            for future in futures:
+                vectors.extend(future.result())
+        except BaseException:
+            # Stop queued batches and pending retries; finished ones are already cached
+            abort.set()
+            for future in futures:
+                future.cancel()
+            raise
+        return vectors
+
+    async def aembed_documents(self, texts: list) -> list:
+        return await asyncio.to_thread(self.embed_documents, texts)
+
+    def embed_query(self, text: str) -> list:
+        return self._call(self.embeddings.embed_query, text)
+
+    async def aembed_query(self, text: str) -> list:
+        return await asyncio.to_thread(self.embed_query, text)
+
+    def stats(self) -> dict:
+        """Request counters, the current limit and, if present, the wrapped cache's stats"""
+        inner = self.embeddings.stats() if hasattr(self.embeddings, "stats") else {}
+        with self._lock:
+            counts = dict(self.counts)
+        return {**inner, **counts, "concurrency": self.limiter.limit}
@@ -0,0 +1,377 @@
+"""
+Idempotent, incremental ingestion into the Agentic RAG Chroma collection.
+
+Calling vectorstore.add_documents(doc_splits) on every notebook run re-embeds
+the whole PDF and inserts duplicate chunks. ingest_file() instead:
+
+- gives every chunk a stable ID, the SHA-256 of its source and text, so the
+  same chunk always maps to the same row
+- embeds and adds only chunks whose ID is not in the collection yet
+- deletes the chunks of this source that are no longer produced (pages that
+  were removed or edited)
+- on a file's first ingest, deletes its chunks added by the old notebook cell
+  (random IDs, no chunk_id metadata, source as given, often relative), so the
+  hash-ID copy replaces them instead of duplicating them
+- keeps a manifest per source file (file hash, size, mtime, splitter
+  settings, chunk IDs per page); when the file and splitter are unchanged
+  the file is not even parsed, so re-ingesting a large PDF costs a stat
+  (a hash if only its mtime moved) and zero embedding calls
+- keeps the BM25 index (agentic_rag.bm25) in step when one is passed as
+  `lexical`
+- bumps an index version next to the manifests whenever chunks are added
+  or deleted, so cached retrieval results (agentic_rag.retrieval) are
+  dropped
+
+Usage (from tasks/):
+
+    python -m agentic_rag.ingest book.pdf notes.txt [--prune] [--quantized]
+
+--quantized rebuilds the compact dense index (agentic_rag.quantized_index)
+after ingestion when the index version changed.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+import uuid
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from agentic_rag.bm25 import BM25_FILENAME, Bm25Index
+from agentic_rag.embedding_cache import CachedEmbeddings
+from agentic_rag.embedding_scheduler import CONCURRENCY, MAX_BATCH_TOKENS, EmbeddingScheduler
+from agentic_rag.quantized_index import DIMENSIONS, QUANTIZED_DIRNAME, QuantizedIndex
+
+CHROMA_PATH = "./chroma_db_agentic_rag"
+COLLECTION = "agentic_rag_docs"
+EMBEDDING_MODEL = "text-embedding-3-small"
+MANIFEST_DIRNAME = "ingest_manifests"
+VERSION_FILENAME = "INDEX_VERSION"
+EMBEDDING_CACHE = "./embedding_cache.sqlite"  # outside CHROMA_PATH, so it survives a rebuild
+
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 100
+BATCH_SIZE = 256  # chunks per add_documents / get call
+
+
+def make_splitter(chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP):
+    return RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+def splitter_signature(splitter) -> dict:
+    """Settings that change chunk boundaries; a change forces a re-split"""
+    return {
+        "type": type(splitter).__name__,
+        "chunk_size": getattr(splitter, "_chunk_size", None),
+        "chunk_overlap": getattr(splitter, "_chunk_overlap", None),
+    }
+
+
+def chunk_id(source: str, text: str) -> str:
+    return hashlib.sha256(f"{source}\0{text}".encode("utf-8")).hexdigest()
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_pages(path: str) -> list:
+    """Pages of a PDF, or of a text file split on form feeds (pdftotext output)"""
+    if path.lower().endswith(".pdf"):
+        from langchain_community.document_loaders import PyPDFLoader
+        return PyPDFLoader(path).load()
+
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    return [
+        Document(page_content=page, metadata={"source": path, "page": i})
+        for i, page in enumerate(text.split("\f"))
+        if page.strip()
+    ]
+
+
+def split_pages(source: str, pages: list, splitter) -> tuple:
+    """Chunks with stable IDs, and the chunk IDs of every page"""
+    chunks, ids, by_page = [], [], {}
+    seen = set()
+    for chunk in splitter.split_documents(pages):
+        cid = chunk_id(source, chunk.page_content)
+        page = str(chunk.metadata.get("page", 0))
+        by_page.setdefault(page, []).append(cid)
+        if cid in seen:
+            continue  # identical text twice in one source is stored once
+        seen.add(cid)
+        chunk.metadata.update({"source": source, "chunk_id": cid})
+        chunks.append(chunk)
+        ids.append(cid)
+    return chunks, ids, by_page
+
+
+def batches(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def existing_ids(vectorstore, ids: list) -> set:
+    found = set()
+    for batch in batches(ids, BATCH_SIZE * 8):
+        found.update(vectorstore.get(ids=batch, include=[])["ids"])
+    return found
+
+
+def legacy_chunk_ids(vectorstore, source: str, aliases=()) -> list:
+    """IDs of this source's chunks added without a content-hash ID (no chunk_id metadata)"""
+    names = sorted({source, *aliases})
+    rows = vectorstore.get(where={"source": {"$in": names}}, include=["metadatas"])
+    return [cid for cid, meta in zip(rows["ids"], rows["metadatas"]) if not (meta or {}).get("chunk_id")]
+
+
+def file_aliases(path: str) -> tuple:
+    """Source names older ingests may have used for path (as given, relative to the cwd)"""
+    return path, os.path.relpath(path)
+
+
+class ManifestStore:
+    """One JSON manifest per source file"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, source: str) -> str:
+        name = hashlib.sha1(source.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{name}.json")
+
+    def load(self, source: str):
+        try:
+            with open(self._path(source), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, manifest: dict):
+        path = self._path(manifest["source"])
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, path)  # never leave a half-written manifest
+
+    def delete(self, source: str):
+        try:
+            os.remove(self._path(source))
+        except FileNotFoundError:
+            pass
+
+    def version(self) -> str:
+        """Changes whenever ingestion adds or deletes chunks (retrieval caches key on it)"""
+        try:
+            with open(os.path.join(self.directory, VERSION_FILENAME), encoding="utf-8") as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return "0"
+
+    def bump(self):
+        path = os.path.join(self.directory, VERSION_FILENAME)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(uuid.uuid4().hex)
+        os.replace(path + ".tmp", path)
+
+    def record(self, manifest: dict, report: dict):
+        """Save a source's manifest, and bump the version if the collection changed"""
+        self.save(manifest)
+        if report["added"] or report["deleted"]:
+            self.bump()
+
+    def sources(self) -> list:
+        manifests = []
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith(".json"):
+                with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                    manifests.append(json.load(f))
+        return manifests
+
+
+def sync_chunks(vectorstore, source: str, chunks: list, ids: list, old_ids, lexical=None, legacy=()) -> dict:
+    """Add chunks missing from the collection and delete this source's stale (and legacy) ones"""
+    present = existing_ids(vectorstore, ids)
+    new = [(c, i) for c, i in zip(chunks, ids) if i not in present]
+    for batch in batches(new, BATCH_SIZE):
+        vectorstore.add_documents([c for c, _ in batch], ids=[i for _, i in batch])
+        if lexical is not None:
+            lexical.add([i for _, i in batch], [c.page_content for c, _ in batch])
+
+    stale = sorted((set(old_ids or []) - set(ids)) | set(legacy))
+    for batch in batches(stale, BATCH_SIZE * 8):
+        vectorstore.delete(ids=batch)
+        if lexical is not None:
+            lexical.delete(batch)
+
+    return {"source": source, "chunks": len(ids), "added": len(new),
+            "deleted": len(stale), "skipped": False}
+
+
+def ingest_documents(vectorstore, source: str, pages: list, splitter=None, manifests: ManifestStore = None,
+                     lexical=None) -> dict:
+    """Ingest already-loaded pages under a source name (no file fast path)"""
+    splitter = splitter or make_splitter()
+    previous = manifests.load(source) if manifests else None
+    chunks, ids, by_page = split_pages(source, pages, splitter)
+    report = sync_chunks(vectorstore, source, chunks, ids, previous and previous["chunk_ids"], lexical)
+    if manifests:
+        manifests.record({"source": source, "file_hash": None, "size": None, "mtime": None,
+                          "splitter": splitter_signature(splitter), "chunk_ids": ids,
+                          "pages": by_page, "ingested_at": time.time()}, report)
+    return report
+
+
+def file_status(path: str, manifests: ManifestStore, splitter) -> tuple:
+    """(previous manifest, os.stat, file hash, report if the file can be skipped)"""
+    source = os.path.abspath(path)
+    previous = manifests.load(source)
+    stat = os.stat(path)
+
+    unchanged = {"source": source, "chunks": len(previous["chunk_ids"]) if previous else 0,
+                 "added": 0, "deleted": 0, "skipped": True}
+    same_splitter = previous is not None and previous["splitter"] == splitter_signature(splitter)
+
+    if same_splitter and (previous["size"], previous["mtime"]) == (stat.st_size, stat.st_mtime_ns):
+        return previous, stat, previous["file_hash"], unchanged
+
+    digest = file_hash(path)
+    if same_splitter and previous["file_hash"] == digest:
+        # Touched but not changed
+        manifests.save(dict(previous, size=stat.st_size, mtime=stat.st_mtime_ns))
+        return previous, stat, digest, unchanged
+
+    return previous, stat, digest, None
+
+
+def file_manifest(path: str, stat, digest: str, splitter, ids: list, by_page: dict) -> dict:
+    return {"source": os.path.abspath(path), "file_hash": digest, "size": stat.st_size,
+            "mtime": stat.st_mtime_ns, "splitter": splitter_signature(splitter), "chunk_ids": ids,
+            "pages": by_page, "ingested_at": time.time()}
+
+
+def ingest_file(vectorstore, path: str, manifests: ManifestStore, splitter=None, loader=load_pages,
+                lexical=None) -> dict:
+    """Ingest one file, skipping it entirely if it and the splitter are unchanged"""
+    splitter = splitter or make_splitter()
+    previous, stat, digest, skipped = file_status(path, manifests, splitter)
+    if skipped:
+        return skipped
+
+    source = os.path.abspath(path)
+    chunks, ids, by_page = split_pages(source, loader(path), splitter)
+    legacy = legacy_chunk_ids(vectorstore, source, file_aliases(path)) if previous is None else ()
+    report = sync_chunks(vectorstore, source, chunks, ids, previous and previous["chunk_ids"], lexical, legacy)
+    manifests.record(file_manifest(path, stat, digest, splitter, ids, by_page), report)
+    return report
+
+
+def prune_missing(vectorstore, manifests: ManifestStore, lexical=None) -> list:
+    """Delete the chunks and manifests of source files that no longer exist"""
+    removed = []
+    for manifest in manifests.sources():
+        if manifest["file_hash"] is not None and not os.path.exists(manifest["source"]):
+            for batch in batches(manifest["chunk_ids"], BATCH_SIZE * 8):
+                vectorstore.delete(ids=batch)
+                if lexical is not None:
+                    lexical.delete(batch)
+            manifests.delete(manifest["source"])
+            removed.append(manifest["source"])
+    if removed:
+        manifests.bump()
+    return removed
+
+
+def make_vectorstore(embeddings, persist_directory: str = CHROMA_PATH, collection_name: str = COLLECTION):
+    from langchain_chroma import Chroma
+    return Chroma(collection_name=collection_name, persist_directory=persist_directory,
+                  embedding_function=embeddings)
+
+
+def make_embeddings(cache_path: str = EMBEDDING_CACHE, concurrency: int = CONCURRENCY,
+                    max_batch_tokens: int = MAX_BATCH_TOKENS) -> EmbeddingScheduler:
+    """OpenAI embeddings behind the SQLite cache and the rate-limit-aware scheduler"""
+    from langchain_openai import OpenAIEmbeddings
+
+    model = OpenAIEmbeddings(
+        model=EMBEDDING_MODEL,
+        api_key=os.getenv("gen_api_key") or os.getenv("OPENAI_API_KEY"),
+        max_retries=0  # 429s and retries are handled by the scheduler
+    )
+    return EmbeddingScheduler(CachedEmbeddings(model, cache_path), max_batch_tokens=max_batch_tokens,
+                              concurrency=concurrency)
+
+
+def default_manifests(persist_directory: str = CHROMA_PATH) -> ManifestStore:
+    return ManifestStore(os.path.join(persist_directory, MANIFEST_DIRNAME))
+
+
+def default_lexical(persist_directory: str = CHROMA_PATH) -> Bm25Index:
+    os.makedirs(persist_directory, exist_ok=True)
+    return Bm25Index(os.path.join(persist_directory, BM25_FILENAME))
+
+
+def default_quantized(persist_directory: str = CHROMA_PATH, dimensions: int = DIMENSIONS) -> QuantizedIndex:
+    return QuantizedIndex(os.path.join(persist_directory, QUANTIZED_DIRNAME), dimensions=dimensions)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incrementally ingest documents into the Agentic RAG collection")
+    parser.add_argument("paths", nargs="*", help="PDF or text files")
+    parser.add_argument("--persist-dir", default=CHROMA_PATH)
+    parser.add_argument("--collection", default=COLLECTION)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--chunk-overlap", type=int, default=CHUNK_OVERLAP)
+    parser.add_argument("--embedding-cache", default=EMBEDDING_CACHE)
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="initial embedding requests in flight")
+    parser.add_argument("--batch-tokens", type=int, default=MAX_BATCH_TOKENS, help="token budget per embedding request")
+    parser.add_argument("--prune", action="store_true", help="remove sources whose files no longer exist")
+    parser.add_argument("--quantized", action="store_true", help="keep the int8 memory-mapped dense index in sync")
+    parser.add_argument("--dimensions", type=int, default=DIMENSIONS, help="Matryoshka prefix the int8 index searches")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    embeddings = make_embeddings(args.embedding_cache, args.concurrency, args.batch_tokens)
+    vectorstore = make_vectorstore(embeddings, args.persist_dir, args.collection)
+    manifests = default_manifests(args.persist_dir)
+    lexical = default_lexical(args.persist_dir)
+    if lexical.sync(vectorstore):
+        print(f"rebuilt the BM25 index ({lexical.count()} chunks)")
+    splitter = make_splitter(args.chunk_size, args.chunk_overlap)
+
+    for path in args.paths:
+        start = time.perf_counter()
+        report = ingest_file(vectorstore, path, manifests, splitter, lexical=lexical)
+        status = "unchanged" if report["skipped"] else f"+{report['added']} -{report['deleted']}"
+        print(f"{path}: {report['chunks']} chunks, {status} ({time.perf_counter() - start:.2f}s)")
+
+    if args.prune:
+        for source in prune_missing(vectorstore, manifests, lexical):
+            print(f"pruned {source}")
+
+    if args.quantized:
+        start = time.perf_counter()
+        quantized = default_quantized(args.persist_dir, args.dimensions)
+        if quantized.sync(vectorstore, manifests):
+            print(f"rebuilt the quantized index ({quantized.count()} chunks, "
+                  f"{time.perf_counter() - start:.2f}s)")
+
+    stats = embeddings.stats()
+    print(f"embedding cache: {stats['document_hits']} hits, {stats['document_misses']} misses "
+          f"({stats['document_hit_rate']:.0%}); {stats['requests']} requests, "
+          f"{stats['rate_limited']} rate limited")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Vectorized maximal marginal relevance (MMR) re-ranking.
+
+Chroma's MMR (the notebook's search_type="mmr") recomputes the similarity of
+every candidate to the whole selected set and scores candidates in a Python
+loop at every step, so raising fetch_k from 10 into the hundreds makes
+re-ranking the slow part of retrieval. Here:
+
+- candidates and queries are L2-normalized once; relevance is one
+  matrix-vector product per query
+- redundancy (max similarity to anything selected) is a vector updated in
+  place after each pick with one product against the new pick, instead of
+  re-scoring against the whole selected set
+- mmr_batch() re-ranks B queries at once over a (B, n, d) candidate tensor;
+  a mask handles queries with fewer than n candidates
+- MMRRetriever fetches fetch_k candidates (with embeddings) from Chroma in
+  one query, re-ranks them and is a drop-in for
+  vectorstore.as_retriever(search_type="mmr") in CachedRetriever
+
+Selections match langchain_chroma's maximal_marginal_relevance (first pick
+is the most relevant candidate, ties go to the earlier candidate), and
+documents come back in candidate order as Chroma returns them.
+"""
+
+from typing import Optional
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+from pydantic import ConfigDict
+
+K = 5
+FETCH_K = 200
+LAMBDA_MULT = 0.5
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=-1, keepdims=True)
+    return x / np.where(norms == 0, 1, norms)
+
+
+def mmr_batch(query_embeddings, candidates, k: int = K, lambda_mult: float = LAMBDA_MULT, mask=None) -> list:
+    """
+    Indices selected for each query.
+
+    query_embeddings: (B, d); candidates: (B, n, d); mask: (B, n) booleans,
+    False for padding rows.
+    """
+    queries = _normalize(np.asarray(query_embeddings, dtype=np.float32))
+    candidates = _normalize(np.asarray(candidates, dtype=np.float32))
+    batch, n, _ = candidates.shape
+    available = np.ones((batch, n), dtype=bool) if mask is None else np.array(mask, dtype=bool)
+    k = min(k, n)
+    rows = np.arange(batch)
+
+    # Batched matmul (BLAS) rather than einsum, which would loop in NumPy
+    relevance = (candidates @ queries[:, :, None])[:, :, 0]
+    redundancy = np.full((batch, n), -np.inf, dtype=np.float32)
+    selected = np.full((batch, k), -1)
+
+    for step in range(k):
+        scores = relevance if step == 0 else lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        picks = np.argmax(np.where(available, scores, -np.inf), axis=1)
+        ok = available[rows, picks]  # False once a query has no candidates left
+        selected[:, step] = np.where(ok, picks, -1)
+        available[rows, picks] = False
+        if step + 1 < k:
+            similarity = (candidates @ candidates[rows, picks][:, :, None])[:, :, 0]
+            np.maximum(redundancy, similarity, out=redundancy)
+
+    return [[int(i) for i in row if i >= 0] for row in selected]
+
+
+def mmr(query_embedding, candidates, k: int = K, lambda_mult: float = LAMBDA_MULT) -> list:
+    """Indices of the k candidates selected for one query, in selection order"""
+    candidates = np.asarray(candidates, dtype=np.float32)
+    if len(candidates) == 0:
+        return []
+    return mmr_batch(np.asarray(query_embedding)[None], candidates[None], k, lambda_mult)[0]
+
+
+def pad(candidate_lists: list) -> tuple:
+    """(B, n, d) tensor and (B, n) mask from B candidate matrices of different lengths"""
+    n = max((len(c) for c in candidate_lists), default=0)
+    d = next((len(c[0]) for c in candidate_lists if len(c)), 0)
+    tensor = np.zeros((len(candidate_lists), n, d), dtype=np.float32)
+    mask = np.zeros((len(candidate_lists), n), dtype=bool)
+    for i, c in enumerate(candidate_lists):
+        if len(c):
+            tensor[i, :len(c)] = c
+            mask[i, :len(c)] = True
+    return tensor, mask
+
+
+def mmr_search(vectorstore, query_embeddings: list, k: int = K, fetch_k: int = FETCH_K,
+               lambda_mult: float = LAMBDA_MULT, filter: dict = None) -> list:
+    """MMR-selected documents for each query embedding, with one Chroma query for all of them"""
+    results = vectorstore._collection.query(
+        query_embeddings=query_embeddings, n_results=fetch_k, where=filter,
+        include=["documents", "metadatas", "embeddings"]
+    )
+    tensor, mask = pad([np.asarray(e, dtype=np.float32) for e in results["embeddings"]])
+    if tensor.shape[1] == 0:
+        return [[] for _ in query_embeddings]
+
+    selections = mmr_batch(query_embeddings, tensor, k, lambda_mult, mask)
+    out = []
+    for q, chosen in enumerate(selections):
+        out.append([
+            Document(page_content=results["documents"][q][i], metadata=results["metadatas"][q][i] or {},
+                     id=results["ids"][q][i])
+            for i in sorted(chosen)
+        ])
+    return out
+
+
+class MMRRetriever(BaseRetriever):
+    """MMR over fetch_k Chroma candidates, re-ranked with mmr_batch"""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vectorstore: VectorStore
+    k: int = K
+    fetch_k: int = FETCH_K
+    lambda_mult: float = LAMBDA_MULT
+    filter: Optional[dict] = None
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list:
+        return self.search_many([query])[0]
+
+    def search_many(self, queries: list) -> list:
+        """Documents for several queries with one Chroma query and one re-rank"""
+        embeddings = [self.vectorstore.embeddings.embed_query(q) for q in queries]
+        return mmr_search(self.vectorstore, embeddings, self.k, self.fetch_k, self.lambda_mult, self.filter)
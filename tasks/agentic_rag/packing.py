@@ -0,0 +1,160 @@
+"""
+Context packing for retrieved chunks.
+
+retrieve_documents joined the five retrieved 1,000-character chunks as they
+came, and traditional_rag did the same with three. The splitter's 100
+characters of overlap were sent twice whenever neighbouring chunks were
+retrieved together, and nothing capped the tokens a retrieval added to the
+prompt. pack_documents turns a best-first list of chunks into the context
+that is actually sent:
+
+- duplicates (same chunk, or text already contained in another retrieved
+  chunk of the same page) are dropped
+- chunks of the same source and page that overlap (the end of one is the
+  start of the other, as the splitter leaves them) are merged into one
+  passage, with the overlap kept once
+- passages are ordered by the rank of their best chunk
+- passages are added until token_budget (estimated) tokens are used; the
+  first that does not fit is cut at a sentence or word boundary if at least
+  MIN_PASSAGE_TOKENS remain, and packing stops there
+
+Each passage keeps the metadata of its best chunk (source, page) plus the
+IDs of every chunk merged into it, and format_context cites the page in the
+passage header.
+"""
+
+import os
+
+from langchain_core.documents import Document
+
+from agentic_rag.embedding_scheduler import estimate_tokens
+
+TOKEN_BUDGET = 1000  # tokens of retrieved context per call
+MIN_OVERLAP = 20  # characters; shorter shared text is treated as coincidence
+MIN_PASSAGE_TOKENS = 50
+SEPARATOR = "\n\n---\n\n"
+
+
+def overlap(first: str, second: str, min_chars: int = MIN_OVERLAP) -> int:
+    """Length of the longest suffix of first that is a prefix of second"""
+    head = second[:min_chars]
+    if len(head) < min_chars:
+        return 0
+    start = first.find(head, max(0, len(first) - len(second)))
+    while start != -1:
+        if second.startswith(first[start:]):
+            return len(first) - start
+        start = first.find(head, start + 1)
+    return 0
+
+
+def _key(doc: Document) -> tuple:
+    return doc.metadata.get("source"), doc.metadata.get("page")
+
+
+def _chunk_ids(doc: Document) -> list:
+    cid = doc.metadata.get("chunk_id") or doc.id
+    return [cid] if cid else []
+
+
+def _join(passage: dict, text: str, ids: list) -> bool:
+    """Merge a chunk into a passage of the same page if they overlap or one contains the other"""
+    current = passage["text"]
+    if current in text:
+        passage["text"] = text
+    elif text not in current:
+        after, before = overlap(current, text), overlap(text, current)
+        if after:
+            passage["text"] = current + text[after:]
+        elif before:
+            passage["text"] = text + current[before:]
+        else:
+            return False
+    passage["ids"].extend(i for i in ids if i not in passage["ids"])
+    return True
+
+
+def merge_chunks(docs: list) -> list:
+    """Passages ({rank, doc, text, ids}) from best-first chunks, in rank order"""
+    passages, seen = [], set()
+    for rank, doc in enumerate(docs):
+        ids = _chunk_ids(doc)
+        if ids and ids[0] in seen:
+            continue
+        seen.update(ids)
+        text = doc.page_content.strip()
+        for passage in passages:
+            if _key(passage["doc"]) == _key(doc) and _join(passage, text, ids):
+                break
+        else:
+            passages.append({"rank": rank, "doc": doc, "text": text, "ids": list(ids)})
+            continue
+
+        # A chunk that joined two passages (A, then C, then the B between them) closes the gap
+        merged = True
+        while merged:
+            merged = False
+            for i, a in enumerate(passages):
+                for b in passages[i + 1:]:
+                    if _key(a["doc"]) == _key(b["doc"]) and _join(a, b["text"], b["ids"]):
+                        passages.remove(b)
+                        merged = True
+                        break
+                if merged:
+                    break
+    return passages
+
+
+def truncate(text: str, max_tokens: int) -> str:
+    """Text cut to about max_tokens, at the last sentence end or else word boundary"""
+    limit = max(0, (max_tokens - 1) * 4)
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    end = max(cut.rfind(". "), cut.rfind(".\n"))
+    if end >= limit // 2:
+        return cut[:end + 1]
+    return cut[:cut.rfind(" ")].rstrip() + " ..." if " " in cut else cut
+
+
+def pack_documents(docs: list, token_budget: int = TOKEN_BUDGET, count_tokens=estimate_tokens) -> list:
+    """Deduplicated, merged and budgeted passages as Documents, best first"""
+    packed, used = [], 0
+    for passage in merge_chunks(docs):
+        text, tokens = passage["text"], count_tokens(passage["text"])
+        truncated = used + tokens > token_budget
+        if truncated:
+            remaining = token_budget - used
+            if remaining < MIN_PASSAGE_TOKENS:
+                break
+            text = truncate(text, remaining)
+            tokens = count_tokens(text)
+        metadata = {**passage["doc"].metadata, "chunk_ids": passage["ids"]}
+        if truncated:
+            metadata["truncated"] = True
+        packed.append(Document(page_content=text, metadata=metadata, id=passage["doc"].id))
+        used += tokens
+        if truncated:
+            break
+    return packed
+
+
+def citation(doc: Document, with_source: bool = False) -> str:
+    """"page 12" (PDF page label if known), with the file name if asked"""
+    page = doc.metadata.get("page_label", doc.metadata.get("page"))
+    parts = []
+    if with_source and doc.metadata.get("source"):
+        parts.append(os.path.basename(str(doc.metadata["source"])))
+    if page is not None:
+        parts.append(f"page {page}")
+    return ", ".join(parts)
+
+
+def format_context(docs: list) -> str:
+    """Numbered passages with their citation, e.g. "Document 1 (page 12):" """
+    with_source = len({doc.metadata.get("source") for doc in docs}) > 1
+    blocks = []
+    for i, doc in enumerate(docs):
+        cite = citation(doc, with_source)
+        blocks.append(f"Document {i+1}{f' ({cite})' if cite else ''}:\n{doc.page_content}")
+    return SEPARATOR.join(blocks)
@@ -0,0 +1,227 @@
+"""
+Streaming, parallel PDF ingestion.
+
+The notebook collects every page from PyPDFLoader before splitting, so
+embedding starts only after the whole book is parsed, everything is held in
+memory and parsing uses one core. stream_ingest() instead overlaps the stages:
+
+    page ranges --(process pool)--> pages --> chunks --(bounded queue)--> writer
+                                                                          |
+                                                  existing_ids, add_documents
+
+- page ranges of pages_per_task pages are parsed with pypdf in a process pool;
+  at most max_pending ranges are in flight, so parsed text never piles up
+- pages are chunked as their range arrives, with the same splitter and
+  chunk IDs as ingest_file(), so both paths produce the same collection
+- chunks go to a writer thread in batches of batch_size through a queue of
+  queue_size batches; when embedding or Chroma falls behind, parsing waits
+- manifests, unchanged-file skipping, stale-chunk deletion and the
+  optional BM25 index (`lexical`) work as in ingest_file()
+
+The report adds pages/sec and the peak RSS of this process and of the pool
+workers.
+
+Usage (from tasks/):
+
+    python -m agentic_rag.pipeline book.pdf [--workers 4]
+"""
+
+import argparse
+import os
+import queue
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from langchain_core.documents import Document
+
+from agentic_rag.embedding_scheduler import CONCURRENCY
+from agentic_rag.ingest import (
+    BATCH_SIZE, CHROMA_PATH, COLLECTION, EMBEDDING_CACHE,
+    batches, chunk_id, default_manifests, existing_ids, file_aliases, file_manifest,
+    file_status, ingest_file, legacy_chunk_ids, make_splitter
+)
+
+PAGES_PER_TASK = 16
+QUEUE_SIZE = 4  # chunk batches waiting for the writer
+
+_readers = {}  # per worker process: path -> PdfReader
+
+
+def page_count(path: str) -> int:
+    from pypdf import PdfReader
+    return len(PdfReader(path).pages)
+
+
+def parse_range(path: str, start: int, stop: int) -> list:
+    """[(page number, text)] for pages start..stop-1; runs in a pool worker"""
+    from pypdf import PdfReader
+    reader = _readers.get(path)
+    if reader is None:
+        reader = _readers[path] = PdfReader(path)
+    # Stripped like PyPDFLoader does, so chunk IDs match ingest_file()
+    return [(i, (reader.pages[i].extract_text() or "").strip()) for i in range(start, stop)]
+
+
+def peak_rss_mb() -> dict:
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    scale = 1 / 1024 if sys.platform != "darwin" else 1 / (1024 * 1024)
+    return {
+        "main": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        "workers": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale,
+    }
+
+
+class _Writer(threading.Thread):
+    """Embeds and writes chunk batches from a bounded queue"""
+
+    def __init__(self, vectorstore, size: int, lexical=None):
+        super().__init__(daemon=True)
+        self.vectorstore = vectorstore
+        self.lexical = lexical
+        self.queue = queue.Queue(maxsize=size)
+        self.added = 0
+        self.error = None
+
+    def run(self):
+        while True:
+            batch = self.queue.get()
+            if batch is None:
+                return
+            if self.error is not None:
+                continue  # drain so the producer never blocks forever
+            try:
+                present = existing_ids(self.vectorstore, [cid for _, cid in batch])
+                new = [(c, cid) for c, cid in batch if cid not in present]
+                if new:
+                    self.vectorstore.add_documents([c for c, _ in new], ids=[cid for _, cid in new])
+                    if self.lexical is not None:
+                        self.lexical.add([cid for _, cid in new], [c.page_content for c, _ in new])
+                    self.added += len(new)
+            except Exception as e:
+                self.error = e
+
+    def put(self, batch: list):
+        self.queue.put(batch)  # blocks while the writer is queue_size batches behind
+        if self.error is not None:
+            raise self.error
+
+
+def _ranges(pages: int, size: int):
+    for start in range(0, pages, size):
+        yield start, min(start + size, pages)
+
+
+def stream_ingest(vectorstore, path: str, manifests, splitter=None, workers: int = None,
+                  pages_per_task: int = PAGES_PER_TASK, batch_size: int = BATCH_SIZE,
+                  queue_size: int = QUEUE_SIZE, max_pending: int = None, lexical=None) -> dict:
+    """Ingest a PDF with parallel parsing and a bounded embed/write stage"""
+    splitter = splitter or make_splitter()
+    if not path.lower().endswith(".pdf"):
+        return ingest_file(vectorstore, path, manifests, splitter, lexical=lexical)
+
+    started = time.perf_counter()
+    previous, stat, digest, skipped = file_status(path, manifests, splitter)
+    if skipped:
+        return skipped
+
+    source = os.path.abspath(path)
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 2
+    total_pages = page_count(path)
+
+    writer = _Writer(vectorstore, queue_size, lexical)
+    writer.start()
+
+    ids, by_page, seen, batch = [], {}, set(), []
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            ranges = _ranges(total_pages, pages_per_task)
+            pending = set()
+            while True:
+                for start, stop in ranges:
+                    pending.add(pool.submit(parse_range, path, start, stop))
+                    if len(pending) >= max_pending:
+                        break
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for page, text in future.result():
+                        for piece in splitter.split_text(text):
+                            cid = chunk_id(source, piece)
+                            by_page.setdefault(str(page), []).append(cid)
+                            if cid in seen:
+                                continue
+                            seen.add(cid)
+                            ids.append(cid)
+                            batch.append((Document(page_content=piece, metadata={
+                                "source": source, "page": page, "chunk_id": cid}), cid))
+                            if len(batch) >= batch_size:
+                                writer.put(batch)
+                                batch = []
+        if batch:
+            writer.put(batch)
+    finally:
+        writer.queue.put(None)
+        writer.join()
+    if writer.error is not None:
+        raise writer.error
+
+    if previous:
+        stale = sorted(set(previous["chunk_ids"]) - seen)
+    else:
+        # First ingest of this file: replace chunks the old notebook cell added with random IDs
+        stale = legacy_chunk_ids(vectorstore, source, file_aliases(path))
+    for chunk_batch in batches(stale, BATCH_SIZE * 8):
+        vectorstore.delete(ids=chunk_batch)
+        if lexical is not None:
+            lexical.delete(chunk_batch)
+
+    report = {"source": source, "chunks": len(ids), "added": writer.added, "deleted": len(stale),
+              "skipped": False, "pages": total_pages}
+    manifests.record(file_manifest(path, stat, digest, splitter, ids, by_page), report)
+    elapsed = time.perf_counter() - started
+    return {**report, "seconds": elapsed, "pages_per_sec": total_pages / elapsed if elapsed else 0.0,
+            "peak_rss_mb": peak_rss_mb()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream a PDF into the Agentic RAG collection")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--persist-dir", default=CHROMA_PATH)
+    parser.add_argument("--collection", default=COLLECTION)
+    parser.add_argument("--embedding-cache", default=EMBEDDING_CACHE)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--pages-per-task", type=int, default=PAGES_PER_TASK)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="initial embedding requests in flight")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+
+    from agentic_rag.ingest import default_lexical, make_embeddings, make_vectorstore
+
+    load_dotenv()
+    embeddings = make_embeddings(args.embedding_cache, args.concurrency)
+    vectorstore = make_vectorstore(embeddings, args.persist_dir, args.collection)
+    manifests = default_manifests(args.persist_dir)
+    lexical = default_lexical(args.persist_dir)
+    lexical.sync(vectorstore)
+
+    for path in args.paths:
+        report = stream_ingest(vectorstore, path, manifests, workers=args.workers,
+                               pages_per_task=args.pages_per_task, batch_size=args.batch_size, lexical=lexical)
+        if report["skipped"]:
+            print(f"{path}: unchanged ({report['chunks']} chunks)")
+            continue
+        rss = report.get("peak_rss_mb", {})
+        print(f"{path}: {report['chunks']} chunks, +{report['added']} -{report['deleted']}, "
+              f"{report.get('pages_per_sec', 0):.1f} pages/s, "
+              f"peak RSS {rss.get('main', 0):.0f} MB (workers {rss.get('workers', 0):.0f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Compact, memory-mapped dense index (int8 codes over a Matryoshka prefix).
+
+Chroma keeps every embedding at full precision (1536 float32 for
+text-embedding-3-small, 6 KB per chunk) in an in-memory HNSW graph, so each
+worker that opens a multi-book collection holds gigabytes of private
+memory. QuantizedIndex is a read-mostly alternative for the dense side of
+retrieval, built from the Chroma collection and stored beside it:
+
+- Matryoshka truncation: text-embedding-3 vectors are trained so that a
+  prefix, re-normalized, is itself a good embedding; the first `dimensions`
+  (default 256) are searched
+- the prefix is quantized to int8 with one scale per vector (256 bytes +
+  4 per chunk instead of 6 KB), and scanned in blocks with NumPy
+- the best k * rescore candidates are re-scored exactly against the full
+  float32 vectors, so only those rows are read
+- codes, scales and full vectors are plain files opened with np.memmap:
+  every process serving the index shares one copy in the page cache
+  instead of holding its own; texts and metadata are in SQLite
+- a build goes into a new directory and is published by rewriting the
+  CURRENT file, so readers in other processes keep their mapping until they
+  see the new build on their next search; sync() rebuilds when the ingest
+  index version (or, without manifests, the chunk count) has changed
+
+QuantizedRetriever embeds the query and returns Documents (with their chunk
+IDs), so it can replace MMRRetriever as HybridRetriever's dense side.
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import uuid
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+QUANTIZED_DIRNAME = "quantized_index"
+DIMENSIONS = 256  # Matryoshka prefix that is searched
+RESCORE = 10  # candidates re-scored exactly per requested result
+BLOCK_ROWS = 16384  # codes converted to float32 at a time while scanning
+BUILD_BATCH = 1000  # chunks read from Chroma per call
+
+_CURRENT = "CURRENT"
+_CODES, _SCALES, _VECTORS, _ROWS = "codes.i8", "scales.f32", "vectors.f32", "rows.sqlite"
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def quantize(vectors: np.ndarray) -> tuple:
+    """(int8 codes, float32 scale per row), with vectors ~= codes * scale"""
+    scales = np.abs(vectors).max(axis=1) / 127
+    scales[scales == 0] = 1
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+class QuantizedIndex:
+    def __init__(self, directory: str, dimensions: int = DIMENSIONS, rescore: int = RESCORE):
+        self.directory = directory
+        self.dimensions = dimensions
+        self.rescore = rescore
+        self._lock = threading.Lock()
+        self._build = None
+        self._snapshot = ({}, None, None, None)
+        os.makedirs(directory, exist_ok=True)
+        self._open()
+
+    def _current(self):
+        try:
+            with open(os.path.join(self.directory, _CURRENT)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _open(self):
+        """Map the published build, if it changed since the last search"""
+        for attempt in range(3):
+            build = self._current()
+            if build == self._build:
+                return
+            try:
+                self._map(build)
+                return
+            except (sqlite3.OperationalError, FileNotFoundError):
+                if attempt == 2:  # a concurrent rebuild removed it; CURRENT names the new one
+                    raise
+
+    def _map(self, build: str):
+        path = os.path.join(self.directory, build)
+        conn = sqlite3.connect(f"file:{os.path.join(path, _ROWS)}?mode=ro", uri=True, check_same_thread=False)
+        meta = dict(conn.execute("SELECT key, value FROM meta"))
+        rows, dims, full = int(meta["rows"]), int(meta["dimensions"]), int(meta["full_dimensions"])
+        arrays = None
+        if rows:
+            arrays = (np.memmap(os.path.join(path, _CODES), dtype=np.int8, mode="r", shape=(rows, dims)),
+                      np.memmap(os.path.join(path, _SCALES), dtype=np.float32, mode="r", shape=(rows,)),
+                      np.memmap(os.path.join(path, _VECTORS), dtype=np.float32, mode="r", shape=(rows, full)))
+        self._snapshot = (meta, arrays, conn, threading.Lock())
+        self._build = build
+
+    def snapshot(self):
+        """(meta, (codes, scales, vectors) or None, connection, lock) of the current build"""
+        with self._lock:
+            self._open()
+            return self._snapshot
+
+    def count(self) -> int:
+        return int(self.snapshot()[0].get("rows", 0))
+
+    def version(self):
+        return self.snapshot()[0].get("version")
+
+    def build(self, batches, version: str = None):
+        """Write a new build from (ids, embeddings, documents, metadatas) batches and publish it"""
+        build = f"build-{uuid.uuid4().hex[:12]}"
+        path = os.path.join(self.directory, build)
+        os.makedirs(path)
+        conn = sqlite3.connect(os.path.join(path, _ROWS))
+        conn.execute("CREATE TABLE rows (row INTEGER PRIMARY KEY, chunk_id TEXT NOT NULL, document TEXT,"
+                     " metadata TEXT)")
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        rows, dims, full = 0, None, None
+        with open(os.path.join(path, _CODES), "wb") as codes_file, \
+                open(os.path.join(path, _SCALES), "wb") as scales_file, \
+                open(os.path.join(path, _VECTORS), "wb") as vectors_file:
+            for ids, embeddings, documents, metadatas in batches:
+                if not len(ids):
+                    continue
+                vectors = normalize(np.asarray(embeddings, dtype=np.float32))
+                if full is None:
+                    full = vectors.shape[1]
+                    dims = min(self.dimensions, full)
+                codes, scales = quantize(normalize(vectors[:, :dims]))
+                codes.tofile(codes_file)
+                scales.tofile(scales_file)
+                vectors.tofile(vectors_file)
+                conn.executemany("INSERT INTO rows VALUES (?, ?, ?, ?)", [
+                    (rows + i, cid, text, json.dumps(meta or {}))
+                    for i, (cid, text, meta) in enumerate(zip(ids, documents, metadatas))])
+                rows += len(ids)
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("rows", str(rows)), ("dimensions", str(dims or 0)), ("full_dimensions", str(full or 0)),
+            ("version", version)])
+        conn.commit()
+        conn.close()
+
+        previous = self._current()
+        tmp = os.path.join(self.directory, f"{_CURRENT}.{build}")
+        with open(tmp, "w") as f:
+            f.write(build)
+        os.replace(tmp, os.path.join(self.directory, _CURRENT))
+        # Readers that mapped the previous build keep their mapping until they reopen
+        if previous:
+            shutil.rmtree(os.path.join(self.directory, previous), ignore_errors=True)
+        self.snapshot()
+
+    def rebuild(self, vectorstore, version: str = None, batch_size: int = BUILD_BATCH):
+        """Re-build from every chunk in the Chroma collection (no embedding calls)"""
+        collection = vectorstore._collection
+        total = collection.count()
+
+        def batches():
+            for offset in range(0, total, batch_size):
+                rows = collection.get(include=["embeddings", "documents", "metadatas"],
+                                      limit=batch_size, offset=offset)
+                yield rows["ids"], rows["embeddings"], rows["documents"], rows["metadatas"]
+
+        self.build(batches(), version if version is not None else f"rows:{total}")
+
+    def sync(self, vectorstore, manifests=None) -> bool:
+        """Rebuild if the collection changed since the last build"""
+        version = manifests.version() if manifests is not None else f"rows:{vectorstore._collection.count()}"
+        if self.version() == version:
+            return False
+        self.rebuild(vectorstore, version)
+        return True
+
+    def search(self, embedding, k: int = 10, rescore: int = None, snapshot=None) -> list:
+        """[(row, cosine similarity)], best first"""
+        _, arrays, _, _ = snapshot or self.snapshot()
+        if arrays is None:
+            return []
+        codes, scales, vectors = arrays
+        rows = len(codes)
+
+        query = normalize(np.asarray(embedding, dtype=np.float32))
+        prefix = normalize(query[:codes.shape[1]])
+        scores = np.empty(rows, dtype=np.float32)
+        for start in range(0, rows, BLOCK_ROWS):
+            block = slice(start, start + BLOCK_ROWS)
+            scores[block] = (codes[block].astype(np.float32) @ prefix) * scales[block]
+
+        n = min(rows, k * (rescore or self.rescore))
+        candidates = np.sort(np.argpartition(-scores, n - 1)[:n]) if n < rows else np.arange(rows)
+        exact = vectors[candidates] @ query
+        best = np.argsort(-exact)[:k]
+        return [(int(candidates[i]), float(exact[i])) for i in best]
+
+    def documents(self, rows: list, snapshot=None) -> list:
+        """Documents (with chunk IDs) for rows of the same build, in the order of rows"""
+        _, _, conn, lock = snapshot or self.snapshot()
+        if not rows or conn is None:
+            return []
+        with lock:
+            found = {row: (cid, text, meta) for row, cid, text, meta in conn.execute(
+                f"SELECT row, chunk_id, document, metadata FROM rows WHERE row IN ({','.join('?' * len(rows))})",
+                rows)}
+        return [Document(page_content=found[row][1] or "", metadata=json.loads(found[row][2]), id=found[row][0])
+                for row in rows if row in found]
+
+    def similarity_search_by_vector(self, embedding, k: int = 5) -> list:
+        snapshot = self.snapshot()
+        return self.documents([row for row, _ in self.search(embedding, k, snapshot=snapshot)], snapshot)
+
+
+class QuantizedRetriever(BaseRetriever):
+    """Dense retrieval over a QuantizedIndex; one query embedding per call"""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    index: QuantizedIndex
+    embeddings: Embeddings
+    k: int = 5
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list:
+        return self.index.similarity_search_by_vector(self.embeddings.embed_query(query), self.k)
@@ -0,0 +1,163 @@
+"""
+Reusable retrieval tool with a query-result cache.
+
+The notebook's retrieve_documents built a new MMR retriever on every call
+and re-ran the full search (query embedding + fetch_k candidates + MMR),
+even when the agent asked the same question again in a later turn or
+another thread. CachedRetriever builds the retriever once and caches its
+results:
+
+- keyed by the normalized query (Unicode NFKC, case-folded, whitespace
+  collapsed, surrounding punctuation dropped) and the index version
+- the index version comes from the ingest ManifestStore, which changes it
+  whenever ingestion adds or deletes chunks, in this or another process;
+  without manifests, the collection's row count stands in
+- LRU with maxsize entries and an optional TTL
+- stats() reports hits, misses, hit rate, invalidations and the mean
+  latency of hits and misses
+
+make_retrieval_tool(retriever) returns the retrieve_documents tool; its
+output is packed (packing.py): overlapping chunks merged, duplicates
+dropped, at most token_budget tokens, each passage citing its page.
+"""
+
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from langchain_core.tools import tool
+
+from agentic_rag.packing import TOKEN_BUDGET, format_context, pack_documents
+
+SEARCH_TYPE = "mmr"
+SEARCH_KWARGS = {"k": 5, "fetch_k": 10}
+MAXSIZE = 512
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    query = unicodedata.normalize("NFKC", query).casefold()
+    return _SPACES.sub(" ", query).strip(" \t\n?!.,;:\"'")
+
+
+def format_documents(docs: list, token_budget: int = TOKEN_BUDGET) -> str:
+    """Retrieved chunks packed into at most token_budget tokens of cited context"""
+    if not docs:
+        return "No relevant documents found."
+    return format_context(pack_documents(docs, token_budget))
+
+
+class CachedRetriever:
+    def __init__(self, vectorstore, manifests=None, search_type: str = SEARCH_TYPE,
+                 search_kwargs: dict = None, maxsize: int = MAXSIZE, ttl: float = None, retriever=None):
+        self.vectorstore = vectorstore
+        self.manifests = manifests
+        # Any retriever over vectorstore can be cached, e.g. mmr.MMRRetriever
+        self.retriever = retriever or vectorstore.as_retriever(search_type=search_type,
+                                                               search_kwargs=search_kwargs or dict(SEARCH_KWARGS))
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._cache = OrderedDict()  # (version, query) -> (stored at, docs), most recent last
+        self._version = None
+        self._lock = threading.Lock()
+        self.counts = {"hits": 0, "misses": 0, "invalidations": 0}
+        self.seconds = {"hits": 0.0, "misses": 0.0}
+
+    def index_version(self) -> str:
+        if self.manifests is not None:
+            return self.manifests.version()
+        return f"rows:{self.vectorstore._collection.count()}"
+
+    def _get(self, key: tuple):
+        with self._lock:
+            if key[0] != self._version:
+                # Entries for an older index can never be hit again
+                if self._version is not None and self._cache:
+                    self.counts["invalidations"] += 1
+                self._cache.clear()
+                self._version = key[0]
+            entry = self._cache.get(key)
+            if entry is None or (self.ttl is not None and time.monotonic() - entry[0] > self.ttl):
+                return None
+            self._cache.move_to_end(key)
+            return entry[1]
+
+    def _put(self, key: tuple, docs: list):
+        with self._lock:
+            if key[0] != self._version:
+                return  # ingestion changed the index during the search
+            self._cache[key] = (time.monotonic(), docs)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+    def _record(self, kind: str, started: float):
+        with self._lock:
+            self.counts[kind] += 1
+            self.seconds[kind] += time.perf_counter() - started
+
+    def invoke(self, query: str) -> list:
+        started = time.perf_counter()
+        key = (self.index_version(), normalize_query(query))
+        docs = self._get(key)
+        if docs is not None:
+            self._record("hits", started)
+            return list(docs)
+        docs = self.retriever.invoke(query)
+        self._put(key, docs)
+        self._record("misses", started)
+        return list(docs)
+
+    async def ainvoke(self, query: str) -> list:
+        started = time.perf_counter()
+        key = (self.index_version(), normalize_query(query))
+        docs = self._get(key)
+        if docs is not None:
+            self._record("hits", started)
+            return list(docs)
+        docs = await self.retriever.ainvoke(query)
+        self._put(key, docs)
+        self._record("misses", started)
+        return list(docs)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts, seconds, size = dict(self.counts), dict(self.seconds), len(self._cache)
+        total = counts["hits"] + counts["misses"]
+        return {
+            **counts,
+            "size": size,
+            "hit_rate": counts["hits"] / total if total else 0.0,
+            "hit_ms": 1000 * seconds["hits"] / counts["hits"] if counts["hits"] else 0.0,
+            "miss_ms": 1000 * seconds["misses"] / counts["misses"] if counts["misses"] else 0.0,
+        }
+
+
+def make_retrieval_tool(retriever: CachedRetriever, token_budget: int = TOKEN_BUDGET):
+    @tool
+    def retrieve_documents(query: str) -> str:
+        """
+        Search for relevant documents in the knowledge base.
+
+        Use this tool when you need information from the document collection
+        to answer the user's question. Do NOT use this for:
+        - General knowledge questions
+        - Greetings or small talk
+        - Simple calculations
+
+        Args:
+            query: The search query describing what information is needed
+
+        Returns:
+            Relevant document excerpts that can help answer the question
+        """
+        return format_documents(retriever.invoke(query), token_budget)
+
+    return retrieve_documents
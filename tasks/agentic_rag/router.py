@@ -0,0 +1,116 @@
+"""
+Pre-retrieval routing for the Agentic RAG graph.
+
+Without it every question costs two LLM calls when retrieval is needed
+(assistant decides -> tools -> assistant answers), and a greeting costs a
+call just to be routed. QueryRouter runs as a graph node before the
+assistant and decides locally:
+
+- "chat": greetings, thanks, questions about the assistant and bare
+  arithmetic (regex heuristics); no embedding or lookup is spent on them.
+  The assistant keeps its tools, so a misrouted question still costs only
+  the assistant's own decision to retrieve
+- "retrieve": the question's embedding is close to the index (cosine
+  similarity of the best chunk >= threshold); the retrieval tool runs right
+  away and its result is added as a tool call + tool message, so the
+  assistant answers in one call and cites it as if it had asked for it
+- "agent": anything else; the assistant decides as before
+
+The similarity check costs one query embedding (which the retriever then
+reuses from the embedding cache) and one Chroma lookup. The threshold is
+model-specific; 0.35 suits text-embedding-3-small, where on-topic questions
+usually score 0.4+ and small talk well below 0.3.
+"""
+
+import re
+import time
+import uuid
+from typing import NamedTuple, Optional
+
+import numpy as np
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.graph import MessagesState
+
+THRESHOLD = 0.35
+
+_NUMBER = r"\(*\s*-?\d+(\.\d+)?\s*\)*"  # at most one dot: "2.7.1.1" is an EC number, not arithmetic
+
+CHAT_PATTERNS = [
+    r"(hi|hello|hey|howdy|greetings|good (morning|afternoon|evening))( there)?",
+    r"(thanks|thank you|thx|cheers)( (so|very) much)?( for (the|your) help)?",
+    r"(bye|goodbye|see you|see ya)( later)?",
+    r"how are you( doing)?( today)?",
+    r"(ok|okay|cool|great|nice|awesome)",
+    r"(who|what) are you",
+    r"what (can|do) you (do|help( me)? with)",
+    r"(what is |what's |calculate |compute )?" + _NUMBER + r"(\s*[+\-*/^%]\s*" + _NUMBER + r")+",  # 1+ operators
+]
+_CHAT = re.compile(r"^(?:%s)[\s!?.]*$" % "|".join(CHAT_PATTERNS), re.IGNORECASE)
+
+
+class Route(NamedTuple):
+    kind: str  # "chat", "retrieve" or "agent"
+    score: Optional[float]  # best cosine similarity to the index, if computed
+    reason: str
+
+
+class RoutedState(MessagesState):
+    route: str
+
+
+def last_human_text(messages: list) -> str:
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            return message.content if isinstance(message.content, str) else str(message.content)
+    return ""
+
+
+class QueryRouter:
+    def __init__(self, vectorstore, retrieval_tool, threshold: float = THRESHOLD):
+        self.vectorstore = vectorstore
+        self.retrieval_tool = retrieval_tool
+        self.threshold = threshold
+        self.counts = {"chat": 0, "retrieve": 0, "agent": 0}
+        self.seconds = 0.0
+
+    def similarity(self, query: str) -> float:
+        """Cosine similarity between the query and its nearest chunk"""
+        embedding = np.asarray(self.vectorstore.embeddings.embed_query(query), dtype=np.float32)
+        results = self.vectorstore._collection.query(query_embeddings=[embedding.tolist()], n_results=1,
+                                                     include=["embeddings"])
+        if not len(results["embeddings"]) or not len(results["embeddings"][0]):
+            return 0.0
+        nearest = np.asarray(results["embeddings"][0][0], dtype=np.float32)
+        denominator = np.linalg.norm(embedding) * np.linalg.norm(nearest)
+        return float(embedding @ nearest / denominator) if denominator else 0.0
+
+    def classify(self, query: str) -> Route:
+        text = query.strip()
+        if not text or _CHAT.match(text):
+            return Route("chat", None, "small talk or arithmetic")
+        score = self.similarity(text)
+        if score >= self.threshold:
+            return Route("retrieve", score, f"similarity {score:.2f} >= {self.threshold}")
+        return Route("agent", score, f"similarity {score:.2f} < {self.threshold}")
+
+    def __call__(self, state: dict) -> dict:
+        """Graph node: sets state["route"] and, for "retrieve", adds the retrieval result"""
+        started = time.perf_counter()
+        query = last_human_text(state["messages"])
+        route = self.classify(query)
+        update = {"route": route.kind}
+        if route.kind == "retrieve":
+            call_id = f"call_route_{uuid.uuid4().hex[:12]}"
+            result = self.retrieval_tool.invoke({"query": query})
+            update["messages"] = [
+                AIMessage(content="", tool_calls=[{"name": self.retrieval_tool.name, "args": {"query": query},
+                                                   "id": call_id}]),
+                ToolMessage(content=result, tool_call_id=call_id, name=self.retrieval_tool.name),
+            ]
+        self.counts[route.kind] += 1
+        self.seconds += time.perf_counter() - started
+        return update
+
+    def stats(self) -> dict:
+        total = sum(self.counts.values())
+        return {**self.counts, "mean_ms": 1000 * self.seconds / total if total else 0.0}